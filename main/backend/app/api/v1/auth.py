@@ -5,7 +5,13 @@ from sqlalchemy import select
 from datetime import timedelta
 
 from app.db.session import get_db
-from app.core.auth import verify_password, create_access_token, get_current_active_user
+from app.core.auth import (
+    verify_password_async,
+    get_password_hash_async,
+    password_needs_rehash,
+    create_access_token,
+    get_current_active_user,
+)
 from app.models.user import User
 from app.schemas.user import LoginResponse, UserResponse, Token
 from app.config import settings
@@ -29,7 +35,7 @@ async def login(
     user = result.scalar_one_or_none()
     
     # Verify user exists and password is correct
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    if not user or not await verify_password_async(form_data.password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password",
@@ -43,6 +49,10 @@ async def login(
             detail="Inactive user account"
         )
     
+    # Transparently upgrade hashes made with an old cost factor
+    if password_needs_rehash(user.hashed_password):
+        user.hashed_password = await get_password_hash_async(form_data.password)
+    
     # Create access token
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -5,17 +5,19 @@ Handles HR letter templates, generation, and retrieval
 from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
 from fastapi.responses import FileResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, and_, or_
-from typing import List
+from sqlalchemy import select, and_, or_, tuple_
+from sqlalchemy.orm import undefer
+from typing import List, Optional
+import base64
 import csv
 import io
 import hashlib
 from datetime import datetime
 
 from app.db.session import get_db
-from app.core.auth import get_current_active_user
+from app.core.permissions import require_permission
 from app.models.user import User
-from app.models.document import DocumentTemplate, GeneratedDocument
+from app.models.document import GeneratedDocument
 from app.schemas.document import (
     DocumentTemplateResponse,
     AgentMessageResponse,
@@ -34,8 +36,11 @@ from app.schemas.document import (
     DocumentChatRequest,
     DocumentChatResponse
 )
+from app.core.crypto import get_field_cipher
+from app.core.serialization import format_sse
 from app.services.document_agent import DocumentAgentService
 from app.services.document_chat import DocumentChatService
+from app.services.template_catalog import template_catalog
 
 router = APIRouter(prefix="/documents", tags=["Documents"])
 
@@ -44,51 +49,29 @@ router = APIRouter(prefix="/documents", tags=["Documents"])
 async def list_templates(
     category: str = None,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """
     List available document templates
     HR users only
     """
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="Only HR users can access document templates"
-        )
-    
-    query = select(DocumentTemplate).where(DocumentTemplate.is_active.is_(True))
-    if category:
-        query = query.where(DocumentTemplate.category == category)
-    
-    result = await db.execute(query)
-    templates = result.scalars().all()
-    
-    return templates
+    return await template_catalog.list_active(db, category or None)
 
 
 @router.get("/templates/{template_id}/csv-template")
 async def download_csv_template(
     template_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Download CSV template with column headers for a specific template"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
-    result = await db.execute(
-        select(DocumentTemplate).where(DocumentTemplate.id == template_id)
-    )
-    template = result.scalar_one_or_none()
+    template = await template_catalog.get(db, template_id)
     
     if not template:
         raise HTTPException(status_code=404, detail="Template not found")
     
     # Determine fields: prefer PDF-extracted placeholders if available
-    agent_tmp = DocumentAgentService(db)
-    pdf_required, pdf_optional = agent_tmp._extract_fields_from_pdf(template.name)
-    required_fields = pdf_required or template.required_fields
-    optional_fields = pdf_optional or template.optional_fields
+    required_fields, optional_fields = template.resolved_fields()
 
     # Generate CSV with headers
     output = io.StringIO()
@@ -161,18 +144,15 @@ async def download_csv_template(
 async def document_chat(
     request: DocumentChatRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """
     AI-powered conversational document generation
     Natural language interface for creating HR documents
     """
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     try:
         chat_service = DocumentChatService()
-        response = chat_service.generate_response(
+        response = await chat_service.generate_response(
             user_message=request.message,
             conversation_history=request.conversation_history,
             available_templates=request.available_templates,
@@ -190,15 +170,47 @@ async def document_chat(
         )
 
 
+@router.post("/chat/stream")
+async def stream_document_chat(
+    request: DocumentChatRequest,
+    current_user: User = Depends(require_permission("docs.manage"))
+):
+    """
+    Streaming variant of /chat (SSE): `token` events with `{text}` as the
+    reply is written, then `done` with the DocumentChatResponse
+    """
+    template_names = [t.get('name', '') for t in request.available_templates]
+    fallback = DocumentChatResponse(
+        reply=f"I can help you create: {', '.join(template_names)}. Which document do you need?",
+        action=None,
+        is_complete=False
+    )
+
+    async def event_stream():
+        try:
+            chat_service = DocumentChatService()
+            async for event, data in chat_service.stream_response(
+                user_message=request.message,
+                conversation_history=request.conversation_history,
+                available_templates=request.available_templates,
+                session_context={"session_id": request.session_id}
+            ):
+                if event == "done":
+                    data = DocumentChatResponse(**data)
+                yield format_sse(event, data)
+        except Exception as e:
+            print(f"Chat service error: {e}")
+            yield format_sse("done", fallback)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/agent/start", response_model=AgentMessageResponse)
 async def start_agent_conversation(
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Start a new conversation with the document agent"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     agent = DocumentAgentService(db)
     response = await agent.start_conversation(current_user.id)
     
@@ -209,12 +221,9 @@ async def start_agent_conversation(
 async def select_template(
     request: TemplateSelectionRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Select a template in the conversation"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     agent = DocumentAgentService(db)
     response = await agent.process_template_selection(
         request.session_id,
@@ -228,12 +237,9 @@ async def select_template(
 async def choose_input_method(
     request: InputMethodRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Choose how to provide data (manual entry, upload CSV or download template)"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     agent = DocumentAgentService(db)
     response = await agent.process_input_method(
         request.session_id,
@@ -247,12 +253,9 @@ async def choose_input_method(
 async def submit_manual_field(
     request: ManualFieldInput,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Submit a single field value in manual entry mode"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     agent = DocumentAgentService(db)
     response = await agent.process_manual_field(
         request.session_id,
@@ -267,12 +270,9 @@ async def submit_manual_field(
 async def complete_manual_entry(
     request: ManualEntryComplete,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Complete manual entry - add another or generate documents"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     agent = DocumentAgentService(db)
     response = await agent.process_manual_complete(
         request.session_id,
@@ -287,12 +287,9 @@ async def complete_manual_entry(
 async def preview_document(
     request: DocumentPreviewRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Preview document before generation with validation"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     try:
         agent = DocumentAgentService(db)
         response = await agent.generate_preview(request.session_id)
@@ -313,12 +310,9 @@ async def preview_document(
 async def generate_document(
     request: DocumentGenerateRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Generate final document in PDF or DOCX format"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     try:
         agent = DocumentAgentService(db)
         response = await agent.generate_documents(
@@ -340,12 +334,9 @@ async def upload_csv_data(
     file: UploadFile = File(...),
     session_id: str = Form(...),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Upload CSV file and generate documents"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     # Parse CSV file
     content = await file.read()
     csv_text = content.decode('utf-8')
@@ -373,12 +364,9 @@ async def upload_signature(
     file: UploadFile = File(...),
     session_id: str = Form(...),
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Upload e-signature image"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     # Validate file type
     allowed_types = ["image/png", "image/jpeg", "image/jpg"]
     if file.content_type not in allowed_types:
@@ -400,22 +388,51 @@ async def upload_signature(
     return AgentMessageResponse(**response)
 
 
+# Columns returned by the archive search; large bodies are opt-in
+_QUERY_COLUMNS = (
+    GeneratedDocument.id,
+    GeneratedDocument.template_id,
+    GeneratedDocument.document_type,
+    GeneratedDocument.generated_at,
+    GeneratedDocument.status,
+    GeneratedDocument.email_sent,
+    GeneratedDocument.digitally_signed,
+)
+_MAX_QUERY_LIMIT = 100
+
+
+def _encode_cursor(generated_at: datetime, document_id: int) -> str:
+    raw = f"{generated_at.isoformat()}|{document_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        generated_at, document_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(generated_at), int(document_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.get("/query", response_model=DocumentQueryResponse)
 async def query_documents(
     employee_code: str = None,
     phone_number: str = None,
     document_type: str = None,
     limit: int = 20,
+    cursor: Optional[str] = None,
+    include_preview: bool = False,
+    include_content: bool = False,
+    include_names: bool = False,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """
     Search and retrieve previously generated documents
-    Can search by employee_code, phone_number, or document_type
+    Can search by employee_code, phone_number, or document_type.
+    Results are newest first; pass ``next_cursor`` back as ``cursor`` for the next page.
     """
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     filters = []
     
     if employee_code:
@@ -428,25 +445,47 @@ async def query_documents(
     if document_type:
         filters.append(GeneratedDocument.document_type == document_type)
     
-    query = select(GeneratedDocument)
+    columns = list(_QUERY_COLUMNS)
+    if include_preview:
+        columns.append(GeneratedDocument.preview_masked_html)
+    if include_content:
+        columns.append(GeneratedDocument.content)
+    if include_names:
+        columns.append(GeneratedDocument.recipient_name_encrypted)
+    
+    query = select(*columns)
     if filters:
         query = query.where(or_(*filters))
+    if cursor:
+        after_generated_at, after_id = _decode_cursor(cursor)
+        query = query.where(
+            tuple_(GeneratedDocument.generated_at, GeneratedDocument.id) < tuple_(after_generated_at, after_id)
+        )
     
-    query = query.order_by(GeneratedDocument.generated_at.desc()).limit(limit)
+    limit = max(1, min(limit, _MAX_QUERY_LIMIT))
+    query = query.order_by(
+        GeneratedDocument.generated_at.desc(), GeneratedDocument.id.desc()
+    ).limit(limit + 1)
     
     result = await db.execute(query)
-    documents = result.scalars().all()
+    rows = result.all()
+    
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = _encode_cursor(last.generated_at, last.id)
+    
+    documents = [GeneratedDocumentResponse(**row._mapping) for row in rows]
+    if include_names:
+        # One shared cipher for the whole page
+        names = get_field_cipher().decrypt_many(row.recipient_name_encrypted for row in rows)
+        for doc, name in zip(documents, names):
+            doc.recipient_name = name
     
-    # Prefer masked preview in response
-    docs_resp = []
-    for doc in documents:
-        payload = GeneratedDocumentResponse.from_orm(doc)
-        data = payload.dict()
-        data["preview_masked_html"] = getattr(doc, "preview_masked_html", None)
-        docs_resp.append(GeneratedDocumentResponse(**data))
     return DocumentQueryResponse(
-        documents=docs_resp,
-        total=len(documents)
+        documents=documents,
+        next_cursor=next_cursor
     )
 
 
@@ -454,14 +493,13 @@ async def query_documents(
 async def get_document_details(
     document_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Get document details with decrypted metadata"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     result = await db.execute(
-        select(GeneratedDocument).where(GeneratedDocument.id == document_id)
+        select(GeneratedDocument)
+        .options(undefer(GeneratedDocument.content), undefer(GeneratedDocument.preview_masked_html))
+        .where(GeneratedDocument.id == document_id)
     )
     document = result.scalar_one_or_none()
     
@@ -469,14 +507,14 @@ async def get_document_details(
         raise HTTPException(status_code=404, detail="Document not found")
     
     # Decrypt name for display
-    agent = DocumentAgentService(db)
-    decrypted_name = agent._decrypt_data(document.recipient_name_encrypted)
+    decrypted_name = get_field_cipher().decrypt(document.recipient_name_encrypted)
     
-    return GeneratedDocumentDetail(
-        **GeneratedDocumentResponse.from_orm(document).dict(),
+    payload = GeneratedDocumentResponse.from_orm(document).dict()
+    payload.update(
         recipient_name=decrypted_name,
         file_url=f"/api/v1/documents/{document_id}/download"
     )
+    return GeneratedDocumentDetail(**payload)
 
 
 @router.get("/{document_id}/download")
@@ -484,14 +522,13 @@ async def download_document(
     document_id: int,
     format: str = "pdf",
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Download generated document as PDF or DOCX"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     result = await db.execute(
-        select(GeneratedDocument).where(GeneratedDocument.id == document_id)
+        select(GeneratedDocument)
+        .options(undefer(GeneratedDocument.content))
+        .where(GeneratedDocument.id == document_id)
     )
     document = result.scalar_one_or_none()
     
@@ -499,8 +536,7 @@ async def download_document(
         raise HTTPException(status_code=404, detail="Document not found")
     
     # Build meaningful filename: name_lettertype_date
-    agent = DocumentAgentService(db)
-    recipient_name = agent._decrypt_data(document.recipient_name_encrypted)
+    recipient_name = get_field_cipher().decrypt(document.recipient_name_encrypted)
     safe_name = (recipient_name or "document").replace(" ", "_")
     safe_type = (document.document_type or "letter").replace(" ", "_")
     today = datetime.now().strftime("%Y-%m-%d")
@@ -581,17 +617,16 @@ async def download_document(
 async def download_bulk_documents(
     document_ids: List[int],
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Download multiple documents as ZIP file"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     import zipfile
     
     # Fetch all documents
     result = await db.execute(
-        select(GeneratedDocument).where(GeneratedDocument.id.in_(document_ids))
+        select(GeneratedDocument)
+        .options(undefer(GeneratedDocument.content))
+        .where(GeneratedDocument.id.in_(document_ids))
     )
     documents = result.scalars().all()
     
@@ -621,14 +656,13 @@ async def send_document_email(
     document_id: int,
     email_request: DocumentEmailRequest,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Send document via email"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     result = await db.execute(
-        select(GeneratedDocument).where(GeneratedDocument.id == document_id)
+        select(GeneratedDocument)
+        .options(undefer(GeneratedDocument.content))
+        .where(GeneratedDocument.id == document_id)
     )
     document = result.scalar_one_or_none()
     
@@ -654,8 +688,7 @@ async def send_document_email(
         )
         
         # Get document details for filename
-        agent = DocumentAgentService(db)
-        recipient_name = agent._decrypt_data(document.recipient_name_encrypted)
+        recipient_name = get_field_cipher().decrypt(document.recipient_name_encrypted)
         safe_name = (recipient_name or "document").replace(" ", "_")
         safe_type = (document.document_type or "letter").replace(" ", "_")
         today = datetime.now().strftime("%Y-%m-%d")
@@ -703,12 +736,9 @@ async def send_document_email(
 async def add_digital_signature(
     document_id: int,
     db: AsyncSession = Depends(get_db),
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(require_permission("docs.manage"))
 ):
     """Add digital signature to document"""
-    if current_user.role not in ["hr", "admin"]:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN)
-    
     result = await db.execute(
         select(GeneratedDocument).where(GeneratedDocument.id == document_id)
     )
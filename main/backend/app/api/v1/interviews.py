@@ -10,6 +10,8 @@ from app.db.session import get_db
 from app.schemas.interview import (
     InterviewCreate,
     InterviewOut,
+    InterviewSummaryOut,
+    InterviewSummaryPage,
     InterviewUpdateStatus,
     QuestionCreate,
     ResponseCreate,
@@ -18,6 +20,7 @@ from app.schemas.interview import (
 )
 from app.services import interview_service
 from app.services.ws_manager import manager
+from app.services.transcript_buffer import transcript_buffer
 from app.db.session import AsyncSessionLocal
 from app.utils.storage import save_upload_file
 from app.utils.resume_parser import extract_text
@@ -31,18 +34,56 @@ router = APIRouter(prefix="/interviews", tags=["Interviews"])
 
 def _build_interview_out(interview):
     payload = interview.to_dict()
+    # Live interviews may hold transcript changes that are not flushed yet
+    buffered = transcript_buffer.snapshot(interview.id)
+    if buffered is not None:
+        payload["transcript"] = buffered
     return InterviewOut(**payload)
 
 
-@router.get("/", response_model=List[InterviewOut])
+@router.get("/", response_model=List[InterviewOut], deprecated=True)
 async def list_interviews(
     db: AsyncSession = Depends(get_db),
     current_user: User = Depends(require_permission("interviews.dashboard"))
 ):
+    """Every interview with its transcript. Deprecated: use /summary (paginated) and /{id}."""
     interviews = await interview_service.list_interviews(db)
     return [_build_interview_out(i) for i in interviews]
 
 
+@router.get("/summary", response_model=InterviewSummaryPage)
+async def list_interview_summaries(
+    status: Optional[str] = Query(None, pattern="^(scheduled|ongoing|completed|cancelled)$"),
+    role: Optional[str] = None,
+    scheduled_from: Optional[datetime] = None,
+    scheduled_to: Optional[datetime] = None,
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_permission("interviews.dashboard"))
+):
+    """Paginated dashboard listing; fetch /{id} for the transcript."""
+    rows, total = await interview_service.list_interview_summaries(
+        db,
+        status=status,
+        role=role,
+        scheduled_from=scheduled_from,
+        scheduled_to=scheduled_to,
+        offset=(page - 1) * page_size,
+        limit=page_size,
+    )
+    for row in rows:
+        buffered = transcript_buffer.snapshot(row["id"])
+        if buffered is not None:
+            row["question_count"] = len(buffered)
+    return InterviewSummaryPage(
+        items=[InterviewSummaryOut(**row) for row in rows],
+        total=total,
+        page=page,
+        page_size=page_size,
+    )
+
+
 @router.post("/schedule", response_model=InterviewOut)
 async def schedule_interview(
     candidate_name: str = Form(...),
@@ -125,6 +166,9 @@ async def update_status(
         raise HTTPException(status_code=404, detail="Interview not found")
     if interview.interviewer_key != key:
         raise HTTPException(status_code=403, detail="Invalid interviewer key")
+    if transcript_buffer.is_tracked(interview_id):
+        # Persist the live transcript before the status change (e.g. completed) commits
+        await transcript_buffer.flush(interview_id)
     updated = await interview_service.update_status(db, interview, payload.status)
     return _build_interview_out(updated)
 
@@ -141,6 +185,11 @@ async def send_question(
         raise HTTPException(status_code=404, detail="Interview not found")
     if interview.interviewer_key != key:
         raise HTTPException(status_code=403, detail="Invalid interviewer key")
+    if transcript_buffer.is_tracked(interview_id):
+        # A live session owns the transcript; go through its buffer
+        transcript_buffer.add_question(interview_id, payload.question)
+        await transcript_buffer.flush(interview_id)
+        return _build_interview_out(interview)
     updated = await interview_service.add_question(db, interview, payload)
     return _build_interview_out(updated)
 
@@ -157,6 +206,10 @@ async def submit_response(
         raise HTTPException(status_code=404, detail="Interview not found")
     if interview.candidate_key != key:
         raise HTTPException(status_code=403, detail="Invalid candidate key")
+    if transcript_buffer.is_tracked(interview_id):
+        transcript_buffer.add_response(interview_id, payload.question_id, payload.answer)
+        await transcript_buffer.flush(interview_id)
+        return _build_interview_out(interview)
     updated = await interview_service.add_response(db, interview, payload)
     return _build_interview_out(updated)
 
@@ -204,23 +257,19 @@ async def interview_socket(websocket: WebSocket, interview_id: int, key: str):
             return
         role = "interviewer" if interview.interviewer_key == key else "candidate"
         await manager.connect(interview_id, websocket, role)
-        await websocket.send_json({"type": "connected", "role": role})
+        transcript_buffer.track(interview)
+        await manager.send(websocket, {"type": "connected", "role": role})
 
         while True:
             data = await websocket.receive_json()
             msg_type = data.get("type")
 
-            # interviewer sends question
+            # interviewer sends question; broadcast first, persisted by the buffer
             if msg_type == "question" and role == "interviewer":
                 question_text = data.get("question", "").strip()
                 if not question_text:
                     continue
-                interview = await interview_service.add_question(
-                    db, interview, QuestionCreate(question=question_text)
-                )
-                await db.commit()
-                await db.refresh(interview)
-                new_question = interview.transcript[-1] if interview.transcript else None
+                new_question = transcript_buffer.add_question(interview_id, question_text)
                 await manager.broadcast(
                     interview_id,
                     {"type": "question", "interview_id": interview_id, "question": new_question},
@@ -232,11 +281,7 @@ async def interview_socket(websocket: WebSocket, interview_id: int, key: str):
                 answer = data.get("answer", "")
                 if not question_id or answer is None:
                     continue
-                interview = await interview_service.add_response(
-                    db, interview, ResponseCreate(question_id=question_id, answer=answer)
-                )
-                await db.commit()
-                await db.refresh(interview)
+                transcript_buffer.add_response(interview_id, question_id, answer)
                 await manager.broadcast(
                     interview_id,
                     {
@@ -251,6 +296,8 @@ async def interview_socket(websocket: WebSocket, interview_id: int, key: str):
             elif msg_type == "status" and role == "interviewer":
                 status = data.get("status")
                 if status:
+                    # Status changes are a durability point for the transcript
+                    await transcript_buffer.flush(interview_id)
                     interview = await interview_service.update_status(db, interview, status)
                     await db.commit()
                     await db.refresh(interview)
@@ -262,6 +309,11 @@ async def interview_socket(websocket: WebSocket, interview_id: int, key: str):
     except WebSocketDisconnect:
         manager.disconnect(interview_id, websocket)
     finally:
+        if transcript_buffer.is_tracked(interview_id):
+            if interview_id in manager.active_connections:
+                await transcript_buffer.flush(interview_id)
+            else:
+                await transcript_buffer.release(interview_id)
         await db.close()
 
 
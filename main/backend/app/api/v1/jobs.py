@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from pydantic import BaseModel
 
 from app.core.auth import get_current_active_user
@@ -42,8 +42,10 @@ class ProfileMatchResponse(BaseModel):
 
 # Endpoints
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from app.core.auth import get_current_active_user
 from app.core.permissions import require_permission
+from app.core.serialization import format_sse
 from app.models.user import User
 from app.schemas.jobs import (
     GenerateJDRequest, GenerateJDResponse,
@@ -55,7 +57,10 @@ from app.schemas.jobs import (
 )
 from app.services.ai.jd_generator import JDGeneratorAgent
 from app.services.ai.job_builder_chat import JobBuilderChatAgent
+from app.services.builder_sessions import BuilderSession, builder_sessions
+from app.services.jd_cache import jd_cache, jd_cache_key
 from app.services.skills_database import search_skills, get_skill_categories
+from app.utils.llm_gateway import LLMUnavailableError
 
 router = APIRouter(prefix="/jobs", tags=["Jobs"])
 def _mask_email(text: str) -> str:
@@ -84,6 +89,19 @@ def _mask_pii_text(text: str) -> str:
     text = _mask_phone(text)
     return text
 
+def _mask_partial_text(text: str) -> str:
+    """
+    Masked prefix of a field that is still being written. The masks only match
+    complete emails and phone numbers, so the trailing word and any trailing
+    run of phone characters are held back until later text completes them.
+    """
+    import re
+    cut = re.search(r"\S*$", text).start()
+    phone = re.search(r"[+(]?\d[\d\s\-()]*$", text)
+    if phone:
+        cut = min(cut, phone.start())
+    return _mask_pii_text(text[:cut])
+
 def _mask_pii_in_obj(obj):
     # Recursively mask strings in nested structures
     if isinstance(obj, str):
@@ -95,6 +113,40 @@ def _mask_pii_in_obj(obj):
     return obj
 
 
+def _jd_arguments(request: GenerateJDRequest) -> dict:
+    """Agent arguments for a JD request (defaults filled, tone normalized)"""
+    # Auto-generate expectations if not provided
+    expectations = request.expectations
+    if not expectations:
+        expectations = f"Drive excellence as a {request.seniority} {request.role}, delivering high-quality results and contributing to team success."
+    
+    # Normalize company_tone to known buckets if possible; otherwise pass through free text
+    tone_raw = (request.company_tone or "").strip().lower()
+    tone_map = {
+        "formal": "formal",
+        "startup": "startup",
+        "mnc": "mnc",
+        "tech": "tech",
+    }
+    normalized_tone = None
+    for key in tone_map.keys():
+        if key in tone_raw:
+            normalized_tone = tone_map[key]
+            break
+    company_tone = normalized_tone or request.company_tone
+
+    return {
+        "role": request.role,
+        "seniority": request.seniority,
+        "expectations": expectations,
+        "must_have_skills": request.must_have_skills,
+        "preferred_skills": request.preferred_skills,
+        "company_tone": company_tone,
+        "department": request.department,
+        "location": request.location,
+    }
+
+
 @router.post("/generate-jd", response_model=GenerateJDResponse)
 async def generate_job_description(
     request: GenerateJDRequest,
@@ -108,49 +160,79 @@ async def generate_job_description(
     - Skill matrix with proficiency levels
     - Salary benchmark
     - Strategic insights
+    
+    Identical requests (after normalization) are served from the JD cache;
+    set `regenerate` to get a new JD.
     """
     try:
         agent = JDGeneratorAgent()
-        
-        # Auto-generate expectations if not provided
-        expectations = request.expectations
-        if not expectations:
-            expectations = f"Drive excellence as a {request.seniority} {request.role}, delivering high-quality results and contributing to team success."
-        
-        # Normalize company_tone to known buckets if possible; otherwise pass through free text
-        tone_raw = (request.company_tone or "").strip().lower()
-        tone_map = {
-            "formal": "formal",
-            "startup": "startup",
-            "mnc": "mnc",
-            "tech": "tech",
-        }
-        normalized_tone = None
-        for key in tone_map.keys():
-            if key in tone_raw:
-                normalized_tone = tone_map[key]
-                break
-        company_tone = normalized_tone or request.company_tone
-
-        result = await agent.generate_jd(
-            role=request.role,
-            seniority=request.seniority,
-            expectations=expectations,
-            must_have_skills=request.must_have_skills,
-            preferred_skills=request.preferred_skills,
-            company_tone=company_tone,
-            department=request.department,
-            location=request.location
+        arguments = _jd_arguments(request)
+        result = await jd_cache.get_or_generate(
+            arguments, lambda: agent.generate_jd(**arguments), regenerate=request.regenerate
         )
         # Mask PII in returned content before responding
         masked = _mask_pii_in_obj(result)
         return masked
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to generate JD: {str(e)}")
 
 
+@router.post("/generate-jd/stream")
+async def stream_job_description(
+    request: GenerateJDRequest,
+    current_user: User = Depends(require_permission("jobs.generate_jd"))
+):
+    """
+    Streaming variant of /generate-jd (SSE)
+    
+    Events:
+    - `partial`: `{path, text}` while a text field is being written (a trailing
+      word or number that could still become PII is held back)
+    - `field`: `{path, value}` when a section or sub-section is complete
+    - `done`: the validated GenerateJDResponse
+    - `error`: `{message}`
+    
+    A cached JD is sent as a single `done` event unless `regenerate` is set.
+    """
+    try:
+        agent = JDGeneratorAgent()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    arguments = _jd_arguments(request)
+    cache_key = jd_cache_key(arguments)
+    cached = None if request.regenerate else await jd_cache.get(cache_key)
+
+    async def event_stream():
+        try:
+            if cached is not None:
+                cached["metadata"] = {**cached.get("metadata", {}), "cached": True}
+                data = GenerateJDResponse(**_mask_pii_in_obj(cached)).model_dump(mode="json")
+                yield format_sse("done", data)
+                return
+            async for event, data in agent.stream_jd(**arguments):
+                if event == "partial":
+                    # Unfinished text may end in half an email or phone number
+                    text = _mask_partial_text(data["text"])
+                    if text:
+                        yield format_sse(event, {"path": data["path"], "text": text})
+                    continue
+                if event == "done":
+                    await jd_cache.put(cache_key, data)
+                # Complete values are masked the same way as the full response
+                data = _mask_pii_in_obj(data)
+                if event == "done":
+                    data = GenerateJDResponse(**data).model_dump(mode="json")
+                yield format_sse(event, data)
+        except Exception as e:
+            yield format_sse("error", {"message": f"Failed to generate JD: {str(e)}"})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+
 @router.post("/explain-jd", response_model=ExplainJDResponse)
 async def explain_jd_to_candidate(
     request: ExplainJDRequest,
@@ -170,6 +252,8 @@ async def explain_jd_to_candidate(
             explanation=explanation,
             role=request.role
         )
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to explain JD: {str(e)}")
 
@@ -193,6 +277,8 @@ async def rewrite_jd_for_manager(
             manager_briefing=briefing,
             role=request.role
         )
+    except LLMUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to rewrite JD: {str(e)}")
 
@@ -300,6 +386,23 @@ async def get_job(
     }
 
 
+def _builder_session(request: ChatBuilderRequest, user: User) -> Tuple[BuilderSession, Optional[dict]]:
+    """
+    The session named in the request, or a new one seeded from the
+    client-sent history and data (first message, older clients, or a session
+    that expired), plus the client-sent data. That data wins over the
+    session's; apply it under the session lock.
+    """
+    current_data = request.current_data.model_dump() if request.current_data else None
+    session = builder_sessions.get(request.session_id, user.id) if request.session_id else None
+    if session is None:
+        if request.session_id and not request.conversation_history and current_data is None:
+            raise HTTPException(status_code=404, detail="Chat session expired; please start a new conversation")
+        history = [{"role": msg.role, "content": msg.content} for msg in request.conversation_history]
+        return builder_sessions.create(user.id, current_data, history), current_data
+    return session, current_data
+
+
 @router.post("/chat/interactive-builder", response_model=ChatBuilderResponse)
 async def interactive_job_builder(
     request: ChatBuilderRequest,
@@ -318,30 +421,32 @@ async def interactive_job_builder(
     4. Returns completion status
     5. When complete, provides summary for form auto-fill
     
+    The server keeps the conversation: send the returned `session_id` with
+    the next message instead of the conversation history.
+    
     **Required Permission:** jobs.generate_jd
     """
+    session, current_data = _builder_session(request, current_user)
     try:
         agent = JobBuilderChatAgent()
         
-        # Convert Pydantic models to dicts for agent processing
-        conversation_history = [
-            {"role": msg.role, "content": msg.content}
-            for msg in request.conversation_history
-        ]
-        
-        current_data = request.current_data.model_dump() if request.current_data else None
-        
-        # Process message
-        result = await agent.process_message(
-            user_message=request.message,
-            conversation_history=conversation_history,
-            current_data=current_data
-        )
+        async with builder_sessions.lock(session.session_id):
+            if current_data is not None:
+                session.current_data = current_data
+            result = await agent.process_message(
+                user_message=request.message,
+                conversation_history=session.history,
+                current_data=session.current_data,
+                folded_turns=session.folded,
+                focus_field=session.focus
+            )
+            session.record(request.message, result)
         
         # Add summary if complete
         if result.get("is_complete"):
             result["summary"] = agent.generate_summary(result["extracted_data"])
         
+        result["session_id"] = session.session_id
         return result
         
     except ValueError as e:
@@ -350,3 +455,47 @@ async def interactive_job_builder(
         print(f"Chat builder error: {e}")
         raise HTTPException(status_code=500, detail=f"Chat processing failed: {str(e)}")
 
+
+@router.post("/chat/interactive-builder/stream")
+async def stream_interactive_job_builder(
+    request: ChatBuilderRequest,
+    current_user: User = Depends(require_permission("jobs.generate_jd"))
+):
+    """
+    Streaming variant of /chat/interactive-builder (SSE)
+    
+    Events:
+    - `partial`: `{path, text}` as the assistant reply is written
+    - `field`: `{path, value}` as extracted fields complete
+    - `done`: the validated ChatBuilderResponse
+    - `error`: `{message}`
+    """
+    try:
+        agent = JobBuilderChatAgent()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    session, current_data = _builder_session(request, current_user)
+
+    async def event_stream():
+        try:
+            async with builder_sessions.lock(session.session_id):
+                if current_data is not None:
+                    session.current_data = current_data
+                async for event, data in agent.stream_message(
+                    user_message=request.message,
+                    conversation_history=session.history,
+                    current_data=session.current_data,
+                    folded_turns=session.folded,
+                    focus_field=session.focus
+                ):
+                    if event == "done":
+                        session.record(request.message, data)
+                        if data.get("is_complete"):
+                            data["summary"] = agent.generate_summary(data["extracted_data"])
+                        data = ChatBuilderResponse(**data, session_id=session.session_id).model_dump(mode="json")
+                    yield format_sse(event, data)
+        except Exception as e:
+            print(f"Chat builder error: {e}")
+            yield format_sse("error", {"message": f"Chat processing failed: {str(e)}"})
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
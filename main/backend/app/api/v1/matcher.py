@@ -1,6 +1,7 @@
+import asyncio
+from datetime import datetime
 from typing import List, AsyncGenerator
 from pathlib import Path
-import json
 import io
 import zipfile
 
@@ -8,24 +9,27 @@ from fastapi import APIRouter, Depends, File, UploadFile, Form, HTTPException
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import selectinload, undefer
 
 from app.config import settings
 from app.core.permissions import require_permission
 from app.core.auth import get_current_active_user
+from app.core.serialization import format_sse
 from app.db.session import get_db
-from app.models.matcher import CandidateProfile, ResumeUpload
-from app.schemas.matcher import CandidateProfileResponse, DownloadZipRequest
-from app.services.ai.profile_matcher import process_resume_upload
+from app.models.matcher import CandidateProfile, MatchResult, MatchRun, ResumeUpload
+from app.schemas.matcher import (
+    BatchMatchRunResponse,
+    CandidateProfileResponse,
+    DownloadZipRequest,
+    MatchCandidateSummary,
+)
+from app.services.ai.batch_matcher import poll_batch_run, submit_batch_run
+from app.services.ai.profile_matcher import build_resume_result, evaluate_candidates, prepare_resume
 from app.models.user import User
 
 router = APIRouter(prefix="/matcher", tags=["Profile Matcher"])
 
 
-def format_sse(event: str, data: dict) -> str:
-    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
-
-
 @router.post("/upload")
 async def upload_and_stream(
     job_description: str = Form(...),
@@ -35,6 +39,7 @@ async def upload_and_stream(
 ):
     """
     Upload multiple resumes and stream AI evaluation results (SSE).
+    Resumes are parsed first, then evaluated several per request.
     """
     if not files:
         raise HTTPException(status_code=400, detail="No files provided")
@@ -52,6 +57,8 @@ async def upload_and_stream(
         )
 
     async def event_stream() -> AsyncGenerator[bytes, None]:
+        # Parse every resume first so evaluations can be packed per request
+        prepared = []
         for payload in payloads:
             upload_row = ResumeUpload(
                 original_filename=payload["filename"],
@@ -62,23 +69,160 @@ async def upload_and_stream(
             db.add(upload_row)
             await db.flush()
             try:
-                result = await process_resume_upload(payload["bytes"], payload["filename"], upload_dir, job_description)
-                upload_row.stored_path = result["stored_path"]
-                upload_row.status = "completed"
-                upload_row.processed_at = upload_row.uploaded_at
-                await db.commit()
-                result["upload_id"] = upload_row.id
-                yield format_sse("update", result).encode()
+                # Parsing (PDF/DOCX extraction, PII masking) is blocking; keep it off the loop
+                item = await asyncio.to_thread(prepare_resume, payload["bytes"], payload["filename"], upload_dir)
+                prepared.append((payload, upload_row, item))
             except Exception as exc:
                 upload_row.status = "failed"
                 upload_row.error_message = str(exc)
                 await db.commit()
-                yield format_sse("error", {"file": payload["filename"], "message": str(exc)}).encode()
-        yield format_sse("done", {}).encode()
+                yield format_sse("error", {"file": payload["filename"], "message": str(exc)})
+
+        candidates = [(item["protected"], item["metadata"]) for _, _, item in prepared]
+        # Batch lane: interactive chat keeps priority over bulk evaluation
+        async for index, outcome in evaluate_candidates(candidates, job_description, user_id=current_user.id):
+            payload, upload_row, item = prepared[index]
+            if isinstance(outcome, Exception):
+                upload_row.status = "failed"
+                upload_row.error_message = str(outcome)
+                await db.commit()
+                yield format_sse("error", {"file": payload["filename"], "message": str(outcome)})
+                continue
+            result = build_resume_result(item, outcome)
+            upload_row.stored_path = result["stored_path"]
+            upload_row.status = "completed"
+            upload_row.processed_at = upload_row.uploaded_at
+            await db.commit()
+            result["upload_id"] = upload_row.id
+            yield format_sse("update", result)
+        yield format_sse("done", {})
 
     return StreamingResponse(event_stream(), media_type="text/event-stream")
 
 
+@router.post("/batch", response_model=BatchMatchRunResponse)
+async def submit_batch_evaluation(
+    job_description: str = Form(...),
+    job_title: str = Form("Batch evaluation"),
+    files: List[UploadFile] = File(...),
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_permission("jobs.matcher.use")),
+):
+    """
+    Offline alternative to /upload for large runs (e.g. campus drives).
+    Resumes are parsed and stored now; their evaluations are submitted as one
+    provider batch and ingested into match results when it completes. Check
+    progress with GET /matcher/batch/{run_id}.
+    """
+    if not files:
+        raise HTTPException(status_code=400, detail="No files provided")
+
+    upload_dir = Path(settings.UPLOAD_DIR)
+    run = MatchRun(job_title=job_title, job_description=job_description, status="preparing")
+    db.add(run)
+    candidates = []
+    failed_files = []
+    for f in files:
+        filename = f.filename
+        upload_row = ResumeUpload(
+            original_filename=filename,
+            stored_path="",
+            mime_type=f.content_type or "application/octet-stream",
+            status="uploaded",
+        )
+        db.add(upload_row)
+        await db.flush()
+        try:
+            item = await asyncio.to_thread(prepare_resume, await f.read(), filename, upload_dir)
+        except Exception as exc:
+            upload_row.status = "failed"
+            upload_row.error_message = str(exc)[:500]
+            failed_files.append(filename)
+            continue
+        parsed = item["parsed"]
+        profile = CandidateProfile(
+            upload_id=upload_row.id,
+            full_name=parsed.get("name") or None,
+            email=parsed.get("email") or None,
+            phone=parsed.get("phone") or None,
+            summary=parsed.get("experience_summary") or None,
+            skills=parsed.get("skills") or [],
+            raw_text=parsed.get("raw_text") or "",
+        )
+        db.add(profile)
+        upload_row.stored_path = str(item["stored_path"])
+        upload_row.status = "completed"
+        upload_row.processed_at = datetime.utcnow()
+        candidates.append((profile, item["protected"], item["metadata"]))
+    await db.flush()
+
+    if candidates:
+        await submit_batch_run(db, run, candidates)
+    else:
+        run.status = "failed"
+        run.error_message = "No resumes could be parsed"
+        await db.commit()
+
+    return BatchMatchRunResponse(
+        run_id=run.id,
+        status=run.status,
+        batch_id=run.batch_id,
+        total_candidates=len(candidates),
+        failed_files=failed_files,
+        error_message=run.error_message,
+        created_at=run.created_at,
+    )
+
+
+@router.get("/batch/{run_id}", response_model=BatchMatchRunResponse)
+async def get_batch_evaluation(
+    run_id: int,
+    db: AsyncSession = Depends(get_db),
+    current_user: User = Depends(require_permission("jobs.matcher.use")),
+):
+    """Status of a batch run (polled on request as well as in the background) and its results once complete."""
+    run = await db.get(MatchRun, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Batch run not found")
+    if run.status == "submitted":
+        try:
+            await poll_batch_run(db, run)
+        except Exception as e:
+            await db.rollback()
+            print(f"Polling batch run {run_id} failed: {e}")
+
+    results = []
+    if run.status == "completed":
+        rows = await db.execute(
+            select(MatchResult, CandidateProfile.full_name)
+            .join(CandidateProfile, MatchResult.candidate_id == CandidateProfile.id)
+            .where(MatchResult.run_id == run.id)
+            .order_by(MatchResult.score.desc())
+        )
+        results = [
+            MatchCandidateSummary(
+                candidate_id=result.candidate_id,
+                full_name=full_name,
+                score=result.score,
+                matched_skills=result.matched_skills,
+                missing_skills=result.missing_skills,
+                highlights=result.highlights,
+                rationale=result.rationale,
+            )
+            for result, full_name in rows.all()
+        ]
+    return BatchMatchRunResponse(
+        run_id=run.id,
+        status=run.status,
+        batch_id=run.batch_id,
+        total_candidates=len(run.candidate_ids) if run.candidate_ids is not None else len(results),
+        error_message=run.error_message,
+        created_at=run.created_at,
+        completed_at=run.completed_at,
+        results=results,
+    )
+
+
 @router.get("/candidate/{candidate_id}", response_model=CandidateProfileResponse)
 async def get_candidate_profile(
     candidate_id: int,
@@ -88,7 +232,7 @@ async def get_candidate_profile(
     """Retrieve parsed candidate profile."""
     stmt = (
         select(CandidateProfile)
-        .options(selectinload(CandidateProfile.upload))
+        .options(selectinload(CandidateProfile.upload), undefer(CandidateProfile.raw_text))
         .where(CandidateProfile.id == candidate_id)
     )
     result = await db.execute(stmt)
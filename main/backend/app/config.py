@@ -14,13 +14,83 @@ class Settings(BaseSettings):
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 7  # 7 days
     
+    # Document PII encryption: "kid:secret,..." newest first (SECRET_KEY stays readable as kid "0")
+    FIELD_ENCRYPTION_KEYS: Optional[str] = None
+    
+    # Password hashing
+    BCRYPT_ROUNDS: int = 12  # cost factor; existing hashes are upgraded on next login
+    PASSWORD_HASH_WORKERS: int = 4  # max concurrent bcrypt operations
+    
+    # Auth caches (verified tokens / user lookups)
+    AUTH_TOKEN_CACHE_SIZE: int = 10000
+    AUTH_TOKEN_CACHE_TTL: float = 60 * 60  # seconds; also capped by token expiry
+    AUTH_USER_CACHE_SIZE: int = 5000
+    AUTH_USER_CACHE_TTL: float = 5 * 60  # seconds
+
+    # Document template catalog; ORM writes invalidate it immediately,
+    # the TTL picks up writes made by other processes (seed scripts)
+    TEMPLATE_CATALOG_TTL: float = 10 * 60  # seconds
+
+    # Document agent conversation state (in-memory LRU, written at step boundaries)
+    CONVERSATION_CACHE_SIZE: int = 1000
+    CONVERSATION_FLUSH_EVERY: int = 5  # coalesced updates before a forced write
+
+    # Job builder chat sessions (in-memory; older turns are folded into the extracted data)
+    JOB_BUILDER_SESSION_CACHE_SIZE: int = 1000
+    JOB_BUILDER_SESSION_TTL: float = 3600.0  # idle seconds before a session expires
+    JOB_BUILDER_HISTORY_WINDOW: int = 6  # most recent messages sent verbatim
+    JOB_BUILDER_COMPLETION_TOKENS: int = 1200
+
+    # Answer short, fully recognised chat turns with rules instead of the LLM
+    CHAT_RULES_ENABLED: bool = True
+
+    # Generated JDs reused for identical (normalized) requests
+    JD_CACHE_TTL: float = 24 * 60 * 60  # seconds
+    JD_CACHE_SIZE: int = 200  # entries kept in memory
+    JD_CACHE_MAX_ROWS: int = 5000  # entries kept in the jd_cache table
+    
+    # Response compression (bodies smaller than this are sent as-is)
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_LEVEL: int = 6
+    
     # Database
     DATABASE_URL: str = "sqlite+aiosqlite:///backend/talent_connect.db"
+    RUN_MIGRATIONS_ON_STARTUP: bool = True  # disable when migrations run as a deploy step
+    MIGRATION_LOCK_PATH: Optional[str] = None  # defaults to <sqlite db>.migrate.lock
     
     # AI APIs
     ANTHROPIC_API_KEY: Optional[str] = None
     OPENAI_API_KEY: Optional[str] = None
     
+    # Resume matcher: candidates packed per evaluation request
+    MATCHER_PACK_TOKEN_BUDGET: int = 12000  # prompt tokens of candidate profiles per request
+    MATCHER_MAX_PACK_SIZE: int = 8
+    MATCHER_PROFILE_TOKEN_BUDGET: int = 1500  # resume text per candidate, by section priority
+    MATCHER_COMPLETION_TOKENS: int = 400  # per candidate verdict, upper limit
+    MATCHER_VERDICT_BASE_TOKENS: int = 200  # verdict limit for an empty profile...
+    MATCHER_VERDICT_PROFILE_RATIO: int = 8  # ...plus one token per this many profile tokens
+    MATCHER_BATCH_TRANSPORT: str = "openai"  # "openai" (Batch API) or "local" (in-process stand-in)
+    MATCHER_BATCH_POLL_INTERVAL: float = 60.0  # seconds between batch status checks
+    TOKENIZER_ENCODING: str = "cl100k_base"
+    TOKENIZER_LOAD_TIMEOUT: float = 10.0  # seconds startup waits for the encoding download
+    
+    # LLM gateway: shared rate limits, adaptive concurrency and retries
+    LLM_REQUESTS_PER_MINUTE: int = 500
+    LLM_TOKENS_PER_MINUTE: int = 200000
+    LLM_INITIAL_CONCURRENCY: int = 4
+    LLM_MAX_CONCURRENCY: int = 32
+    LLM_MAX_RETRIES: int = 4
+    LLM_RETRY_BASE_DELAY: float = 1.0  # seconds
+    LLM_RETRY_MAX_DELAY: float = 30.0
+    LLM_INTERACTIVE_RESERVED: int = 2  # concurrency slots batch work cannot use
+    LLM_INTERACTIVE_RATE_RESERVED: float = 0.1  # share of the RPM/TPM budgets batch work cannot spend
+    LLM_RESULT_CACHE_TTL: float = 0  # seconds to reuse identical completions (0: only share in-flight calls)
+    LLM_RESULT_CACHE_SIZE: int = 500
+    LLM_HEDGE_MIN_SAMPLES: int = 20  # latencies seen before hedging at their p95
+    LLM_HEDGE_MIN_DELAY: float = 0.5  # seconds
+    LLM_BREAKER_FAILURES: int = 5  # consecutive outage errors that open the circuit
+    LLM_BREAKER_RESET: float = 30.0  # seconds before a probe request is let through
+    
     # File Storage
     UPLOAD_DIR: str = "./uploads"
     MAX_FILE_SIZE: int = 10 * 1024 * 1024  # 10MB
@@ -44,6 +114,11 @@ class Settings(BaseSettings):
     SSL_VERIFY: bool = False
     HTTP_TIMEOUT: float = 30.0
     
+    # Live interview transcript persistence (write-behind)
+    TRANSCRIPT_LOG_DIR: str = "./transcript_logs"
+    TRANSCRIPT_FLUSH_INTERVAL: float = 1.0  # seconds
+    TRANSCRIPT_FLUSH_BATCH: int = 10  # buffered events before an immediate flush
+    
     model_config = ConfigDict(env_file=".env", case_sensitive=True, extra="ignore")
 
 
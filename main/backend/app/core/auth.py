@@ -1,3 +1,8 @@
+import asyncio
+import hashlib
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
@@ -5,7 +10,11 @@ import bcrypt
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.attributes import get_history
 from app.config import settings
+from app.core.cache import TTLCache
 from app.db.session import get_db
 from app.models.user import User
 from sqlalchemy import select
@@ -13,6 +22,22 @@ from sqlalchemy import select
 # OAuth2 scheme
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/auth/login")
 
+# sha256(token) -> email; entries never outlive the token's own expiry
+_token_cache = TTLCache(maxsize=settings.AUTH_TOKEN_CACHE_SIZE, ttl=settings.AUTH_TOKEN_CACHE_TTL)
+# email -> detached User snapshot
+_user_cache = TTLCache(maxsize=settings.AUTH_USER_CACHE_SIZE, ttl=settings.AUTH_USER_CACHE_TTL)
+
+# bcrypt is CPU-bound; run it off the event loop on a small dedicated pool.
+# The pool size is the cap on concurrent hashes; extra logins queue behind it.
+_password_executor = ThreadPoolExecutor(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    thread_name_prefix="password-hash",
+)
+
+_BCRYPT_COST = re.compile(r"^\$2[abxy]?\$(\d{2})\$")
+
+_USER_COLUMNS = ("id", "email", "hashed_password", "full_name", "role", "is_active", "created_at", "updated_at")
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify password against hash"""
@@ -21,11 +46,29 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     """Hash password"""
-    salt = bcrypt.gensalt()
+    salt = bcrypt.gensalt(rounds=settings.BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
 
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify password on the hashing pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Hash password on the hashing pool without blocking the event loop"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_password_executor, get_password_hash, password)
+
+
+def password_needs_rehash(hashed_password: str) -> bool:
+    """True if the stored hash was made with a different bcrypt cost than configured"""
+    match = _BCRYPT_COST.match(hashed_password or "")
+    return match is None or int(match.group(1)) != settings.BCRYPT_ROUNDS
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """Create JWT access token"""
     to_encode = data.copy()
@@ -39,6 +82,79 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -
     return encoded_jwt
 
 
+def _token_key(token: str) -> str:
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+def _detached_copy(user: User) -> User:
+    """Copy a User into a transient instance that is safe to share across sessions."""
+    return User(**{column: getattr(user, column) for column in _USER_COLUMNS})
+
+
+def invalidate_user(email: str) -> None:
+    """
+    Drop cached auth state for a user.
+    Call when a user is deactivated, deleted or their role changes.
+    """
+    _user_cache.pop(email)
+    for key, cached_email in list(_token_cache.items()):
+        if cached_email == email:
+            _token_cache.pop(key)
+
+
+def clear_auth_caches() -> None:
+    _token_cache.clear()
+    _user_cache.clear()
+
+
+# session.info key for emails of users changed in the session's transaction
+_CHANGED_USERS = "auth_changed_users"
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _collect_user_change(mapper, connection, target: User) -> None:
+    # Flushed but not committed: a request reading the user now would cache the
+    # old row again, so the caches are dropped in after_commit instead
+    emails = {target.email, *get_history(target, "email").deleted}
+    inspect(target).session.info.setdefault(_CHANGED_USERS, set()).update(emails)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed_user_changes(session: Session) -> None:
+    for email in session.info.pop(_CHANGED_USERS, ()):
+        invalidate_user(email)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_user_changes(session: Session) -> None:
+    session.info.pop(_CHANGED_USERS, None)
+
+
+def _verify_token(token: str) -> Optional[str]:
+    """Return the token subject, using the verified-token cache when possible."""
+    key = _token_key(token)
+    email = _token_cache.get(key)
+    if email is not None:
+        return email
+    
+    try:
+        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
+    except JWTError:
+        return None
+    email = payload.get("sub")
+    if email is None:
+        return None
+    
+    ttl = settings.AUTH_TOKEN_CACHE_TTL
+    exp = payload.get("exp")
+    if exp is not None:
+        ttl = min(ttl, exp - time.time())
+    if ttl > 0:
+        _token_cache.set(key, email, ttl=ttl)
+    return email
+
+
 async def get_current_user(
     token: str = Depends(oauth2_scheme),
     db: AsyncSession = Depends(get_db)
@@ -50,14 +166,14 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
-    try:
-        payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
-        email: str = payload.get("sub")
-        if email is None:
-            raise credentials_exception
-    except JWTError:
+    email = _verify_token(token)
+    if email is None:
         raise credentials_exception
     
+    user = _user_cache.get(email)
+    if user is not None:
+        return user
+    
     # Get user from database
     result = await db.execute(select(User).where(User.email == email))
     user = result.scalar_one_or_none()
@@ -65,6 +181,8 @@ async def get_current_user(
     if user is None:
         raise credentials_exception
     
+    user = _detached_copy(user)
+    _user_cache.set(email, user)
     return user
 
 
@@ -0,0 +1,62 @@
+"""
+Small in-process caches shared by the API layer.
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Iterator, Optional, Tuple
+
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Bounded LRU cache with per-entry expiry.
+
+    Not thread-safe; intended for use from the event loop only.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.timer = timer
+        self._data: "OrderedDict[Hashable, Tuple[Any, Optional[float]]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.get(key, _MISSING)
+        if entry is _MISSING:
+            return default
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= self.timer():
+            del self._data[key]
+            return default
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else ttl
+        expires_at = self.timer() + ttl if ttl is not None else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        entry = self._data.pop(key, _MISSING)
+        return default if entry is _MISSING else entry[0]
+
+    def items(self) -> Iterator[Tuple[Hashable, Any]]:
+        """Iterate over live (unexpired) entries without touching LRU order."""
+        now = self.timer()
+        for key, (value, expires_at) in list(self._data.items()):
+            if expires_at is None or expires_at > now:
+                yield key, value
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def __len__(self) -> int:
+        return len(self._data)
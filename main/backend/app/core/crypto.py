@@ -0,0 +1,140 @@
+"""
+Process-wide field encryption for document PII (recipient names, file paths).
+
+Tokens are Fernet ciphertexts prefixed with the id of the key that produced
+them (``"<kid>:<fernet token>"``). Unprefixed tokens written before key ids
+existed are tried against every configured key. The Fernet instances are
+derived once per process instead of on every request.
+
+Keys come from FIELD_ENCRYPTION_KEYS (``"kid:secret,kid:secret"``, newest
+first). The key derived from SECRET_KEY is always kept for decryption under
+the id ``"0"`` and is used for encryption when no other key is configured.
+"""
+import base64
+import hashlib
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple
+
+from app.config import settings
+
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet
+
+
+DEFAULT_KEY_ID = "0"
+_SEPARATOR = ":"
+
+
+def derive_fernet_key(secret: str) -> bytes:
+    """Fernet key from an arbitrary secret (SHA-256, urlsafe base64)."""
+    return base64.urlsafe_b64encode(hashlib.sha256(secret.encode()).digest())
+
+
+def parse_key_config(value: Optional[str]) -> List[Tuple[str, str]]:
+    """Parse ``"kid:secret,kid:secret"`` into [(kid, secret)] (order kept)."""
+    keys = []
+    for item in (value or "").split(","):
+        item = item.strip()
+        if not item:
+            continue
+        kid, sep, secret = item.partition(_SEPARATOR)
+        if not sep or not kid or not secret:
+            raise ValueError("FIELD_ENCRYPTION_KEYS entries must look like 'kid:secret'")
+        keys.append((kid, secret))
+    return keys
+
+
+class FieldCipher:
+    """Encrypt/decrypt short PII strings with key ids and rotation."""
+
+    def __init__(self, keys: List[Tuple[str, str]]):
+        from cryptography.fernet import Fernet
+
+        if not keys:
+            raise ValueError("At least one encryption key is required")
+        self._fernets: Dict[str, "Fernet"] = {}
+        for kid, secret in keys:
+            if kid in self._fernets:
+                raise ValueError(f"Duplicate encryption key id {kid!r}")
+            self._fernets[kid] = Fernet(derive_fernet_key(secret))
+        self.current_key_id = keys[0][0]
+        self._current = self._fernets[self.current_key_id]
+
+    @classmethod
+    def from_settings(cls) -> "FieldCipher":
+        keys = parse_key_config(settings.FIELD_ENCRYPTION_KEYS)
+        if all(kid != DEFAULT_KEY_ID for kid, _ in keys):
+            keys.append((DEFAULT_KEY_ID, settings.SECRET_KEY))
+        return cls(keys)
+
+    @property
+    def key_ids(self) -> List[str]:
+        return list(self._fernets)
+
+    def encrypt(self, value: Optional[str]) -> Optional[str]:
+        if value is None:
+            return None
+        token = self._current.encrypt(value.encode()).decode()
+        return f"{self.current_key_id}{_SEPARATOR}{token}"
+
+    def decrypt(self, token: Optional[str]) -> Optional[str]:
+        from cryptography.fernet import InvalidToken
+
+        if token is None:
+            return None
+        kid, sep, body = token.partition(_SEPARATOR)
+        if sep:
+            fernet = self._fernets.get(kid)
+            if fernet is None:
+                raise InvalidToken(f"Unknown encryption key id {kid!r}")
+            return fernet.decrypt(body.encode()).decode()
+        # Legacy token without a key id: try every key, current first
+        for fernet in self._fernets.values():
+            try:
+                return fernet.decrypt(token.encode()).decode()
+            except InvalidToken:
+                continue
+        raise InvalidToken("Token does not match any configured key")
+
+    def encrypt_many(self, values: Iterable[Optional[str]]) -> List[Optional[str]]:
+        return [self.encrypt(value) for value in values]
+
+    def decrypt_many(self, tokens: Iterable[Optional[str]], default: Optional[str] = None) -> List[Optional[str]]:
+        """Decrypt a batch; tokens that fail to decrypt yield ``default``."""
+        from cryptography.fernet import InvalidToken
+
+        results = []
+        for token in tokens:
+            try:
+                results.append(self.decrypt(token))
+            except (InvalidToken, ValueError):
+                results.append(default)
+        return results
+
+    def needs_rotation(self, token: Optional[str]) -> bool:
+        if token is None:
+            return False
+        kid, sep, _ = token.partition(_SEPARATOR)
+        return not sep or kid != self.current_key_id
+
+    def rotate(self, token: Optional[str]) -> Optional[str]:
+        """Re-encrypt ``token`` under the current key if it uses an older one."""
+        if not self.needs_rotation(token):
+            return token
+        return self.encrypt(self.decrypt(token))
+
+
+_field_cipher: Optional[FieldCipher] = None
+
+
+def get_field_cipher() -> FieldCipher:
+    """Shared cipher, built from settings on first use"""
+    global _field_cipher
+    if _field_cipher is None:
+        _field_cipher = FieldCipher.from_settings()
+    return _field_cipher
+
+
+def reset_field_cipher() -> None:
+    """Drop the shared cipher (after key configuration changes)."""
+    global _field_cipher
+    _field_cipher = None
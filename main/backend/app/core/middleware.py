@@ -0,0 +1,183 @@
+"""
+HTTP middleware: response compression and strong ETags.
+
+Both only act on complete (single-chunk) responses; streaming responses such
+as SSE and file downloads pass through untouched.
+"""
+import gzip
+import hashlib
+from typing import Iterable, List, Optional, Tuple
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional; gzip is always available
+    brotli = None
+
+
+# Bodies that are already compressed (or must not be buffered)
+EXCLUDED_CONTENT_TYPES = (
+    "application/pdf",
+    "application/zip",
+    "application/x-zip-compressed",
+    "application/gzip",
+    "application/vnd.openxmlformats-officedocument",  # docx/xlsx are zip containers
+    "application/octet-stream",
+    "image/",
+    "audio/",
+    "video/",
+    "text/event-stream",
+)
+
+
+def _accepted_encodings(headers: Headers) -> List[str]:
+    accepted = []
+    for part in headers.get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        quality = params.strip()
+        if quality.startswith("q="):
+            try:
+                if float(quality[2:]) == 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.append(token.strip().lower())
+    return accepted
+
+
+class _BufferedResponse:
+    """
+    Collects the response start and, for single-chunk responses, the body.
+    Streaming responses are forwarded as they arrive.
+    """
+
+    def __init__(self, send: Send):
+        self.send = send
+        self.start: Optional[Message] = None
+        self.streaming = False
+
+    async def __call__(self, message: Message, on_complete) -> None:
+        if message["type"] == "http.response.start":
+            self.start = message
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        if self.streaming:
+            await self.send(message)
+            return
+        if message.get("more_body", False):
+            self.streaming = True
+            await self.send(self.start)
+            await self.send(message)
+            return
+        await on_complete(self.start, message.get("body", b""))
+
+
+class CompressionMiddleware:
+    """Brotli (if installed) or gzip for complete responses above a size threshold."""
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: int = 1024,
+        compresslevel: int = 6,
+        excluded_content_types: Iterable[str] = EXCLUDED_CONTENT_TYPES,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.compresslevel = compresslevel
+        self.excluded_content_types = tuple(excluded_content_types)
+
+    def _choose_encoding(self, request_headers: Headers) -> Optional[str]:
+        accepted = _accepted_encodings(request_headers)
+        if brotli is not None and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def _compress(self, body: bytes, encoding: str) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=min(self.compresslevel, 11))
+        # mtime=0 keeps the output deterministic (stable ETags)
+        return gzip.compress(body, compresslevel=self.compresslevel, mtime=0)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = self._choose_encoding(Headers(scope=scope))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        async def on_complete(start: Message, body: bytes) -> None:
+            headers = MutableHeaders(scope=start)
+            content_type = headers.get("content-type", "")
+            if (
+                len(body) >= self.minimum_size
+                and "content-encoding" not in headers
+                and not content_type.startswith(self.excluded_content_types)
+            ):
+                body = self._compress(body, encoding)
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+                headers.add_vary_header("Accept-Encoding")
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        buffered = _BufferedResponse(send)
+        await self.app(scope, receive, lambda message: buffered(message, on_complete))
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return etag in (tag.strip() for tag in if_none_match.split(","))
+
+
+class ETagMiddleware:
+    """
+    Strong ETags from the final response bytes for GET 200 responses,
+    answering If-None-Match with 304 Not Modified.
+    """
+
+    # Headers that describe the body and are dropped from a 304
+    _BODY_HEADERS: Tuple[bytes, ...] = (b"content-length", b"content-type")
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        if_none_match = Headers(scope=scope).get("if-none-match")
+
+        async def on_complete(start: Message, body: bytes) -> None:
+            headers = MutableHeaders(scope=start)
+            cache_control = headers.get("cache-control", "")
+            if start["status"] != 200 or "etag" in headers or "no-store" in cache_control:
+                await send(start)
+                await send({"type": "http.response.body", "body": body})
+                return
+
+            etag = '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+            headers["etag"] = etag
+            if if_none_match and _etag_matches(if_none_match, etag):
+                start = {
+                    "type": "http.response.start",
+                    "status": 304,
+                    "headers": [(k, v) for k, v in start["headers"] if k.lower() not in self._BODY_HEADERS],
+                }
+                await send(start)
+                await send({"type": "http.response.body", "body": b""})
+                return
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        buffered = _BufferedResponse(send)
+        await self.app(scope, receive, lambda message: buffered(message, on_complete))
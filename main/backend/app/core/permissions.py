@@ -1,3 +1,5 @@
+from functools import lru_cache
+from typing import Dict
 from fastapi import HTTPException, Depends, status
 from app.models.user import User
 from app.core.auth import get_current_active_user
@@ -10,14 +12,15 @@ PERMISSIONS = {
     "jobs.jd.edit": ["hr", "hiring_manager"],
     "jobs.jd.view": ["hr", "recruiter", "hiring_manager"],
     "jobs.matcher.use": ["hr", "recruiter", "hiring_manager"],
-    
+
     # Documents Module
     "docs.templates.all": ["hr"],
     "docs.templates.offer": ["hr", "recruiter"],
     "docs.templates.view": ["hiring_manager"],
     "docs.query.full": ["hr"],
     "docs.query.limited": ["recruiter"],
-    
+    "docs.manage": ["hr", "admin"],  # Backend-only: document agent, generation and query endpoints
+
     # Interviews Module
     "interviews.dashboard": ["hr", "hiring_manager"],
     "interviews.schedule": ["hr", "hiring_manager"],
@@ -25,20 +28,51 @@ PERMISSIONS = {
     "interviews.view": ["recruiter"]
 }
 
+# Compiled permission model: each permission gets a bit, each role a bitmask
+PERMISSION_BITS: Dict[str, int] = {permission: 1 << idx for idx, permission in enumerate(PERMISSIONS)}
+
+ROLE_PERMISSION_MASKS: Dict[str, int] = {}
+for _permission, _roles in PERMISSIONS.items():
+    for _role in _roles:
+        ROLE_PERMISSION_MASKS[_role] = ROLE_PERMISSION_MASKS.get(_role, 0) | PERMISSION_BITS[_permission]
+
+ROLE_PERMISSIONS: Dict[str, frozenset] = {
+    role: frozenset(p for p, bit in PERMISSION_BITS.items() if mask & bit)
+    for role, mask in ROLE_PERMISSION_MASKS.items()
+}
+
+
+def resolve_permission_mask(user: User) -> int:
+    """
+    Permission bitmask for a user, computed once and carried on the user object.
+    The cached principal from get_current_user keeps it across requests.
+    """
+    mask = getattr(user, "permission_mask", None)
+    if mask is None:
+        mask = ROLE_PERMISSION_MASKS.get(user.role, 0)
+        user.permission_mask = mask
+    return mask
+
 
 def has_permission(user: User, permission: str) -> bool:
     """Check if user has specific permission"""
-    allowed_roles = PERMISSIONS.get(permission, [])
-    return user.role in allowed_roles
+    bit = PERMISSION_BITS.get(permission, 0)
+    return bool(resolve_permission_mask(user) & bit)
 
 
+@lru_cache(maxsize=None)
 def require_permission(permission: str):
     """
     Dependency to enforce permission check
     Usage: @router.get("/endpoint", dependencies=[Depends(require_permission("jobs.jd.create"))])
+
+    Memoized per permission, so every route asking for the same permission shares
+    one dependency callable (and FastAPI resolves it once per request).
     """
+    bit = PERMISSION_BITS.get(permission, 0)
+
     async def permission_checker(current_user: User = Depends(get_current_active_user)):
-        if not has_permission(current_user, permission):
+        if not resolve_permission_mask(current_user) & bit:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Permission denied. Required permission: {permission}"
@@ -52,8 +86,10 @@ def require_roles(*allowed_roles: str):
     Dependency to enforce role check
     Usage: @router.get("/endpoint", dependencies=[Depends(require_roles("hr", "hiring_manager"))])
     """
+    allowed = frozenset(allowed_roles)
+
     async def role_checker(current_user: User = Depends(get_current_active_user)):
-        if current_user.role not in allowed_roles:
+        if current_user.role not in allowed:
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail=f"Access denied. Required roles: {', '.join(allowed_roles)}"
@@ -0,0 +1,47 @@
+"""
+Fast JSON encoding shared by HTTP responses, SSE streams and WebSockets.
+
+Everything goes through orjson so the three transports produce identical
+output (compact, UTF-8, ISO datetimes).
+"""
+from decimal import Decimal
+from typing import Any
+
+import orjson
+from fastapi.responses import ORJSONResponse as _BaseORJSONResponse
+
+
+_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def _default(obj: Any) -> Any:
+    # Types orjson does not encode natively
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, Decimal):
+        return float(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode ``obj`` as compact UTF-8 JSON bytes."""
+    return orjson.dumps(obj, default=_default, option=_OPTIONS)
+
+
+def dumps_str(obj: Any) -> str:
+    """Encode ``obj`` as a JSON string (for text WebSocket frames)."""
+    return dumps(obj).decode()
+
+
+def format_sse(event: str, data: Any) -> bytes:
+    """Server-sent event frame, already encoded."""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(data) + b"\n\n"
+
+
+class ORJSONResponse(_BaseORJSONResponse):
+    """Default API response class."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -5,6 +5,7 @@ from app.db.session import Base
 from app.models.user import User
 from app.models.matcher import Job, ResumeUpload, CandidateProfile, MatchRun, MatchResult
 from app.models.jd_upload import JDUpload
+from app.models.jd_cache import JDCacheEntry
 from app.models.interview import Interview
 from app.models.document import DocumentTemplate, GeneratedDocument, DocumentConversation
 
@@ -17,6 +18,7 @@ __all__ = [
     "MatchRun",
     "MatchResult",
     "JDUpload",
+    "JDCacheEntry",
     "Interview",
     "DocumentTemplate",
     "GeneratedDocument",
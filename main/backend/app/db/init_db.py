@@ -1,6 +1,6 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import engine, AsyncSessionLocal
-from app.db.base import Base  # ensures models are imported
+from app.db.migrations import run_migrations
 from app.models import User
 from app.models.document import DocumentTemplate
 from app.core.auth import get_password_hash
@@ -10,9 +10,8 @@ import asyncio
 async def init_db():
     """Initialize database with demo accounts"""
     
-    # Create all tables
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+    # Create/upgrade tables
+    await run_migrations(engine)
     
     # Create demo accounts
     demo_accounts = [
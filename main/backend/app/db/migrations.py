@@ -0,0 +1,245 @@
+"""
+Versioned schema migrations.
+
+Applied versions are recorded in a ``schema_version`` table. At startup each
+worker does a single SELECT; only when the schema is behind does it take a
+file lock, re-check, and apply the pending migrations one transaction at a
+time, so N workers booting together never race each other's DDL.
+
+Run manually (e.g. as a deploy step) with: python -m app.db.migrations
+"""
+import asyncio
+import tempfile
+import time
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.config import settings
+from app.db.base import Base
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Callable[[AsyncConnection], Awaitable[None]]
+
+
+MIGRATIONS: List[Migration] = []
+
+
+def migration(version: int, description: str):
+    """Register an async ``fn(conn)`` as schema migration ``version``."""
+    def decorator(fn: Callable[[AsyncConnection], Awaitable[None]]):
+        MIGRATIONS.append(Migration(version, description, fn))
+        MIGRATIONS.sort(key=lambda m: m.version)
+        return fn
+    return decorator
+
+
+async def _create_indexes(conn: AsyncConnection, indexes: List[str]) -> None:
+    for ddl in indexes:
+        await conn.execute(text(ddl))
+
+
+# ----------------------------------------------------------------------
+# Migrations (append only; never edit one that has shipped)
+# ----------------------------------------------------------------------
+@migration(1, "Baseline schema")
+async def _baseline(conn: AsyncConnection) -> None:
+    await conn.run_sync(Base.metadata.create_all)
+
+
+@migration(2, "Add generated_documents.email_hash")
+async def _add_email_hash(conn: AsyncConnection) -> None:
+    result = await conn.execute(text("PRAGMA table_info('generated_documents')"))
+    cols = [row[1] for row in result.fetchall()]
+    if "email_hash" not in cols:
+        await conn.execute(text("ALTER TABLE generated_documents ADD COLUMN email_hash VARCHAR"))
+    await conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_generated_documents_email_hash ON generated_documents (email_hash)"
+    ))
+
+
+@migration(3, "Indexes for hot queries")
+async def _hot_query_indexes(conn: AsyncConnection) -> None:
+    await _create_indexes(conn, [
+        # /interviews dashboard ordering
+        "CREATE INDEX IF NOT EXISTS ix_interviews_created_at ON interviews (created_at)",
+        # Active template listing (API + document agent)
+        "CREATE INDEX IF NOT EXISTS ix_document_templates_is_active ON document_templates (is_active)",
+        # Agent conversations per user
+        "CREATE INDEX IF NOT EXISTS ix_document_conversations_user_id ON document_conversations (user_id)",
+        # Matcher joins
+        "CREATE INDEX IF NOT EXISTS ix_candidate_profiles_upload_id ON candidate_profiles (upload_id)",
+        "CREATE INDEX IF NOT EXISTS ix_match_results_run_id ON match_results (run_id)",
+        "CREATE INDEX IF NOT EXISTS ix_match_results_candidate_id ON match_results (candidate_id)",
+    ])
+
+
+@migration(4, "Composite indexes for document archive keyset pagination")
+async def _document_archive_indexes(conn: AsyncConnection) -> None:
+    await _create_indexes(conn, [
+        "CREATE INDEX IF NOT EXISTS ix_generated_documents_generated_at_id "
+        "ON generated_documents (generated_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_generated_documents_employee_code_generated_at "
+        "ON generated_documents (employee_code, generated_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_generated_documents_phone_hash_generated_at "
+        "ON generated_documents (phone_number_hash, generated_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_generated_documents_document_type_generated_at "
+        "ON generated_documents (document_type, generated_at, id)",
+    ])
+
+
+@migration(5, "Indexes for the interview dashboard filters")
+async def _interview_dashboard_indexes(conn: AsyncConnection) -> None:
+    await _create_indexes(conn, [
+        "CREATE INDEX IF NOT EXISTS ix_interviews_scheduled_at_id ON interviews (scheduled_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_interviews_status_scheduled_at ON interviews (status, scheduled_at, id)",
+        "CREATE INDEX IF NOT EXISTS ix_interviews_role_scheduled_at ON interviews (role, scheduled_at, id)",
+    ])
+
+
+@migration(6, "Batch evaluation columns on match_runs")
+async def _match_run_batch_columns(conn: AsyncConnection) -> None:
+    result = await conn.execute(text("PRAGMA table_info('match_runs')"))
+    cols = [row[1] for row in result.fetchall()]
+    for name, ddl in (
+        ("batch_id", "VARCHAR(100)"),
+        ("error_message", "VARCHAR(500)"),
+        ("completed_at", "DATETIME"),
+    ):
+        if name not in cols:
+            await conn.execute(text(f"ALTER TABLE match_runs ADD COLUMN {name} {ddl}"))
+    # Batch poller looks up pending runs
+    await conn.execute(text("CREATE INDEX IF NOT EXISTS ix_match_runs_status ON match_runs (status)"))
+
+
+@migration(7, "JD generation cache table")
+async def _jd_cache_table(conn: AsyncConnection) -> None:
+    from app.models.jd_cache import JDCacheEntry
+
+    await conn.run_sync(lambda sync_conn: JDCacheEntry.__table__.create(sync_conn, checkfirst=True))
+
+
+@migration(8, "Submitted candidate ids on match_runs")
+async def _match_run_candidate_ids(conn: AsyncConnection) -> None:
+    result = await conn.execute(text("PRAGMA table_info('match_runs')"))
+    if "candidate_ids" not in [row[1] for row in result.fetchall()]:
+        await conn.execute(text("ALTER TABLE match_runs ADD COLUMN candidate_ids JSON"))
+
+
+# ----------------------------------------------------------------------
+# Runner
+# ----------------------------------------------------------------------
+def latest_version() -> int:
+    return MIGRATIONS[-1].version if MIGRATIONS else 0
+
+
+async def _ensure_version_table(conn: AsyncConnection) -> None:
+    await conn.execute(text(
+        "CREATE TABLE IF NOT EXISTS schema_version ("
+        "version INTEGER PRIMARY KEY, "
+        "description VARCHAR(255) NOT NULL, "
+        "applied_at DATETIME NOT NULL)"
+    ))
+
+
+async def current_version(conn: AsyncConnection) -> int:
+    try:
+        result = await conn.execute(text("SELECT MAX(version) FROM schema_version"))
+    except Exception:
+        # Table does not exist yet
+        return 0
+    return result.scalar() or 0
+
+
+def _lock_path(engine: AsyncEngine) -> Path:
+    if settings.MIGRATION_LOCK_PATH:
+        return Path(settings.MIGRATION_LOCK_PATH)
+    database = make_url(str(engine.url)).database
+    if engine.url.get_backend_name() == "sqlite" and database and database != ":memory:":
+        return Path(f"{database}.migrate.lock")
+    return Path(tempfile.gettempdir()) / "talent_connect.migrate.lock"
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """Exclusive inter-process lock (blocking)."""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+
+
+@asynccontextmanager
+async def startup_lock(engine: AsyncEngine):
+    """
+    The migration file lock, also held for other startup work that must run
+    in one worker at a time (transcript log recovery).
+    """
+    lock = _file_lock(_lock_path(engine))
+    await asyncio.to_thread(lock.__enter__)
+    try:
+        yield
+    finally:
+        lock.__exit__(None, None, None)
+
+
+async def run_migrations(engine: AsyncEngine) -> int:
+    """
+    Bring the schema up to date. Returns the number of migrations applied.
+    Costs a single query when the schema is already current.
+    """
+    target = latest_version()
+    async with engine.connect() as conn:
+        if await current_version(conn) >= target:
+            return 0
+
+    async with startup_lock(engine):
+        async with engine.begin() as conn:
+            await _ensure_version_table(conn)
+            version = await current_version(conn)
+
+        applied = 0
+        for m in MIGRATIONS:
+            if m.version <= version:
+                continue
+            started = time.perf_counter()
+            async with engine.begin() as conn:
+                await m.apply(conn)
+                await conn.execute(
+                    text("INSERT INTO schema_version (version, description, applied_at) "
+                         "VALUES (:version, :description, CURRENT_TIMESTAMP)"),
+                    {"version": m.version, "description": m.description},
+                )
+            applied += 1
+            print(f"Applied migration {m.version}: {m.description} ({(time.perf_counter() - started) * 1000:.0f} ms)")
+        return applied
+
+
+if __name__ == "__main__":
+    from app.db.session import engine
+
+    async def _main():
+        applied = await run_migrations(engine)
+        print(f"Schema at version {latest_version()} ({applied} migration(s) applied)")
+        await engine.dispose()
+
+    asyncio.run(_main())
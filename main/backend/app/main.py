@@ -1,10 +1,58 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.config import settings
+from app.core.middleware import CompressionMiddleware, ETagMiddleware
+from app.core.serialization import ORJSONResponse
 from app.api.v1.router import api_router
-from app.db.session import engine
-from app.db.base import Base
-from sqlalchemy import text
+from app.db.session import AsyncSessionLocal, engine
+from app.db.migrations import run_migrations, startup_lock
+from app.services.ai.batch_matcher import batch_poller
+from app.services.conversation_store import conversation_store
+from app.services.jd_cache import jd_cache
+from app.services.template_catalog import template_catalog
+from app.services.transcript_buffer import transcript_buffer
+from app.utils.llm_gateway import llm_gateway
+from app.utils.openai_client import init_openai_clients, close_openai_clients, llm_single_flight
+from app.utils.token_counter import load_encoding
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Startup/shutdown: schema migrations, transcript recovery, template catalog, shared clients and the batch poller."""
+    # Versioned migrations; a no-op SELECT when the schema is already current
+    if settings.RUN_MIGRATIONS_ON_STARTUP:
+        await run_migrations(engine)
+
+    # Replay transcript changes that a crashed worker buffered but did not flush
+    async with startup_lock(engine):
+        recovered = await transcript_buffer.recover()
+    if recovered:
+        print(f"Recovered buffered transcripts for {recovered} interview(s)")
+
+    # Warm the template catalog so the first document request skips PDF parsing
+    async with AsyncSessionLocal() as db:
+        await template_catalog.load(db)
+
+    # tiktoken may download its encoding file; keep that off the event loop
+    await load_encoding()
+
+    # OpenAI clients are created here rather than at import time
+    init_openai_clients()
+
+    # Ingest offline matcher batches as they complete
+    batch_poller.start()
+
+    yield
+
+    await batch_poller.stop()
+
+    # Flush buffered interview transcripts and agent conversations before the worker exits
+    await transcript_buffer.flush_all()
+    await transcript_buffer.close()
+    await conversation_store.flush_all()
+    await close_openai_clients()
+
 
 # Create FastAPI app
 app = FastAPI(
@@ -14,6 +62,8 @@ app = FastAPI(
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     docs_url=f"{settings.API_V1_STR}/docs",
     redoc_url=f"{settings.API_V1_STR}/redoc",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
 )
 
 # Configure CORS
@@ -25,22 +75,13 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-
-@app.on_event("startup")
-async def on_startup():
-    """Ensure all tables exist at startup."""
-    async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
-        # Lightweight migration: add missing columns if schema changed
-        # Ensure generated_documents.email_hash exists
-        try:
-            result = await conn.execute(text("PRAGMA table_info('generated_documents')"))
-            cols = [row[1] for row in result.fetchall()]
-            if 'email_hash' not in cols:
-                await conn.execute(text("ALTER TABLE generated_documents ADD COLUMN email_hash VARCHAR"))
-        except Exception as e:
-            # Log and continue; do not block startup
-            print(f"Schema check/migration skipped due to error: {type(e).__name__}: {e}")
+# Compress large bodies; ETag is outermost so it hashes the bytes actually sent
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=settings.COMPRESSION_MINIMUM_SIZE,
+    compresslevel=settings.COMPRESSION_LEVEL,
+)
+app.add_middleware(ETagMiddleware)
 
 
 @app.get("/")
@@ -59,7 +100,10 @@ async def health_check():
     return {
         "status": "healthy",
         "version": "1.0.0",
-        "environment": "development" if settings.DEBUG else "production"
+        "environment": "development" if settings.DEBUG else "production",
+        # LLM concurrency, queue depth and wait time per lane, deduplication
+        "llm": {**llm_gateway.stats(), "single_flight": llm_single_flight.stats()},
+        "jd_cache": jd_cache.stats()
     }
 
 
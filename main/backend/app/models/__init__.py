@@ -11,5 +11,6 @@ from app.models.matcher import (
     MatchResult,
 )
 from app.models.jd_upload import JDUpload
+from app.models.jd_cache import JDCacheEntry
 
-__all__ = ["User", "Job", "ResumeUpload", "CandidateProfile", "MatchRun", "MatchResult", "JDUpload"]
+__all__ = ["User", "Job", "ResumeUpload", "CandidateProfile", "MatchRun", "MatchResult", "JDUpload", "JDCacheEntry"]
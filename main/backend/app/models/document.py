@@ -1,5 +1,5 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Boolean, JSON, Index
+from sqlalchemy.orm import relationship, deferred
 from datetime import datetime
 from app.db.base import Base
 
@@ -22,7 +22,7 @@ class DocumentTemplate(Base):
     uses_company_logo = Column(Boolean, default=True)
     uses_company_letterhead = Column(Boolean, default=True)
     
-    is_active = Column(Boolean, default=True)
+    is_active = Column(Boolean, default=True, index=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
@@ -33,6 +33,13 @@ class DocumentTemplate(Base):
 class GeneratedDocument(Base):
     """Generated HR letters (encrypted metadata only)"""
     __tablename__ = "generated_documents"
+    __table_args__ = (
+        # Archive search: each lookup key + keyset order (generated_at DESC, id DESC)
+        Index("ix_generated_documents_generated_at_id", "generated_at", "id"),
+        Index("ix_generated_documents_employee_code_generated_at", "employee_code", "generated_at", "id"),
+        Index("ix_generated_documents_phone_hash_generated_at", "phone_number_hash", "generated_at", "id"),
+        Index("ix_generated_documents_document_type_generated_at", "document_type", "generated_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     template_id = Column(Integer, ForeignKey("document_templates.id"))
@@ -46,10 +53,10 @@ class GeneratedDocument(Base):
     recipient_name_encrypted = Column(Text)  # Encrypted name
     document_type = Column(String, index=True)  # "offer_letter", "experience_letter", etc.
     
-    # Document content
-    content = Column(Text, nullable=True)  # Generated document content
+    # Document content (large bodies are deferred; undefer() them on detail views)
+    content = deferred(Column(Text, nullable=True), raiseload=True)  # Generated document content
     document_data = Column(JSON, nullable=True)  # Field data used to generate document
-    preview_masked_html = Column(Text, nullable=True)  # Privacy-safe preview for UI
+    preview_masked_html = deferred(Column(Text, nullable=True), raiseload=True)  # Privacy-safe preview for UI
     
     # File reference
     file_storage_path = Column(String, nullable=True)  # Encrypted file path or S3 key
@@ -79,7 +86,7 @@ class DocumentConversation(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     session_id = Column(String, unique=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"))
+    user_id = Column(Integer, ForeignKey("users.id"), index=True)
     
     # Conversation state
     current_step = Column(String, default="initial")  # initial, template_selection, input_method, csv_upload, preview, complete
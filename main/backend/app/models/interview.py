@@ -1,10 +1,17 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, DateTime, Text, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, JSON, Index
+from sqlalchemy.orm import deferred
 from app.db.session import Base
 
 
 class Interview(Base):
     __tablename__ = "interviews"
+    __table_args__ = (
+        # Dashboard filters, each followed by the listing order (scheduled_at DESC, id DESC)
+        Index("ix_interviews_scheduled_at_id", "scheduled_at", "id"),
+        Index("ix_interviews_status_scheduled_at", "status", "scheduled_at", "id"),
+        Index("ix_interviews_role_scheduled_at", "role", "scheduled_at", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     candidate_name = Column(String(255), nullable=False)
@@ -20,12 +27,13 @@ class Interview(Base):
     resume_filename = Column(String(255), nullable=True)
     jd_filename = Column(String(255), nullable=True)
     jd_text = Column(Text, nullable=True)
-    transcript = Column(JSON, nullable=False, default=list)
+    # Large; not loaded by list queries (use undefer() where the transcript is needed)
+    transcript = deferred(Column(JSON, nullable=False, default=list), raiseload=True)
     feedback_rating = Column(Integer, nullable=True)
     feedback_decision = Column(String(100), nullable=True)
     feedback_comments = Column(Text, nullable=True)
     feedback_notes = Column(Text, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False, index=True)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
 
     def to_dict(self):
@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Any, Dict
+from sqlalchemy import String, DateTime, JSON
+from sqlalchemy.orm import Mapped, mapped_column
+from app.db.session import Base
+
+
+class JDCacheEntry(Base):
+    """A generated JD, keyed by the hash of its canonical request"""
+    __tablename__ = "jd_cache"
+
+    cache_key: Mapped[str] = mapped_column(String(64), primary_key=True)
+    result: Mapped[Dict[str, Any]] = mapped_column(JSON, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    expires_at: Mapped[datetime] = mapped_column(DateTime, nullable=False, index=True)
@@ -37,7 +37,7 @@ class CandidateProfile(Base):
     __tablename__ = "candidate_profiles"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    upload_id: Mapped[int] = mapped_column(ForeignKey("resume_uploads.id"))
+    upload_id: Mapped[int] = mapped_column(ForeignKey("resume_uploads.id"), index=True)
     full_name: Mapped[Optional[str]] = mapped_column(String(255))
     email: Mapped[Optional[str]] = mapped_column(String(255))
     phone: Mapped[Optional[str]] = mapped_column(String(50))
@@ -45,7 +45,7 @@ class CandidateProfile(Base):
     skills: Mapped[List[str]] = mapped_column(JSON, default=list)
     experiences: Mapped[List[dict]] = mapped_column(JSON, default=list)
     education: Mapped[List[dict]] = mapped_column(JSON, default=list)
-    raw_text: Mapped[str] = mapped_column(Text, nullable=False)
+    raw_text: Mapped[str] = mapped_column(Text, nullable=False, deferred=True, deferred_raiseload=True)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     upload: Mapped[ResumeUpload] = relationship("ResumeUpload", back_populates="candidate_profile")
@@ -62,6 +62,12 @@ class MatchRun(Base):
     preferred_skills: Mapped[List[str]] = mapped_column(JSON, default=list)
     status: Mapped[str] = mapped_column(String(50), default="completed", nullable=False)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+    # Offline batch evaluation: provider batch id while the run is pending
+    batch_id: Mapped[Optional[str]] = mapped_column(String(100))
+    # Candidate profile ids submitted in the batch (absent ones count as failed)
+    candidate_ids: Mapped[Optional[List[int]]] = mapped_column(JSON)
+    error_message: Mapped[Optional[str]] = mapped_column(String(500))
+    completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime)
 
     results: Mapped[List["MatchResult"]] = relationship("MatchResult", back_populates="run")
 
@@ -70,8 +76,8 @@ class MatchResult(Base):
     __tablename__ = "match_results"
 
     id: Mapped[int] = mapped_column(primary_key=True, index=True)
-    run_id: Mapped[int] = mapped_column(ForeignKey("match_runs.id"))
-    candidate_id: Mapped[int] = mapped_column(ForeignKey("candidate_profiles.id"))
+    run_id: Mapped[int] = mapped_column(ForeignKey("match_runs.id"), index=True)
+    candidate_id: Mapped[int] = mapped_column(ForeignKey("candidate_profiles.id"), index=True)
     score: Mapped[float] = mapped_column(Float, nullable=False)
     matched_skills: Mapped[List[str]] = mapped_column(JSON, default=list)
     missing_skills: Mapped[List[str]] = mapped_column(JSON, default=list)
@@ -49,6 +49,9 @@ class GeneratedDocumentResponse(BaseModel):
     status: str
     email_sent: bool
     digitally_signed: bool
+    preview_masked_html: Optional[str] = None  # only when requested
+    content: Optional[str] = None  # only when requested
+    recipient_name: Optional[str] = None  # decrypted, only when requested
     
     class Config:
         from_attributes = True
@@ -150,6 +153,7 @@ class DocumentQueryRequest(BaseModel):
 
 class DocumentQueryResponse(BaseModel):
     documents: List[GeneratedDocumentResponse]
+    next_cursor: Optional[str] = None  # pass back as ?cursor= for the next page
 
 
 # Document Chat Schemas
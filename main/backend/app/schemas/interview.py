@@ -79,6 +79,32 @@ class InterviewOut(BaseModel):
     orm_mode = True
 
 
+class InterviewSummaryOut(BaseModel):
+  """Dashboard row: interview metadata without transcript or JD text."""
+  id: int
+  candidate_name: str
+  candidate_email: Optional[str]
+  role: str
+  company: Optional[str]
+  round_type: str
+  scheduled_at: datetime
+  status: str
+  interviewer_key: str
+  candidate_key: str
+  resume_filename: Optional[str]
+  jd_filename: Optional[str]
+  feedback_rating: Optional[int] = None
+  feedback_decision: Optional[str] = None
+  question_count: int = 0
+
+
+class InterviewSummaryPage(BaseModel):
+  items: List[InterviewSummaryOut]
+  total: int
+  page: int
+  page_size: int
+
+
 class ResolveOut(BaseModel):
   role: str
   interview: InterviewOut
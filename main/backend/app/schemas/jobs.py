@@ -13,6 +13,7 @@ class GenerateJDRequest(BaseModel):
     company_tone: Optional[str] = Field(None, description="Tone/style for the JD; accepts any text and will be normalized server-side")
     department: Optional[str] = Field(None, description="Department name", example="Engineering")
     location: Optional[str] = Field(None, description="Job location", example="San Francisco, CA")
+    regenerate: bool = Field(False, description="Skip cached results for an identical request and generate a new JD")
 
 
 class ExplainJDRequest(BaseModel):
@@ -148,8 +149,13 @@ class ExtractedJobData(BaseModel):
 class ChatBuilderRequest(BaseModel):
     """Request for interactive job builder chat"""
     message: str = Field(..., description="User's message", min_length=1)
-    conversation_history: List[ChatMessage] = Field(default=[], description="Previous messages")
-    current_data: Optional[ExtractedJobData] = Field(None, description="Currently extracted data")
+    session_id: Optional[str] = Field(None, description="Builder session returned by a previous reply")
+    conversation_history: List[ChatMessage] = Field(
+        default=[], description="Previous messages (only needed without a session)"
+    )
+    current_data: Optional[ExtractedJobData] = Field(
+        None, description="Currently extracted data (overrides the session's, e.g. after manual edits)"
+    )
 
 
 class ChatBuilderResponse(BaseModel):
@@ -161,3 +167,4 @@ class ChatBuilderResponse(BaseModel):
     is_complete: bool = Field(..., description="Whether all required fields are collected")
     next_question_focus: Optional[str] = Field(None, description="Next field to ask about")
     summary: Optional[str] = Field(None, description="Human-readable summary when complete")
+    session_id: Optional[str] = Field(None, description="Send back with the next message")
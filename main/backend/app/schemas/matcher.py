@@ -66,6 +66,18 @@ class MatchRunResponse(BaseModel):
     total_candidates: int
 
 
+class BatchMatchRunResponse(BaseModel):
+    run_id: int
+    status: str
+    batch_id: Optional[str] = None
+    total_candidates: int = 0
+    failed_files: List[str] = Field(default_factory=list)
+    error_message: Optional[str] = None
+    created_at: Optional[datetime] = None
+    completed_at: Optional[datetime] = None
+    results: List[MatchCandidateSummary] = Field(default_factory=list)
+
+
 class CandidateProfileResponse(BaseModel):
     id: int
     full_name: Optional[str]
@@ -0,0 +1,345 @@
+"""
+Offline batch evaluation for large matcher runs.
+
+Instead of streaming one request per pack, every candidate's evaluation
+request (built by the same prompt builder as ``evaluate_candidate``) is
+written to a JSONL file in the OpenAI Batch API format and submitted as one
+batch. A poller checks pending runs and ingests the verdicts into
+``MatchResult`` rows when the batch completes. Batch requests are billed at a
+discount and do not count against the interactive rate limits.
+
+The transport is swappable: ``OpenAIBatchTransport`` talks to the Batch API,
+``LocalBatchTransport`` runs the requests in-process (through the LLM
+gateway's batch lane, or a supplied responder) for development and tests.
+"""
+import asyncio
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from uuid import uuid4
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.matcher import CandidateProfile, MatchResult, MatchRun
+from app.services.ai.profile_matcher import build_evaluation_request, parse_verdict
+from app.utils.single_flight import SingleFlight
+
+CHAT_COMPLETIONS_URL = "/v1/chat/completions"
+# Provider statuses after which a batch will not change any more
+FINISHED = {"completed", "failed", "expired", "cancelled"}
+
+
+def _custom_id(candidate_id: int) -> str:
+    return f"candidate-{candidate_id}"
+
+
+def build_batch_jsonl(requests: List[Tuple[str, Dict[str, Any]]]) -> bytes:
+    """Batch API input: one ``{"custom_id", "method", "url", "body"}`` line per request."""
+    lines = [
+        json.dumps({"custom_id": custom_id, "method": "POST", "url": CHAT_COMPLETIONS_URL, "body": body},
+                   ensure_ascii=False)
+        for custom_id, body in requests
+    ]
+    return ("\n".join(lines) + "\n").encode("utf-8")
+
+
+def parse_batch_output(content: bytes) -> Dict[str, Any]:
+    """
+    Verdicts by ``custom_id`` from Batch API output. Requests that failed or
+    returned a malformed verdict map to an error message instead.
+    """
+    outcomes: Dict[str, Any] = {}
+    for line in content.decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        try:
+            item = json.loads(line)
+        except ValueError:
+            continue
+        custom_id = item.get("custom_id")
+        response = item.get("response") or {}
+        if item.get("error") or response.get("status_code") != 200:
+            error = item.get("error") or response.get("body", {}).get("error") or "request failed"
+            outcomes[custom_id] = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+            continue
+        try:
+            content_text = response["body"]["choices"][0]["message"]["content"]
+        except (KeyError, IndexError, TypeError):
+            content_text = None
+        verdict = parse_verdict(content_text)
+        outcomes[custom_id] = verdict if verdict is not None else "malformed evaluation"
+    return outcomes
+
+
+class BatchTransport(ABC):
+    """Submits a JSONL batch and reports its status and output."""
+
+    @abstractmethod
+    async def submit(self, content: bytes) -> str:
+        """Submit JSONL requests; returns the batch id."""
+
+    @abstractmethod
+    async def status(self, batch_id: str) -> str:
+        """Provider status (``FINISHED`` values are final)."""
+
+    @abstractmethod
+    async def results(self, batch_id: str) -> bytes:
+        """JSONL output (and error) lines of a completed batch."""
+
+
+class OpenAIBatchTransport(BatchTransport):
+    """OpenAI Batch API (file upload, ``/batches``, output file download)."""
+
+    def __init__(self, completion_window: str = "24h"):
+        self.completion_window = completion_window
+
+    async def _batch(self, batch_id: str) -> Dict[str, Any]:
+        import httpx
+        from app.utils.openai_client import get_async_openai_client
+
+        response = await get_async_openai_client().get(f"/batches/{batch_id}", cast_to=httpx.Response)
+        return response.json()
+
+    async def submit(self, content: bytes) -> str:
+        import httpx
+        from app.utils.openai_client import get_async_openai_client
+
+        client = get_async_openai_client()
+        uploaded = await client.files.create(file=("matcher_batch.jsonl", content), purpose="batch")
+        # Sent as a plain request so older SDKs without ``client.batches`` work
+        response = await client.post(
+            "/batches",
+            cast_to=httpx.Response,
+            body={
+                "input_file_id": uploaded.id,
+                "endpoint": CHAT_COMPLETIONS_URL,
+                "completion_window": self.completion_window,
+            },
+        )
+        return response.json()["id"]
+
+    async def status(self, batch_id: str) -> str:
+        return (await self._batch(batch_id))["status"]
+
+    async def results(self, batch_id: str) -> bytes:
+        from app.utils.openai_client import get_async_openai_client
+
+        batch = await self._batch(batch_id)
+        parts = []
+        # Failed requests are written to a separate error file
+        for key in ("output_file_id", "error_file_id"):
+            if batch.get(key):
+                parts.append((await get_async_openai_client().files.content(batch[key])).content)
+        return b"".join(part if part.endswith(b"\n") else part + b"\n" for part in parts)
+
+
+Responder = Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]]
+
+
+async def _gateway_responder(body: Dict[str, Any]) -> Dict[str, Any]:
+    from app.utils.llm_gateway import BATCH
+    from app.utils.openai_client import chat_completion
+
+    response = await chat_completion(lane=BATCH, **body)
+    return response.model_dump()
+
+
+class LocalBatchTransport(BatchTransport):
+    """
+    In-process stand-in: requests run when the batch is first polled, each
+    answered by ``responder(body)`` (by default a normal chat completion on
+    the gateway's batch lane).
+    """
+
+    def __init__(self, responder: Optional[Responder] = None):
+        self.responder = responder or _gateway_responder
+        self._inputs: Dict[str, List[Dict[str, Any]]] = {}
+        self._outputs: Dict[str, bytes] = {}
+        # Concurrent status checks of one batch share its run
+        self._runs = SingleFlight()
+
+    async def submit(self, content: bytes) -> str:
+        batch_id = f"local_batch_{uuid4().hex}"
+        self._inputs[batch_id] = [json.loads(line) for line in content.decode("utf-8").splitlines() if line.strip()]
+        return batch_id
+
+    async def _answer(self, request: Dict[str, Any]) -> Dict[str, Any]:
+        try:
+            body = await self.responder(request["body"])
+            return {"custom_id": request["custom_id"], "response": {"status_code": 200, "body": body}, "error": None}
+        except Exception as e:
+            return {"custom_id": request["custom_id"], "response": None,
+                    "error": {"code": type(e).__name__, "message": str(e)}}
+
+    async def _run(self, batch_id: str) -> None:
+        lines = await asyncio.gather(*(self._answer(request) for request in self._inputs[batch_id]))
+        self._outputs[batch_id] = "".join(json.dumps(line) + "\n" for line in lines).encode("utf-8")
+        del self._inputs[batch_id]
+
+    async def status(self, batch_id: str) -> str:
+        if batch_id not in self._outputs:
+            if batch_id not in self._inputs:
+                return "expired"
+            await self._runs.do(batch_id, lambda: self._run(batch_id))
+        return "completed"
+
+    async def results(self, batch_id: str) -> bytes:
+        # Like a provider output file, results can be downloaded more than once
+        return self._outputs.get(batch_id, b"")
+
+
+_transport: Optional[BatchTransport] = None
+
+
+def get_batch_transport() -> BatchTransport:
+    """Transport selected by ``MATCHER_BATCH_TRANSPORT`` (created on first use)."""
+    global _transport
+    if _transport is None:
+        _transport = LocalBatchTransport() if settings.MATCHER_BATCH_TRANSPORT == "local" else OpenAIBatchTransport()
+    return _transport
+
+
+async def submit_batch_run(
+    db: AsyncSession,
+    run: MatchRun,
+    candidates: List[Tuple[CandidateProfile, Dict[str, Any], Dict[str, Any]]],
+    transport: Optional[BatchTransport] = None,
+) -> MatchRun:
+    """
+    Submit evaluations of ``(profile, protected_data, metadata)`` candidates
+    against ``run.job_description`` as one batch.
+    """
+    transport = transport or get_batch_transport()
+    content = build_batch_jsonl([
+        (_custom_id(profile.id), build_evaluation_request(protected, run.job_description, metadata))
+        for profile, protected, metadata in candidates
+    ])
+    try:
+        run.batch_id = await transport.submit(content)
+        run.candidate_ids = [profile.id for profile, _, _ in candidates]
+        run.status = "submitted"
+    except Exception as e:
+        run.status = "failed"
+        run.error_message = f"Batch submission failed: {e}"[:500]
+    await db.commit()
+    return run
+
+
+def _match_result(run: MatchRun, profile: CandidateProfile, verdict: Dict[str, Any]) -> MatchResult:
+    job_text = run.job_description.lower()
+    rationale = " ".join(
+        str(verdict[key]) for key in ("technical_alignment", "experience_alignment") if verdict.get(key)
+    )
+    return MatchResult(
+        run_id=run.id,
+        candidate_id=profile.id,
+        score=float(verdict["match_percentage"]),
+        matched_skills=[skill for skill in profile.skills or [] if skill.lower() in job_text],
+        missing_skills=list(verdict.get("gaps") or []),
+        highlights=list(verdict.get("strengths") or []),
+        rationale=f"{verdict.get('recommendation', '')}: {rationale}".strip(": "),
+    )
+
+
+async def poll_batch_run(db: AsyncSession, run: MatchRun, transport: Optional[BatchTransport] = None) -> bool:
+    """
+    Check a submitted run; ingest its results once finished. Returns whether it
+    finished. The background poller, GET requests and other workers may poll
+    the same run concurrently, so ingestion first claims the run: only the
+    poller whose ``submitted -> ingesting`` update matched writes results, in
+    the same transaction (a failure leaves the run submitted).
+    """
+    if run.status != "submitted" or not run.batch_id:
+        return run.status in ("completed", "failed")
+    transport = transport or get_batch_transport()
+    status = await transport.status(run.batch_id)
+    if status not in FINISHED:
+        return False
+    outcomes = parse_batch_output(await transport.results(run.batch_id)) if status == "completed" else {}
+
+    claim = await db.execute(
+        update(MatchRun)
+        .where(MatchRun.id == run.id, MatchRun.status == "submitted")
+        .values(status="ingesting")
+    )
+    if claim.rowcount != 1:
+        # Another poller ingested it (or is doing so)
+        await db.rollback()
+        await db.refresh(run)
+        return run.status in ("completed", "failed")
+
+    if status != "completed":
+        run.status = "failed"
+        run.error_message = f"Batch {status}"
+    else:
+        submitted = run.candidate_ids or [
+            int(custom_id.split("-", 1)[1]) for custom_id in outcomes
+            if isinstance(custom_id, str) and custom_id.startswith("candidate-")
+        ]
+        profiles = (await db.execute(
+            select(CandidateProfile).where(CandidateProfile.id.in_(submitted))
+        )).scalars().all()
+        ingested = 0
+        for profile in profiles:
+            outcome = outcomes.get(_custom_id(profile.id))
+            if isinstance(outcome, dict):
+                db.add(_match_result(run, profile, outcome))
+                ingested += 1
+        run.status = "completed"
+        # Errors, malformed verdicts and candidates missing from the output
+        failed = len(submitted) - ingested
+        if failed:
+            run.error_message = f"{failed} candidate(s) could not be evaluated"
+    run.completed_at = datetime.utcnow()
+    await db.commit()
+    return True
+
+
+async def poll_pending_runs(session_factory: Callable = AsyncSessionLocal) -> int:
+    """Poll every submitted run once; returns how many finished."""
+    async with session_factory() as db:
+        runs = (await db.execute(select(MatchRun).where(MatchRun.status == "submitted"))).scalars().all()
+        finished = 0
+        for run in runs:
+            try:
+                finished += await poll_batch_run(db, run)
+            except Exception as e:
+                await db.rollback()
+                print(f"Polling batch run {run.id} failed: {type(e).__name__}: {e}")
+        return finished
+
+
+class BatchPoller:
+    """Background task that polls pending batch runs."""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval or settings.MATCHER_BATCH_POLL_INTERVAL
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await poll_pending_runs()
+            except Exception as e:
+                print(f"Batch poller error: {type(e).__name__}: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+batch_poller = BatchPoller()
@@ -0,0 +1,264 @@
+"""
+Deterministic intent and slot extraction for simple chat turns.
+
+Many chat messages are short answers to the question just asked ("Senior",
+"Python, SQL", "Berlin", "12-18 LPA", "offer letter"). These rules recognise
+them from fixed vocabularies (the skills database, seniority terms, work
+modes, template names and the ``FieldValidator`` patterns) so the chat agents
+can answer without an LLM round-trip.
+
+The rules only claim a message when every word in it is accounted for; any
+leftover word that is not filler (or a question mark) returns ``None`` and
+the turn goes to the model as before. So do alternatives for a single-value
+field (two cities, work modes or seniority levels) and "or" between skills.
+"""
+import re
+from typing import Any, Dict, List, Optional
+
+from app.services.skills_database import SKILLS_DATABASE
+from app.utils.field_validators import FieldValidator
+
+# Longest first so "Node.js" is taken before "Node"-style prefixes
+_SKILLS = sorted(SKILLS_DATABASE, key=len, reverse=True)
+_SKILL_PATTERNS = [(name, re.compile(rf"(?<![\w.#+]){re.escape(name.lower())}(?![\w#+])")) for name in _SKILLS]
+# Skill names that are also everyday words only count when written as such
+_CASE_SENSITIVE_SKILLS = {"Go"}
+
+SENIORITY_TERMS = {
+    "intern": "Entry",
+    "entry level": "Entry",
+    "entry-level": "Entry",
+    "entry": "Entry",
+    "graduate": "Entry",
+    "fresher": "Entry",
+    "junior": "Entry",
+    "jr": "Entry",
+    "mid level": "Mid",
+    "mid-level": "Mid",
+    "mid": "Mid",
+    "intermediate": "Mid",
+    "senior": "Senior",
+    "sr": "Senior",
+    "lead": "Lead",
+    "staff": "Lead",
+    "principal": "Principal",
+}
+
+WORK_MODES = {
+    "remote": "Remote",
+    "fully remote": "Remote",
+    "work from home": "Remote",
+    "wfh": "Remote",
+    "hybrid": "Hybrid",
+    "on-site": "On-site",
+    "onsite": "On-site",
+    "on site": "On-site",
+    "in office": "On-site",
+    "office": "On-site",
+}
+
+CITIES = {
+    "bangalore", "bengaluru", "chennai", "delhi", "gurgaon", "hyderabad", "mumbai", "noida", "pune",
+    "kolkata", "berlin", "bonn", "munich", "london", "amsterdam", "dubai", "singapore", "new york",
+    "san francisco", "toronto", "sydney", "paris", "dublin",
+}
+
+# Words that carry no information of their own in a short answer
+FILLER = {
+    "a", "an", "and", "or", "the", "we", "i", "i'll", "we'll", "need", "needs", "want", "it", "its", "it's", "is", "be",
+    "should", "must", "in", "at", "with", "based", "about", "around", "roughly", "approx",
+    "approximately", "of", "experience", "exp", "please", "also", "plus", "skills", "skill", "location",
+    "salary", "budget", "range", "timeline", "start", "starting", "join", "joining", "can", "from", "to",
+    "for", "level", "ok", "okay", "sure", "ideally", "per", "annum", "year", "yearly", "strong", "good",
+    "knowledge", "role", "position", "someone", "person", "candidate", "would", "like", "create", "make",
+    "generate", "letter", "document", "my", "me", "this", "one", "via", "using",
+    "by", "preferably", "they", "will", "work", "working", "notice",
+}
+
+_CURRENCY = r"(?:[$€£₹]|rs\.?|inr|usd|eur|gbp)"
+_UNIT = r"(?:k|l|lpa|lakhs?|lacs?|cr|crores?|m|million)"
+_AMOUNT = rf"{_CURRENCY}?\s*\d[\d,.]*\s*{_UNIT}?"
+_SALARY_RANGE = re.compile(
+    rf"(?<![\w]){_AMOUNT}\s*(?:-|–|to)\s*{_AMOUNT}(?:\s*(?:per annum|p\.?a\.?|per year|a year|/year|annually))?(?![\w])"
+)
+_SALARY_SINGLE = re.compile(
+    rf"(?<![\w])(?:{_CURRENCY}\s*\d[\d,.]*\s*{_UNIT}?|\d[\d,.]*\s*(?:lpa|lakhs?|lacs?|crores?|k))"
+    rf"(?:\s*(?:per annum|p\.?a\.?|per year|a year|/year|annually))?(?![\w])"
+)
+_TIMELINE = re.compile(
+    r"(?<![\w])(?:asap|immediately|immediate(?: joiner)?|right away|as soon as possible|flexible|"
+    r"(?:within|in)\s+(?:\d+|a|one|two|three|four|six)\s+(?:days?|weeks?|months?)|"
+    r"\d+\s+(?:days?|weeks?|months?)(?:\s+notice)?|next\s+(?:week|month|quarter))(?![\w])"
+)
+_SALARY_MARKER = re.compile(rf"{_CURRENCY}|\d\s*{_UNIT}(?![\w])")
+_DATE = re.compile(r"(?<![\w])(?:\d{4}-\d{2}-\d{2}|\d{2}/\d{2}/\d{4}|\d{2}-\d{2}-\d{4})(?![\w])")
+_YEARS = re.compile(r"(?<![\w])(\d{1,2})\s*\+?\s*(?:years?|yrs?)(?![\w])")
+_WORD = re.compile(r"[\w'&+#.-]+")
+
+
+def _phrase(term: str) -> re.Pattern:
+    return re.compile(rf"(?<![\w-]){re.escape(term)}(?![\w-])")
+
+
+_SENIORITY_PATTERNS = [(_phrase(term), value) for term, value in
+                       sorted(SENIORITY_TERMS.items(), key=lambda item: len(item[0]), reverse=True)]
+_WORK_MODE_PATTERNS = [(_phrase(term), value) for term, value in
+                       sorted(WORK_MODES.items(), key=lambda item: len(item[0]), reverse=True)]
+_CITY_PATTERNS = [(_phrase(city), city.title()) for city in sorted(CITIES, key=len, reverse=True)]
+
+
+def _seniority_for_years(years: int) -> str:
+    if years <= 2:
+        return "Entry"
+    if years <= 5:
+        return "Mid"
+    if years <= 9:
+        return "Senior"
+    return "Lead"
+
+
+def _blank(pattern: re.Pattern, text: str) -> str:
+    return pattern.sub(" ", text)
+
+
+def _leftover(text: str) -> List[str]:
+    words = [word.strip(".,;:!-") for word in _WORD.findall(text)]
+    return [word for word in words if word and word not in FILLER]
+
+
+def _short(message: str, max_words: int) -> bool:
+    return "?" not in message and 0 < len(message.split()) <= max_words
+
+
+def extract_job_slots(message: str, focus: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Job builder fields in a short answer, or ``None`` unless the whole message
+    was understood. ``focus`` is the field the assistant last asked about;
+    it lets bare answers ("Berlin", "1500000") be attributed.
+    """
+    if not _short(message, 12):
+        return None
+    original = message.strip()
+    text = f" {original.lower()} "
+    slots: Dict[str, Any] = {}
+
+    salary = _SALARY_RANGE.search(text) or _SALARY_SINGLE.search(text)
+    # Plain number ranges ("2-3") are only a salary when that was the question
+    if salary and (focus == "salary_range" or _SALARY_MARKER.search(salary.group(0))):
+        # ``text`` is the lowercased message behind one leading space
+        slots["salary_range"] = original[max(salary.start() - 1, 0):salary.end() - 1].strip()
+        text = _blank(_SALARY_SINGLE, _blank(_SALARY_RANGE, text))
+
+    timeline = _TIMELINE.findall(text)
+    if timeline:
+        slots["joining_timeline"] = timeline[0].strip().capitalize() if timeline[0] != "asap" else "ASAP"
+        text = _blank(_TIMELINE, text)
+    dates = [date for date in _DATE.findall(text) if FieldValidator.validate_field("joining_date", date)[0]]
+    if dates and "joining_timeline" not in slots:
+        slots["joining_timeline"] = f"By {dates[0]}"
+        text = _blank(_DATE, text)
+
+    # Fields hold one value: alternatives ("junior or mid", "Berlin and London") go to the model
+    seniorities, modes, cities = set(), set(), set()
+    for pattern, value in _SENIORITY_PATTERNS:
+        if pattern.search(text):
+            seniorities.add(value)
+            text = _blank(pattern, text)
+    for years in _YEARS.findall(text):
+        seniorities.add(_seniority_for_years(int(years)))
+    text = _blank(_YEARS, text)
+    for pattern, value in _WORK_MODE_PATTERNS:
+        if pattern.search(text):
+            modes.add(value)
+            text = _blank(pattern, text)
+    for pattern, value in _CITY_PATTERNS:
+        if pattern.search(text):
+            cities.add(value)
+            text = _blank(pattern, text)
+    if len(seniorities) > 1 or len(modes) > 1 or len(cities) > 1:
+        return None
+    if seniorities:
+        slots["seniority"] = seniorities.pop()
+    city = cities.pop() if cities else None
+    mode = modes.pop() if modes else None
+    if city or mode:
+        slots["location"] = f"{city} ({mode})" if city and mode else city or mode
+
+    skills = []
+    for name, pattern in _SKILL_PATTERNS:
+        if pattern.search(text):
+            if name in _CASE_SENSITIVE_SKILLS and not re.search(rf"(?<![\w]){re.escape(name)}(?![\w])", original):
+                continue
+            skills.append(name)
+            text = _blank(pattern, text)
+    if len(skills) > 1 and re.search(r"(?<![\w])or(?![\w])", text):
+        return None  # "Python or Java" is a choice, not a list of requirements
+    if skills:
+        slots["preferred_skills" if focus == "preferred_skills" else "must_have_skills"] = skills
+
+    leftover = _leftover(text)
+    if not leftover:
+        return slots or None
+
+    # A bare answer to the question just asked
+    if slots:
+        return None
+    if focus == "location" and len(leftover) <= 3 and all(word.replace("-", "").isalpha() for word in leftover):
+        return {"location": original.strip(".!").title()}
+    if focus == "salary_range" and len(leftover) == 1 and FieldValidator.validate_field("salary", leftover[0])[0]:
+        return {"salary_range": leftover[0]}
+    return None
+
+
+def match_template(message: str, templates: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    The one template a short message names, or ``None`` if it names none,
+    several, or says anything else.
+    """
+    if not templates or not _short(message, 8):
+        return None
+    text = f" {message.strip().lower()} "
+
+    named = [t for t in templates if _phrase(t["name"].lower()).search(text)]
+    if named:
+        longest = max(len(t["name"]) for t in named)
+        named = [t for t in named if len(t["name"]) == longest]
+        chosen = named[0] if len(named) == 1 else None
+        if chosen is None or _leftover(_blank(_phrase(chosen["name"].lower()), text)):
+            return None
+        return chosen
+
+    # Distinctive words only ("promotion" for "Promotion Letter")
+    words = set(_leftover(text))
+    if not words:
+        return None
+    matches = [t for t in templates if words <= set(_leftover(t["name"].lower()))]
+    return matches[0] if len(matches) == 1 else None
+
+
+INPUT_METHODS = {
+    "manual_entry": ("manual", "manually", "fill", "fill it in", "step by step", "guide me", "type"),
+    "upload_csv": ("csv", "upload", "upload csv", "bulk", "file"),
+    "download_template": ("download", "download template", "sample", "csv template"),
+}
+_METHOD_PATTERNS = sorted(
+    ((method, _phrase(term)) for method, terms in INPUT_METHODS.items() for term in terms),
+    key=lambda item: len(item[1].pattern), reverse=True,
+)
+
+
+def match_input_method(message: str) -> Optional[str]:
+    """Input method chosen by a short message, or ``None``."""
+    if not _short(message, 6):
+        return None
+    text = f" {message.strip().lower()} "
+    if "template" in text and "download" in text:
+        return "download_template"
+    methods = set()
+    for method, pattern in _METHOD_PATTERNS:
+        if pattern.search(text):
+            methods.add(method)
+            text = _blank(pattern, text)
+    if len(methods) != 1 or _leftover(text.replace("template", " ")):
+        return None
+    return methods.pop()
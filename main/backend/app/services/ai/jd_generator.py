@@ -1,6 +1,8 @@
-from typing import Optional, Literal
+from typing import Any, AsyncIterator, Optional, Literal, Tuple
 from app.config import settings
-from app.utils.openai_client import openai_client
+from app.utils.json_stream import JSONFieldStream
+from app.utils.llm_gateway import LLMUnavailableError, is_llm_unavailable
+from app.utils.openai_client import chat_completion, stream_chat_completion
 import json
 
 
@@ -17,8 +19,6 @@ class JDGeneratorAgent:
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not configured")
         
-        # Use global OpenAI client with SSL configuration
-        self.client = openai_client
         self.model = "gpt-4o-mini"
     
     async def generate_jd(
@@ -59,15 +59,8 @@ class JDGeneratorAgent:
         )
         
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                max_tokens=4000,
-                temperature=0.7,
-                messages=[
-                    {"role": "system", "content": "You are an expert HR analyst who crafts comprehensive job descriptions."},
-                    {"role": "user", "content": prompt}
-                ],
-                response_format={"type": "json_object"}
+            response = await chat_completion(
+                **self._completion_params(prompt)
             )
             
             content = self._extract_content(response.choices[0].message)
@@ -89,7 +82,76 @@ class JDGeneratorAgent:
             }
             
         except Exception as e:
-            raise Exception(f"Failed to generate job description: {str(e)}")
+            raise self._failure("generate job description", e)
+    
+    async def stream_jd(
+        self,
+        role: str,
+        seniority: str,
+        expectations: str,
+        must_have_skills: list[str],
+        preferred_skills: list[str],
+        company_tone: CompanyTone = "formal",
+        department: Optional[str] = None,
+        location: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of ``generate_jd``. Yields ``(event, data)`` pairs:
+        
+        - ``("partial", {"path", "text"})`` while a text field is being written
+        - ``("field", {"path", "value"})`` when a section or sub-section is complete
+        - ``("done", result)`` with the same dictionary ``generate_jd`` returns
+        """
+        prompt = self._build_comprehensive_prompt(
+            role, seniority, expectations, must_have_skills,
+            preferred_skills, company_tone, department, location
+        )
+        parser = JSONFieldStream(max_depth=2)
+        
+        try:
+            async for delta in stream_chat_completion(**self._completion_params(prompt)):
+                for kind, path, value in parser.feed(delta):
+                    if kind == "partial":
+                        yield "partial", {"path": list(path), "text": value}
+                    else:
+                        yield "field", {"path": list(path), "value": value}
+        except Exception as e:
+            raise self._failure("generate job description", e)
+        
+        yield "done", {
+            **self._parse_jd_response(parser.text),
+            "metadata": {
+                "role": role,
+                "seniority": seniority,
+                "department": department,
+                "location": location,
+                "company_tone": company_tone,
+                "model": self.model,
+                # Usage is not reported for streamed completions
+                "tokens_used": None,
+                "streamed": True
+            }
+        }
+    
+    def _failure(self, action: str, error: Exception) -> Exception:
+        """Exception to raise for a failed call; provider outages stay distinguishable"""
+        message = f"Failed to {action}: {str(error)}"
+        if is_llm_unavailable(error):
+            return LLMUnavailableError(message)
+        return Exception(message)
+    
+    def _completion_params(self, prompt: str) -> dict:
+        """Chat completion parameters shared by the blocking and streaming calls"""
+        return {
+            "model": self.model,
+            "max_tokens": 4000,
+            "temperature": 0.7,
+            "messages": [
+                {"role": "system", "content": "You are an expert HR analyst who crafts comprehensive job descriptions."},
+                {"role": "user", "content": prompt}
+            ],
+            "response_format": {"type": "json_object"}
+        }
     
     
     def _build_comprehensive_prompt(
@@ -242,15 +304,15 @@ Original JD:
 Write a friendly, engaging explanation (300-400 words) that would help a candidate understand if this role is right for them."""
         
         try:
-            response = self.client.messages.create(
+            response = await chat_completion(
                 model=self.model,
                 max_tokens=1500,
                 temperature=0.8,
                 messages=[{"role": "user", "content": prompt}]
             )
-            return response.content[0].text
+            return self._extract_content(response.choices[0].message)
         except Exception as e:
-            raise Exception(f"Failed to explain JD: {str(e)}")
+            raise self._failure("explain JD", e)
     
     async def rewrite_for_manager(self, jd_content: dict, role: str) -> str:
         """
@@ -273,12 +335,12 @@ Original JD:
 Write a crisp, actionable manager briefing (400-500 words) with clear structure and bullet points."""
         
         try:
-            response = self.client.messages.create(
+            response = await chat_completion(
                 model=self.model,
                 max_tokens=1800,
                 temperature=0.7,
                 messages=[{"role": "user", "content": prompt}]
             )
-            return response.content[0].text
+            return self._extract_content(response.choices[0].message)
         except Exception as e:
-            raise Exception(f"Failed to rewrite JD: {str(e)}")
+            raise self._failure("rewrite JD", e)
@@ -5,9 +5,12 @@ Extracts structured job data through natural conversation.
 
 import json
 import re
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, List, Optional, Any, Tuple
 from app.config import settings
-from app.utils.openai_client import openai_client
+from app.services.ai.chat_rules import extract_job_slots
+from app.utils.json_stream import JSONFieldStream
+from app.utils.llm_gateway import is_llm_unavailable
+from app.utils.openai_client import chat_completion, stream_chat_completion
 
 class JobBuilderChatAgent:
     """
@@ -164,6 +167,22 @@ Response:
 }
 """
 
+    # Questions for the rule-based path (one per required field)
+    FIELD_QUESTIONS = {
+        "role": "What role are you hiring for?",
+        "seniority": "What seniority level are you looking for - Entry, Mid, Senior, Lead or Principal?",
+        "location": "Where will this position be based - remote, hybrid, or a specific office location?",
+        "must_have_skills": "What are the must-have skills for this role? Please list at least two.",
+        "joining_timeline": "When do you need this person to join - ASAP, within 30 days, or is it flexible?",
+        "salary_range": "What is the salary range or budget for this role?",
+    }
+    
+    READY_REPLY = (
+        "Perfect! I have everything I need: role, seniority, location, key skills, timeline, and budget. "
+        "Our AI will automatically generate comprehensive details for responsibilities, team context, and "
+        "other aspects. Ready to generate the job description?"
+    )
+    
     LOW_INFORMATION_RESPONSES = {
         "you surprise me",
         "surprise me",
@@ -183,15 +202,15 @@ Response:
         if not api_key:
             raise ValueError("OPENAI_API_KEY not configured")
         
-        # Use global OpenAI client with SSL configuration
-        self.client = openai_client
         self.model = "gpt-4o-mini"
     
     async def process_message(
         self,
         user_message: str,
         conversation_history: List[Dict[str, str]],
-        current_data: Optional[Dict[str, Any]] = None
+        current_data: Optional[Dict[str, Any]] = None,
+        folded_turns: int = 0,
+        focus_field: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Process user message and return AI response with extracted data.
@@ -200,6 +219,8 @@ Response:
             user_message: Latest message from user
             conversation_history: Previous messages [{"role": "user/assistant", "content": "..."}]
             current_data: Currently extracted job data
+            folded_turns: Earlier messages already dropped from the history
+            focus_field: Field the previous reply asked about
             
         Returns:
             Dict containing reply, extracted_data, completion status, etc.
@@ -207,11 +228,97 @@ Response:
         if current_data is None:
             current_data = self._initialize_data_structure()
         
+        result = self._rule_based_result(user_message, current_data, focus_field)
+        if result is not None:
+            return result
+        
+        try:
+            response = await chat_completion(
+                **self._completion_params(user_message, conversation_history, current_data, folded_turns)
+            )
+            
+            response_text = self._extract_content(response.choices[0].message)
+            return self._build_result(response_text, current_data)
+            
+        except Exception as e:
+            print(f"Error in chat agent: {e}")
+            if is_llm_unavailable(e):
+                return self._generate_fallback_response(user_message, current_data)
+            return self._error_result(current_data, e)
+    
+    async def stream_message(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        current_data: Optional[Dict[str, Any]] = None,
+        folded_turns: int = 0,
+        focus_field: Optional[str] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of ``process_message``. Yields ``(event, data)`` pairs:
+        ``("partial", {"path", "text"})`` as the reply is written,
+        ``("field", {"path", "value"})`` as extracted fields complete, and
+        ``("done", result)`` with the same dictionary ``process_message`` returns.
+        """
+        if current_data is None:
+            current_data = self._initialize_data_structure()
+        
+        result = self._rule_based_result(user_message, current_data, focus_field)
+        if result is not None:
+            yield "field", {"path": ["reply"], "value": result["reply"]}
+            for key, value in result["extracted_data"].items():
+                if value != current_data.get(key):
+                    yield "field", {"path": ["extracted_data", key], "value": value}
+            yield "done", result
+            return
+        
+        parser = JSONFieldStream(max_depth=2)
+        
+        try:
+            params = self._completion_params(user_message, conversation_history, current_data, folded_turns)
+            async for delta in stream_chat_completion(**params):
+                for kind, path, value in parser.feed(delta):
+                    if kind == "partial":
+                        yield "partial", {"path": list(path), "text": value}
+                    else:
+                        yield "field", {"path": list(path), "value": value}
+            result = self._build_result(parser.text, current_data)
+        except Exception as e:
+            print(f"Error in chat agent: {e}")
+            if is_llm_unavailable(e):
+                result = self._generate_fallback_response(user_message, current_data)
+            else:
+                result = self._error_result(current_data, e)
+        
+        yield "done", result
+    
+    def _completion_params(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        current_data: Dict[str, Any],
+        folded_turns: int = 0
+    ) -> Dict[str, Any]:
+        """
+        Chat completion parameters shared by the blocking and streaming calls.
+        Only the last ``JOB_BUILDER_HISTORY_WINDOW`` messages are sent; the
+        facts from older turns are carried by the extracted data.
+        """
         # Build conversation context
         messages = []
         
-        # Add conversation history
-        for msg in conversation_history:
+        window = settings.JOB_BUILDER_HISTORY_WINDOW
+        recent = conversation_history[-window:] if window > 0 else []
+        folded_turns += len(conversation_history) - len(recent)
+        if folded_turns:
+            messages.append({
+                "role": "system",
+                "content": f"{folded_turns} earlier messages of this conversation are omitted. Everything "
+                           "they established is in CURRENT EXTRACTED DATA; do not ask for it again."
+            })
+        
+        # Add recent conversation history
+        for msg in recent:
             messages.append({
                 "role": msg["role"],
                 "content": msg["content"]
@@ -225,7 +332,7 @@ Response:
         
         # Add context about current data if exists
         if self._has_any_data(current_data):
-            context_prompt = f"\n\nCURRENT EXTRACTED DATA:\n{json.dumps(current_data, indent=2)}\n\nUse this context to avoid asking about information already provided."
+            context_prompt = f"\n\nCURRENT EXTRACTED DATA:\n{self._compact_data(current_data)}\n\nUse this context to avoid asking about information already provided."
             messages[-1]["content"] += context_prompt
         
         normalized_message = user_message.strip().lower()
@@ -238,44 +345,85 @@ Response:
                 current_data
             )
         
-        try:
-            response = self.client.chat.completions.create(
-                model=self.model,
-                temperature=0.3,
-                messages=[
-                    {"role": "system", "content": self.SYSTEM_PROMPT},
-                    *messages
-                ],
-                max_tokens=2000,
-                response_format={"type": "json_object"}
-            )
-            
-            response_text = self._extract_content(response.choices[0].message)
-            
-            # Parse JSON response
-            result = self._parse_response(response_text)
-            
-            # Merge extracted data with current data
-            merged_data = self._merge_data(current_data, result.get("extracted_data", {}))
-            result["extracted_data"] = merged_data
-            
-            # Calculate actual completion
-            result["completion_percentage"] = self._calculate_completion(merged_data)
-            result["missing_required"] = self._get_missing_required(merged_data)
-            result["is_complete"] = len(result["missing_required"]) == 0
-            
-            return result
-            
-        except Exception as e:
-            print(f"Error in chat agent: {e}")
-            return {
-                "reply": "I apologize, I'm having trouble processing that. Could you rephrase or provide more details?",
-                "extracted_data": current_data,
-                "missing_required": self._get_missing_required(current_data),
-                "completion_percentage": self._calculate_completion(current_data),
-                "is_complete": False,
-                "error": str(e)
-            }
+        return {
+            "model": self.model,
+            "temperature": 0.3,
+            "messages": [
+                {"role": "system", "content": self.SYSTEM_PROMPT},
+                *messages
+            ],
+            "max_tokens": settings.JOB_BUILDER_COMPLETION_TOKENS,
+            "response_format": {"type": "json_object"}
+        }
+    
+    def _rule_based_result(
+        self,
+        user_message: str,
+        current_data: Dict[str, Any],
+        focus_field: Optional[str]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Answer short, fully understood replies ("Senior", "Remote", "12-18 LPA")
+        without calling the model. Returns None for anything else.
+        """
+        if not settings.CHAT_RULES_ENABLED:
+            return None
+        slots = extract_job_slots(user_message, focus_field)
+        if not slots:
+            return None
+        
+        merged_data = self._merge_data(current_data, slots)
+        missing_required = self._get_missing_required(merged_data)
+        noted = "; ".join(
+            f"{key.replace('_', ' ')}: {', '.join(value) if isinstance(value, list) else value}"
+            for key, value in slots.items()
+        )
+        if not missing_required:
+            question = self.READY_REPLY
+        elif missing_required[0] == "must_have_skills" and merged_data.get("must_have_skills"):
+            question = "Any other must-have skills? I need at least two."
+        else:
+            question = self.FIELD_QUESTIONS[missing_required[0]]
+        
+        return {
+            "reply": f"Got it - {noted}. {question}",
+            "extracted_data": merged_data,
+            "missing_required": missing_required,
+            "completion_percentage": self._calculate_completion(merged_data),
+            "is_complete": not missing_required,
+            "next_question_focus": missing_required[0] if missing_required else None
+        }
+    
+    def _compact_data(self, data: Dict[str, Any]) -> str:
+        """Filled-in fields as single-line JSON (empty fields are implied)."""
+        filled = {key: value for key, value in data.items() if value not in (None, "", [])}
+        return json.dumps(filled, separators=(",", ":"), ensure_ascii=False)
+    
+    def _build_result(self, response_text: str, current_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Parse the model output and merge it into the collected data."""
+        # Parse JSON response
+        result = self._parse_response(response_text)
+        
+        # Merge extracted data with current data
+        merged_data = self._merge_data(current_data, result.get("extracted_data", {}))
+        result["extracted_data"] = merged_data
+        
+        # Calculate actual completion
+        result["completion_percentage"] = self._calculate_completion(merged_data)
+        result["missing_required"] = self._get_missing_required(merged_data)
+        result["is_complete"] = len(result["missing_required"]) == 0
+        
+        return result
+    
+    def _error_result(self, current_data: Dict[str, Any], error: Exception) -> Dict[str, Any]:
+        return {
+            "reply": "I apologize, I'm having trouble processing that. Could you rephrase or provide more details?",
+            "extracted_data": current_data,
+            "missing_required": self._get_missing_required(current_data),
+            "completion_percentage": self._calculate_completion(current_data),
+            "is_complete": False,
+            "error": str(error)
+        }
     
     def _extract_content(self, message) -> str:
         """Normalize OpenAI response message content into a string."""
@@ -1,10 +1,13 @@
+import asyncio
 import json
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
 from uuid import uuid4
 
 from app.config import settings
-from app.utils.openai_client import async_openai_client
+from app.services.ai.prompt_builder import compile_candidate_profile
+from app.utils.llm_gateway import BATCH, INTERACTIVE
+from app.utils.openai_client import chat_completion
 from app.utils.resume_parser import (
     parse_resume, 
     parse_resume_protected,
@@ -12,87 +15,350 @@ from app.utils.resume_parser import (
     parse_resume_protected_with_metadata
 )
 from app.utils.pii_protector import protect_job_description, protect_pii_from_text
+from app.utils.token_counter import count_tokens
 
 
-async def evaluate_candidate(candidate_data: Dict[str, Any], job_description: str, metadata: Dict[str, Any] = None) -> Dict[str, Any]:
+# Verdict fields every evaluation must contain
+_VERDICT_SHAPE = (
+    '  "match_percentage": number,\n'
+    '  "strengths": ["..."],\n'
+    '  "gaps": ["..."],\n'
+    '  "technical_alignment": "...",\n'
+    '  "experience_alignment": "...",\n'
+    '  "document_quality": "high/medium/low",\n'
+    '  "recommendation": "hire/interview/reject",\n'
+    '  "follow_up_questions": ["..."]\n'
+)
+
+
+def _metadata_context(metadata: Optional[Dict[str, Any]]) -> str:
+    """Document metadata summary appended to a candidate profile."""
+    if not metadata:
+        return ""
+    return (
+        f"\nDocument Information:\n"
+        f"- File Type: {metadata.get('file_type', 'unknown')}\n"
+        f"- Document Type: {metadata.get('content_type', 'unknown')}\n"
+        f"- Selectable Text: {metadata.get('has_selectable_text', False)}\n"
+        f"- Is Scanned: {metadata.get('is_scanned', False)}\n"
+        f"- Extracted Sections: {', '.join(metadata.get('sections', {}).keys())}\n"
+        f"- Found Skills Count: {len(metadata.get('entities', {}).get('skills', []))}\n"
+        f"- Found Certifications: {', '.join(metadata.get('entities', {}).get('degrees', [])[:3])}\n"
+    )
+
+
+def _candidate_block(candidate_data: Dict[str, Any], metadata: Optional[Dict[str, Any]]) -> str:
+    return f"{json.dumps(candidate_data, ensure_ascii=False)}\n{_metadata_context(metadata)}"
+
+
+def _token_usage(resp: Any, profile_tokens: int, pack_size: int = 1) -> Dict[str, Any]:
+    """Token counts for one evaluation request (shared by every verdict in a pack)."""
+    usage = getattr(resp, "usage", None)
+    return {
+        "prompt_tokens": getattr(usage, "prompt_tokens", None),
+        "completion_tokens": getattr(usage, "completion_tokens", None),
+        "profile_tokens": profile_tokens,
+        "pack_size": pack_size,
+    }
+
+
+def _new_usage_totals() -> Dict[str, int]:
+    return {"requests": 0, "prompt_tokens": 0, "completion_tokens": 0, "profile_tokens": 0}
+
+
+def _add_usage(totals: Dict[str, int], token_usage: Optional[Dict[str, Any]]) -> None:
+    """Add one request's ``token_usage`` to run totals."""
+    if not token_usage:
+        return
+    totals["requests"] += 1
+    for key in ("prompt_tokens", "completion_tokens", "profile_tokens"):
+        totals[key] += token_usage.get(key) or 0
+
+
+def _log_usage(totals: Dict[str, int], candidates: int) -> None:
+    print(
+        f"Resume evaluation: {candidates} candidate(s) in {totals['requests']} request(s), "
+        f"profile tokens {totals['profile_tokens']}, prompt tokens {totals['prompt_tokens']}, "
+        f"completion tokens {totals['completion_tokens']}"
+    )
+
+
+def _completion_tokens(profile_tokens: int) -> int:
+    """
+    Completion limit for one verdict. Strengths, gaps and follow-up questions
+    draw on the profile, so short profiles get short limits; the limit is also
+    reserved against the gateway's tokens-per-minute budget.
+    """
+    return min(
+        settings.MATCHER_COMPLETION_TOKENS,
+        settings.MATCHER_VERDICT_BASE_TOKENS + profile_tokens // settings.MATCHER_VERDICT_PROFILE_RATIO,
+    )
+
+
+def _evaluation_params(
+    candidate_block: str, job_description: str, profile_tokens: Optional[int] = None
+) -> Dict[str, Any]:
+    """Chat completion parameters for evaluating one candidate."""
+    if profile_tokens is None:
+        profile_tokens = count_tokens(candidate_block)
+    # Ensure job description is protected before sending to LLM
+    safe_job_desc = protect_job_description(job_description)
+    
+    prompt = (
+        "You are an expert technical recruiter.\n"
+        "Return ONLY JSON.\n"
+        "Here is the job description:\n"
+        f"{safe_job_desc}\n\n"
+        "Here is a candidate profile:\n"
+        f"{candidate_block}\n"
+        "Respond with JSON exactly in the following shape:\n"
+        "{\n"
+        f"{_VERDICT_SHAPE}"
+        "}"
+    )
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": 0.25,
+        "max_tokens": _completion_tokens(profile_tokens),
+        "response_format": {"type": "json_object"},
+    }
+
+
+def build_evaluation_request(
+    candidate_data: Dict[str, Any], job_description: str, metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    The chat completion request ``evaluate_candidate`` would send, for callers
+    that send it another way (the offline batch mode).
+    """
+    return _evaluation_params(_candidate_block(compile_candidate_profile(candidate_data), metadata), job_description)
+
+
+def parse_verdict(content: Optional[str]) -> Optional[Dict[str, Any]]:
+    """A single evaluation response, or None if it is malformed."""
+    try:
+        verdict = json.loads(content or "")
+    except (TypeError, ValueError):
+        return None
+    return verdict if _is_valid_verdict(verdict) else None
+
+
+async def evaluate_candidate(
+    candidate_data: Dict[str, Any],
+    job_description: str,
+    metadata: Dict[str, Any] = None,
+    lane: str = INTERACTIVE,
+    user_id: Any = None,
+) -> Dict[str, Any]:
     """
     Evaluate candidate against job description using LLM.
     Includes document metadata analysis for comprehensive evaluation.
     
+    The profile is compiled to ``MATCHER_PROFILE_TOKEN_BUDGET`` first, and the
+    request's token usage is returned under ``token_usage``.
+    
     Args:
         candidate_data: Parsed candidate profile (should already be PII-protected)
         job_description: Job description (should already be PII-protected)
         metadata: Optional document metadata for additional context
+        lane: LLM gateway lane (``"batch"`` for bulk runs)
+        user_id: Requesting user, for fair sharing of the batch lane
         
     Returns:
         Evaluation results in JSON format
     """
-    # Use global async OpenAI client with SSL configuration
-    client = async_openai_client
-    
-    # Ensure job description is protected before sending to LLM
-    safe_job_desc = protect_job_description(job_description)
-    
-    # Build metadata context if available
-    metadata_context = ""
-    if metadata:
-        document_info = (
-            f"\nDocument Information:\n"
-            f"- File Type: {metadata.get('file_type', 'unknown')}\n"
-            f"- Document Type: {metadata.get('content_type', 'unknown')}\n"
-            f"- Selectable Text: {metadata.get('has_selectable_text', False)}\n"
-            f"- Is Scanned: {metadata.get('is_scanned', False)}\n"
-            f"- Extracted Sections: {', '.join(metadata.get('sections', {}).keys())}\n"
-            f"- Found Skills Count: {len(metadata.get('entities', {}).get('skills', []))}\n"
-            f"- Found Certifications: {', '.join(metadata.get('entities', {}).get('degrees', [])[:3])}\n"
-        )
-        metadata_context = document_info
-    
+    candidate_block = _candidate_block(compile_candidate_profile(candidate_data), metadata)
+    profile_tokens = count_tokens(candidate_block)
+    resp = await chat_completion(
+        lane=lane,
+        user_id=user_id,
+        **_evaluation_params(candidate_block, job_description, profile_tokens)
+    )
+    content = resp.choices[0].message.content
+    result = json.loads(content)
+    result["token_usage"] = _token_usage(resp, profile_tokens)
+    return result
+
+
+def plan_packs(token_counts: List[int], token_budget: int, max_pack_size: int) -> List[List[int]]:
+    """
+    Group candidate indexes into packs whose profiles fit ``token_budget``.
+    Order is preserved; a profile larger than the budget gets a pack of its own.
+    """
+    packs: List[List[int]] = []
+    current: List[int] = []
+    current_tokens = 0
+    for index, tokens in enumerate(token_counts):
+        if current and (current_tokens + tokens > token_budget or len(current) >= max_pack_size):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        packs.append(current)
+    return packs
+
+
+def _is_valid_verdict(verdict: Any) -> bool:
+    if not isinstance(verdict, dict):
+        return False
+    score = verdict.get("match_percentage")
+    return (
+        isinstance(score, (int, float)) and not isinstance(score, bool)
+        and isinstance(verdict.get("recommendation"), str)
+    )
+
+
+def _parse_packed_verdicts(content: str, candidate_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+    """Valid verdicts by candidate id; anything malformed or missing is left out."""
+    try:
+        data = json.loads(content)
+    except (TypeError, ValueError):
+        return {}
+    items = data.get("evaluations") if isinstance(data, dict) else data
+    if not isinstance(items, list):
+        return {}
+    verdicts = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        candidate_id = str(item.pop("candidate_id", ""))
+        if candidate_id in candidate_ids and candidate_id not in verdicts and _is_valid_verdict(item):
+            verdicts[candidate_id] = item
+    return verdicts
+
+
+async def _evaluate_pack(
+    candidates: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]],
+    safe_job_desc: str,
+    user_id: Any = None,
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """
+    One request for several candidates sharing the job description prefix.
+    Profiles are expected to be compiled already. Returns the valid verdicts
+    by candidate id and the request's token usage.
+    """
+    candidate_ids = [f"c{i + 1}" for i in range(len(candidates))]
+    blocks = [_candidate_block(data, metadata) for data, metadata in candidates]
+    profile_tokens = [count_tokens(block) for block in blocks]
+    profiles = "".join(
+        f"### Candidate {candidate_id}\n{block}\n"
+        for candidate_id, block in zip(candidate_ids, blocks)
+    )
     prompt = (
         "You are an expert technical recruiter.\n"
         "Return ONLY JSON.\n"
         "Here is the job description:\n"
         f"{safe_job_desc}\n\n"
-        "Here is a candidate profile:\n"
-        f"{json.dumps(candidate_data, ensure_ascii=False)}\n"
-        f"{metadata_context}\n"
-        "Respond with JSON exactly in the following shape:\n"
+        f"Evaluate each of the following {len(candidates)} candidate profiles independently against it.\n\n"
+        f"{profiles}\n"
+        'Respond with a JSON object {"evaluations": [...]} containing exactly one entry per candidate, '
+        "in the same order, each exactly in the following shape:\n"
         "{\n"
-        '  "match_percentage": number,\n'
-        '  "strengths": ["..."],\n'
-        '  "gaps": ["..."],\n'
-        '  "technical_alignment": "...",\n'
-        '  "experience_alignment": "...",\n'
-        '  "document_quality": "high/medium/low",\n'
-        '  "recommendation": "hire/interview/reject",\n'
-        '  "follow_up_questions": ["..."]\n'
+        '  "candidate_id": "c1",\n'
+        f"{_VERDICT_SHAPE}"
         "}"
     )
-    resp = await client.chat.completions.create(
+    resp = await chat_completion(
+        lane=BATCH,
+        user_id=user_id,
         model="gpt-4o-mini",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.25,
-        max_tokens=400,
+        max_tokens=sum(_completion_tokens(tokens) for tokens in profile_tokens) + 50,
         response_format={"type": "json_object"},
     )
-    content = resp.choices[0].message.content
-    return json.loads(content)
+    verdicts = _parse_packed_verdicts(resp.choices[0].message.content, candidate_ids)
+    token_usage = _token_usage(resp, sum(profile_tokens), len(candidates))
+    for verdict in verdicts.values():
+        verdict["token_usage"] = dict(token_usage)
+    return verdicts, token_usage
 
 
-async def process_resume_upload(file_bytes: bytes, filename: str, upload_dir: Path, job_description: str) -> Dict[str, Any]:
+async def evaluate_candidates(
+    candidates: List[Tuple[Dict[str, Any], Optional[Dict[str, Any]]]],
+    job_description: str,
+    token_budget: Optional[int] = None,
+    max_pack_size: Optional[int] = None,
+    user_id: Any = None,
+) -> AsyncIterator[Tuple[int, Union[Dict[str, Any], Exception]]]:
     """
-    Process uploaded resume and evaluate against job description.
-    Extracts comprehensive metadata from documents including non-selectable text.
-    PII is protected before sending to LLM, but original data is stored for DB records.
-    
-    Args:
-        file_bytes: Resume file content
-        filename: Original filename
-        upload_dir: Directory to store the uploaded file
-        job_description: Job description to match against
-        
-    Returns:
-        Dictionary with parsed data, metadata, evaluation results, and file info
+    Evaluate many ``(candidate_data, metadata)`` pairs against one job
+    description, packing several candidates per request so the job description
+    is sent once per pack instead of once per candidate. Profiles are compiled
+    to their token budget before packing. Requests use the LLM gateway's batch
+    lane, shared fairly between users by ``user_id``.
+
+    Yields ``(index, verdict)`` as each pack completes (``verdict`` is the
+    exception if a candidate could not be evaluated). Candidates whose verdict
+    is missing or malformed in a packed response are retried individually.
+    Identical profiles are evaluated once and get copies of the same verdict.
+    Token usage is totalled over the run and logged once at the end.
+    """
+    token_budget = token_budget or settings.MATCHER_PACK_TOKEN_BUDGET
+    max_pack_size = max_pack_size or settings.MATCHER_MAX_PACK_SIZE
+    safe_job_desc = protect_job_description(job_description)
+    candidates = [(compile_candidate_profile(data), metadata) for data, metadata in candidates]
+    blocks = [_candidate_block(data, metadata) for data, metadata in candidates]
+
+    # The same resume uploaded twice is evaluated once
+    first_seen: Dict[str, int] = {}
+    copies: Dict[int, List[int]] = {}
+    unique: List[int] = []
+    for index, block in enumerate(blocks):
+        original = first_seen.setdefault(block, index)
+        if original == index:
+            unique.append(index)
+            copies[index] = []
+        else:
+            copies[original].append(index)
+    token_counts = [count_tokens(blocks[i]) for i in unique]
+    totals = _new_usage_totals()
+
+    try:
+        for planned in plan_packs(token_counts, token_budget, max_pack_size):
+            pack = [unique[position] for position in planned]
+            verdicts: Dict[int, Dict[str, Any]] = {}
+            if len(pack) > 1:
+                try:
+                    by_id, token_usage = await _evaluate_pack(
+                        [candidates[i] for i in pack], safe_job_desc, user_id=user_id
+                    )
+                    _add_usage(totals, token_usage)
+                except Exception as e:
+                    print(f"Packed evaluation failed for {len(pack)} candidates, retrying individually: {e}")
+                    by_id = {}
+                for position, index in enumerate(pack):
+                    verdict = by_id.get(f"c{position + 1}")
+                    if verdict is not None:
+                        verdicts[index] = verdict
+
+            retry = [index for index in pack if index not in verdicts]
+            outcomes = await asyncio.gather(
+                *(
+                    evaluate_candidate(candidates[i][0], job_description, candidates[i][1], lane=BATCH, user_id=user_id)
+                    for i in retry
+                ),
+                return_exceptions=True,
+            )
+            for outcome in outcomes:
+                if not isinstance(outcome, Exception):
+                    _add_usage(totals, outcome.get("token_usage"))
+            verdicts.update(zip(retry, outcomes))
+            for index in pack:
+                verdict = verdicts[index]
+                yield index, verdict
+                for duplicate in copies[index]:
+                    yield duplicate, verdict if isinstance(verdict, Exception) else dict(verdict)
+    finally:
+        _log_usage(totals, len(candidates))
+
+
+def prepare_resume(file_bytes: bytes, filename: str, upload_dir: Path) -> Dict[str, Any]:
+    """
+    Store an uploaded resume and parse it twice: with original data (for the
+    DB record) and PII-protected (for the LLM).
     """
     upload_dir.mkdir(parents=True, exist_ok=True)
     suffix = Path(filename).suffix or ".txt"
@@ -111,10 +377,21 @@ async def process_resume_upload(file_bytes: bytes, filename: str, upload_dir: Pa
         k: v for k, v in protected_parsed_with_metadata.items() 
         if k != "metadata"
     }
-    metadata = protected_parsed_with_metadata.get("metadata", {})
-    
-    # Evaluate using protected candidate data, metadata, and job description
-    ai_result = await evaluate_candidate(protected_parsed, job_description, metadata)
+    return {
+        "filename": filename,
+        "stored_path": stored_path,
+        "parsed": parsed_with_metadata,
+        "protected": protected_parsed,
+        "metadata": protected_parsed_with_metadata.get("metadata", {}),
+    }
+
+
+def build_resume_result(prepared: Dict[str, Any], ai_result: Dict[str, Any]) -> Dict[str, Any]:
+    """Merge parsed data with the evaluation and mask PII for the API response."""
+    parsed_with_metadata = prepared["parsed"]
+    metadata = prepared["metadata"]
+    filename = prepared["filename"]
+    stored_path = prepared["stored_path"]
     
     # PII masking helpers
     def _mask_email(text: str) -> str:
@@ -166,3 +443,28 @@ async def process_resume_upload(file_bytes: bytes, filename: str, upload_dir: Pa
     merged["skills"] = _mask_obj(merged.get("skills", []))
     
     return merged
+
+
+async def process_resume_upload(file_bytes: bytes, filename: str, upload_dir: Path, job_description: str) -> Dict[str, Any]:
+    """
+    Process uploaded resume and evaluate against job description.
+    Extracts comprehensive metadata from documents including non-selectable text.
+    PII is protected before sending to LLM, but original data is stored for DB records.
+    
+    Args:
+        file_bytes: Resume file content
+        filename: Original filename
+        upload_dir: Directory to store the uploaded file
+        job_description: Job description to match against
+        
+    Returns:
+        Dictionary with parsed data, metadata, evaluation results, and file info
+    """
+    prepared = await asyncio.to_thread(prepare_resume, file_bytes, filename, upload_dir)
+    
+    # Evaluate using protected candidate data, metadata, and job description
+    ai_result = await evaluate_candidate(prepared["protected"], job_description, prepared["metadata"])
+    totals = _new_usage_totals()
+    _add_usage(totals, ai_result.get("token_usage"))
+    _log_usage(totals, 1)
+    return build_resume_result(prepared, ai_result)
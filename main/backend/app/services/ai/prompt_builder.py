@@ -0,0 +1,69 @@
+"""
+Token-budgeted candidate profiles for resume evaluation prompts.
+
+A parsed resume carries its full raw text, which can run to thousands of
+tokens and mostly repeats what the evaluation needs from a few sections.
+``compile_candidate_profile`` replaces it with the resume's sections in
+priority order (experience, skills and education first), truncating whatever
+does not fit ``MATCHER_PROFILE_TOKEN_BUDGET``.
+"""
+import json
+from typing import Any, Dict, Optional
+
+from app.config import settings
+from app.utils.metadata_extractor import MetadataExtractor
+from app.utils.token_counter import count_tokens, truncate_to_tokens
+
+# Sections sent to the model, most important first ("contact" is never sent)
+SECTION_PRIORITY = ("experience", "skills", "education", "projects", "certifications", "summary")
+# Share of the budget the parsed skill list may take
+_SKILLS_SHARE = 0.2
+
+
+def _json_tokens(value: Any) -> int:
+    return count_tokens(json.dumps(value, ensure_ascii=False))
+
+
+def compile_candidate_profile(candidate_data: Dict[str, Any], token_budget: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Compact copy of a (PII-protected) parsed resume that fits ``token_budget``.
+    Profiles without ``raw_text`` are returned unchanged, so compiling twice is
+    harmless.
+    """
+    if "raw_text" not in candidate_data:
+        return candidate_data
+    token_budget = token_budget or settings.MATCHER_PROFILE_TOKEN_BUDGET
+    raw_text = candidate_data.get("raw_text") or ""
+
+    profile = {
+        key: value for key, value in candidate_data.items()
+        if key not in ("raw_text", "skills", "experience_summary")
+    }
+    skills = list(candidate_data.get("skills") or [])
+    skills_budget = int(token_budget * _SKILLS_SHARE)
+    while skills and _json_tokens(skills) > skills_budget:
+        skills.pop()
+    profile["skills"] = skills
+
+    sections = MetadataExtractor.detect_sections(raw_text)
+    remaining = token_budget - _json_tokens(profile)
+    if not sections.get("experience") and candidate_data.get("experience_summary"):
+        profile["experience_summary"] = truncate_to_tokens(candidate_data["experience_summary"], remaining // 4)
+        remaining -= _json_tokens({"experience_summary": profile["experience_summary"]})
+
+    if not any(sections.get(name) for name in SECTION_PRIORITY):
+        profile["resume_text"] = truncate_to_tokens(raw_text, remaining - count_tokens("resume_text") - 4)
+        return profile
+
+    compiled = {}
+    for name in SECTION_PRIORITY:
+        text = sections.get(name)
+        if not text or remaining <= 0:
+            continue
+        # Allow for the key and JSON quoting around the section text
+        text = truncate_to_tokens(text, remaining - count_tokens(name) - 4)
+        if text:
+            compiled[name] = text
+            remaining -= _json_tokens({name: text})
+    profile["sections"] = compiled
+    return profile
@@ -0,0 +1,114 @@
+"""
+Server-held sessions for the interactive job builder chat.
+
+Clients used to send the whole conversation and the extracted data with every
+message, and the agent re-sent all of it to the model. A session now keeps
+the extracted data (which already records every fact collected so far) and a
+sliding window of the most recent turns; older turns are folded away and only
+counted, so the prompt stays the same size however long the conversation
+runs. Sessions live in a bounded in-memory LRU and expire after
+``JOB_BUILDER_SESSION_TTL`` seconds of inactivity.
+"""
+import asyncio
+import time
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from app.config import settings
+
+
+class BuilderSession:
+    """Extracted job data plus the recent turns of one builder conversation."""
+
+    __slots__ = ("session_id", "user_id", "current_data", "history", "folded", "focus", "touched_at")
+
+    def __init__(self, session_id: str, user_id: Optional[int],
+                 current_data: Optional[Dict[str, Any]] = None,
+                 history: Optional[List[Dict[str, str]]] = None):
+        self.session_id = session_id
+        self.user_id = user_id
+        self.current_data = current_data
+        self.history: List[Dict[str, str]] = []
+        # Messages dropped from the window so far
+        self.folded = 0
+        # Field the last reply asked about
+        self.focus: Optional[str] = None
+        self.touched_at = time.monotonic()
+        for message in history or []:
+            self.history.append({"role": message["role"], "content": message["content"]})
+        self._fold()
+
+    def _fold(self) -> None:
+        window = settings.JOB_BUILDER_HISTORY_WINDOW
+        if len(self.history) > window:
+            self.folded += len(self.history) - window
+            self.history = self.history[-window:] if window > 0 else []
+
+    def record(self, user_message: str, result: Dict[str, Any]) -> None:
+        """Append a completed turn and take over the merged extracted data."""
+        self.history.append({"role": "user", "content": user_message})
+        self.history.append({"role": "assistant", "content": result.get("reply", "")})
+        self.current_data = result.get("extracted_data", self.current_data)
+        self.focus = result.get("next_question_focus")
+        self._fold()
+
+
+class BuilderSessionStore:
+    """LRU of builder sessions with an idle TTL and per-session locks."""
+
+    def __init__(self, max_sessions: Optional[int] = None, ttl: Optional[float] = None):
+        self.max_sessions = max_sessions or settings.JOB_BUILDER_SESSION_CACHE_SIZE
+        self.ttl = ttl or settings.JOB_BUILDER_SESSION_TTL
+        self._sessions: "OrderedDict[str, BuilderSession]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def lock(self, session_id: str):
+        """Serialize turns of one session."""
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            yield
+
+    def _evict(self) -> None:
+        now = time.monotonic()
+        for session_id, session in list(self._sessions.items()):
+            expired = now - session.touched_at > self.ttl
+            if not expired and len(self._sessions) <= self.max_sessions:
+                break
+            lock = self._locks.get(session_id)
+            if lock is not None and lock.locked():
+                continue
+            del self._sessions[session_id]
+            self._locks.pop(session_id, None)
+
+    def create(self, user_id: Optional[int], current_data: Optional[Dict[str, Any]] = None,
+               history: Optional[List[Dict[str, str]]] = None) -> BuilderSession:
+        """New session, optionally seeded from client-held history and data."""
+        session = BuilderSession(uuid4().hex, user_id, current_data, history)
+        self._sessions[session.session_id] = session
+        self._evict()
+        return session
+
+    def get(self, session_id: str, user_id: Optional[int]) -> Optional[BuilderSession]:
+        """The user's session, or None if it is unknown, expired or someone else's."""
+        session = self._sessions.get(session_id)
+        if session is None or session.user_id != user_id:
+            return None
+        if time.monotonic() - session.touched_at > self.ttl:
+            self._sessions.pop(session_id, None)
+            lock = self._locks.get(session_id)
+            if lock is not None and not lock.locked():
+                del self._locks[session_id]
+            return None
+        session.touched_at = time.monotonic()
+        self._sessions.move_to_end(session_id)
+        return session
+
+    def clear(self) -> None:
+        self._sessions.clear()
+        self._locks.clear()
+
+
+builder_sessions = BuilderSessionStore()
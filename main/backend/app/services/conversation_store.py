@@ -0,0 +1,181 @@
+"""
+Write-through state store for document agent conversations.
+
+The agent used to re-select its ``DocumentConversation`` row and commit the
+whole context JSON on every call (one round-trip per field during manual
+entry). Conversation state now lives in a bounded in-memory LRU:
+
+- Each session has a lock so concurrent calls for one session cannot
+  overwrite each other's context changes.
+- Changes are written to the database at step boundaries (``current_step``
+  changed), after ``CONVERSATION_FLUSH_EVERY`` coalesced updates, when a
+  dirty session is evicted, and on shutdown.
+"""
+import asyncio
+from collections import OrderedDict
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.document import DocumentConversation
+
+
+class ConversationState:
+    """In-memory copy of a conversation row (same attribute names as the model)."""
+
+    __slots__ = (
+        "id", "session_id", "user_id", "current_step", "selected_template_id",
+        "input_method", "context", "persisted_step", "pending",
+    )
+
+    def __init__(self, id: int, session_id: str, user_id: Optional[int], current_step: str,
+                 selected_template_id: Optional[int], input_method: Optional[str],
+                 context: Optional[Dict[str, Any]]):
+        self.id = id
+        self.session_id = session_id
+        self.user_id = user_id
+        self.current_step = current_step
+        self.selected_template_id = selected_template_id
+        self.input_method = input_method
+        self.context = dict(context or {})
+        # Step last written to the database and updates since then
+        self.persisted_step = current_step
+        self.pending = 0
+
+    def _values(self) -> Dict[str, Any]:
+        return {
+            "current_step": self.current_step,
+            "selected_template_id": self.selected_template_id,
+            "input_method": self.input_method,
+            "context": self.context,
+            "updated_at": datetime.utcnow(),
+        }
+
+
+class ConversationStore:
+    """LRU of conversation states with per-session locks and coalesced writes."""
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        max_sessions: Optional[int] = None,
+        flush_every: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.max_sessions = max_sessions or settings.CONVERSATION_CACHE_SIZE
+        self.flush_every = flush_every or settings.CONVERSATION_FLUSH_EVERY
+        self._states: "OrderedDict[str, ConversationState]" = OrderedDict()
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    @asynccontextmanager
+    async def lock(self, session_id: str):
+        """Serialize agent calls for one session."""
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            yield
+
+    def _remember(self, state: ConversationState) -> None:
+        self._states[state.session_id] = state
+        self._states.move_to_end(state.session_id)
+
+    async def _evict(self) -> None:
+        for session_id in list(self._states):
+            if len(self._states) <= self.max_sessions:
+                break
+            lock = self._locks.get(session_id)
+            if lock is not None and lock.locked():
+                # In use by a call that will save it; evict something else
+                continue
+            async with self.lock(session_id):
+                state = self._states.get(session_id)
+                if state is not None and state.pending:
+                    async with self.session_factory() as session:
+                        await self._write(session, state)
+                self._states.pop(session_id, None)
+        if len(self._locks) > 2 * self.max_sessions:
+            for session_id, lock in list(self._locks.items()):
+                if session_id not in self._states and not lock.locked():
+                    del self._locks[session_id]
+
+    async def create(self, db: AsyncSession, user_id: int, session_id: str) -> ConversationState:
+        """Insert a new conversation and cache its state."""
+        conversation = DocumentConversation(
+            session_id=session_id,
+            user_id=user_id,
+            current_step="initial",
+            context={}
+        )
+        db.add(conversation)
+        await db.commit()
+        state = ConversationState(conversation.id, session_id, user_id, "initial", None, None, {})
+        self._remember(state)
+        await self._evict()
+        return state
+
+    async def get(self, db: AsyncSession, session_id: str) -> ConversationState:
+        """Cached state, loading it on a miss. Raises NoResultFound for unknown sessions."""
+        state = self._states.get(session_id)
+        if state is not None:
+            self._states.move_to_end(session_id)
+            return state
+        result = await db.execute(
+            select(
+                DocumentConversation.id,
+                DocumentConversation.session_id,
+                DocumentConversation.user_id,
+                DocumentConversation.current_step,
+                DocumentConversation.selected_template_id,
+                DocumentConversation.input_method,
+                DocumentConversation.context,
+            ).where(DocumentConversation.session_id == session_id)
+        )
+        state = ConversationState(*result.one())
+        self._remember(state)
+        await self._evict()
+        return state
+
+    async def _write(self, db: AsyncSession, state: ConversationState) -> None:
+        await db.execute(
+            update(DocumentConversation)
+            .where(DocumentConversation.id == state.id)
+            .values(**state._values())
+        )
+        await db.commit()
+        state.persisted_step = state.current_step
+        state.pending = 0
+
+    async def save(self, db: AsyncSession, state: ConversationState, force: bool = False) -> bool:
+        """
+        Record a change to ``state``. Writes (and commits ``db``) at step
+        boundaries or once enough updates have been coalesced; returns whether
+        it wrote.
+        """
+        state.pending += 1
+        if force or state.current_step != state.persisted_step or state.pending >= self.flush_every:
+            await self._write(db, state)
+            return True
+        return False
+
+    async def flush_all(self) -> None:
+        """Persist every session with unwritten changes (shutdown)."""
+        for session_id, state in list(self._states.items()):
+            if not state.pending:
+                continue
+            async with self.lock(session_id):
+                try:
+                    async with self.session_factory() as session:
+                        await self._write(session, state)
+                except Exception as e:
+                    print(f"Conversation flush failed for {session_id}: {type(e).__name__}: {e}")
+
+    def clear(self) -> None:
+        self._states.clear()
+        self._locks.clear()
+
+
+conversation_store = ConversationStore()
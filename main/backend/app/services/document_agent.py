@@ -4,25 +4,33 @@ Handles conversational flow for template selection, data collection, and documen
 """
 import uuid
 import hashlib
+import functools
 import base64
 import json
 import io
 from pathlib import Path
 from typing import Dict, Any, List
-from sqlalchemy.orm.attributes import flag_modified
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
 from datetime import datetime
-from PyPDF2 import PdfReader
             
 
-from app.models.document import DocumentTemplate, DocumentConversation, GeneratedDocument
-from cryptography.fernet import Fernet
-from app.config import settings
+from app.models.document import GeneratedDocument
+from app.core.crypto import get_field_cipher
+from app.services.conversation_store import ConversationState, conversation_store
+from app.services.template_catalog import TemplateEntry, template_catalog
 from app.utils.field_validators import FieldValidator
 import re
 
 
+def _session_locked(method):
+    """Run an agent step while holding its conversation's lock (no lost updates)."""
+    @functools.wraps(method)
+    async def wrapper(self, session_id: str, *args, **kwargs):
+        async with conversation_store.lock(session_id):
+            return await method(self, session_id, *args, **kwargs)
+    return wrapper
+
+
 class DocumentAgentService:
     """Agentic bot for conversational document generation"""
     
@@ -45,11 +53,8 @@ class DocumentAgentService:
     
     def __init__(self, db: AsyncSession):
         self.db = db
-        # Generate proper Fernet key from SECRET_KEY
-        key_material = settings.SECRET_KEY.encode()
-        hashed_key = hashlib.sha256(key_material).digest()
-        fernet_key = base64.urlsafe_b64encode(hashed_key)
-        self.cipher = Fernet(fernet_key)
+        # Shared process-wide cipher (key derived once, supports rotation)
+        self.cipher = get_field_cipher()
         
         # Template directory and file mapping for PDF templates
         self.templates_dir = Path(__file__).parent.parent.parent / "Corporate_HR_Letter_Templates_ZIP"
@@ -79,6 +84,8 @@ class DocumentAgentService:
             return [], []
         
         try:
+            from PyPDF2 import PdfReader
+            
             # Read PDF and extract text
             reader = PdfReader(str(template_path))
             text = ""
@@ -179,20 +186,10 @@ class DocumentAgentService:
         """Start a new document generation conversation"""
         session_id = str(uuid.uuid4())
         
-        conversation = DocumentConversation(
-            session_id=session_id,
-            user_id=user_id,
-            current_step="initial",
-            context={}
-        )
-        self.db.add(conversation)
-        await self.db.commit()
+        await conversation_store.create(self.db, user_id, session_id)
         
         # Get available templates
-        templates_result = await self.db.execute(
-            select(DocumentTemplate).where(DocumentTemplate.is_active.is_(True))
-        )
-        templates = templates_result.scalars().all()
+        templates = await template_catalog.list_active(self.db)
         
         template_options = [
             {
@@ -213,6 +210,7 @@ class DocumentAgentService:
             "requires_upload": False
         }
     
+    @_session_locked
     async def process_template_selection(
         self, session_id: str, template_id: int
     ) -> Dict[str, Any]:
@@ -227,29 +225,18 @@ class DocumentAgentService:
         conversation.current_step = "input_method"
         print(f"🔍 DEBUG After assignment: selected_template_id={conversation.selected_template_id}")
         
-        # Extract actual fields from PDF template (if exists)
-        pdf_required, pdf_optional = self._extract_fields_from_pdf(template.name)
-        
-        # Use PDF fields if available, otherwise fall back to database fields
-        if pdf_required:
-            required_fields = pdf_required
-            optional_fields = pdf_optional
-            print(f"🔍 Using PDF-extracted fields: {required_fields}")
-        else:
-            required_fields = template.required_fields
-            optional_fields = template.optional_fields
-            print(f"🔍 Using database fields: {required_fields}")
+        # PDF placeholder fields (precomputed by the catalog), else database fields
+        required_fields, optional_fields = template.resolved_fields()
+        print(f"🔍 Using template fields: {required_fields}")
         
-        # Update context - need to reassign to trigger SQLAlchemy update
+        # Update context (always written: the selected template must survive a restart)
         new_context = dict(conversation.context) if conversation.context else {}
         new_context["template_name"] = template.name
         new_context["required_fields"] = required_fields
         new_context["optional_fields"] = optional_fields
         conversation.context = new_context
-        flag_modified(conversation, "context")
         
-        await self.db.commit()
-        await self.db.refresh(conversation)
+        await self._save(conversation, force=True)
         print(f"🔍 DEBUG After commit: selected_template_id={conversation.selected_template_id}")
         
         return {
@@ -278,6 +265,7 @@ class DocumentAgentService:
             "requires_upload": False
         }
     
+    @_session_locked
     async def process_input_method(
         self, session_id: str, method: str
     ) -> Dict[str, Any]:
@@ -288,7 +276,7 @@ class DocumentAgentService:
         if method == "manual_entry":
             # Start manual field-by-field entry
             conversation.current_step = "manual_entry"
-            await self.db.commit()
+            await self._save(conversation)
             
             required_fields = conversation.context.get("required_fields", [])
             optional_fields = conversation.context.get("optional_fields", [])
@@ -315,7 +303,7 @@ class DocumentAgentService:
         elif method == "download_template":
             # Generate CSV template
             conversation.current_step = "csv_upload"
-            await self.db.commit()
+            await self._save(conversation)
             
             template = await self._get_template(conversation.selected_template_id)
             csv_url = await self._generate_csv_template(template)
@@ -329,7 +317,7 @@ class DocumentAgentService:
             }
         else:  # upload_csv
             conversation.current_step = "csv_upload"
-            await self.db.commit()
+            await self._save(conversation)
             
             return {
                 "session_id": session_id,
@@ -338,6 +326,7 @@ class DocumentAgentService:
                 "requires_upload": True
             }
     
+    @_session_locked
     async def process_manual_field(
         self, session_id: str, field_name: str, field_value: str
     ) -> Dict[str, Any]:
@@ -383,11 +372,9 @@ class DocumentAgentService:
         print(f"🔍 DEBUG ctx after update: {ctx}")
         print(f"🔍 DEBUG manual_data now has: {ctx['manual_data']}")
         
-        conversation.context = ctx  # Reassign to trigger update
-        flag_modified(conversation, "context")  # Force SQLAlchemy to detect the change
-        await self.db.commit()  # Commit immediately to persist changes
-        
-        print("🔍 DEBUG After commit - context should be saved")
+        conversation.context = ctx
+        # Same step: kept in memory, written with the next step change
+        await self._save(conversation)
         
         # Get required and optional fields
         required_fields = ctx.get("required_fields", [])
@@ -419,8 +406,6 @@ class DocumentAgentService:
                     "hint": "Upload a clear signature image in PNG or JPG format"
                 }
             
-            # Already committed above, no need to commit again
-            
             return {
                 "session_id": session_id,
                 "message": f"✓ Got it! **{field_name.replace('_', ' ')}**: {field_value}\n\nNext, please provide **{next_field.replace('_', ' ')}**" + 
@@ -435,8 +420,7 @@ class DocumentAgentService:
         else:
             # All fields collected
             conversation.current_step = "manual_complete"
-            flag_modified(conversation, "current_step")
-            await self.db.commit()
+            await self._save(conversation)
             
             return {
                 "session_id": session_id,
@@ -447,6 +431,7 @@ class DocumentAgentService:
                 "filled_fields": len(filled_fields) + 1
             }
     
+    @_session_locked
     async def process_manual_complete(
         self, session_id: str, action: str, user_id: int
     ) -> Dict[str, Any]:
@@ -463,7 +448,7 @@ class DocumentAgentService:
             ctx["manual_data"] = {}
             conversation.context = ctx
             conversation.current_step = "manual_entry"
-            await self.db.commit()
+            await self._save(conversation)
             
             required_fields = ctx.get("required_fields", [])
             first_field = required_fields[0] if required_fields else None
@@ -512,9 +497,9 @@ class DocumentAgentService:
                     "document_type": template.name
                 })
             
-            await self.db.commit()
+            # One commit for the documents and the step change
             conversation.current_step = "completed"
-            await self.db.commit()
+            await self._save(conversation, force=True)
             
             return {
                 "session_id": session_id,
@@ -526,6 +511,7 @@ class DocumentAgentService:
                 "template_name": template.name
             }
     
+    @_session_locked
     async def process_csv_upload(
         self, session_id: str, csv_data: List[Dict[str, Any]], user_id: int
     ) -> Dict[str, Any]:
@@ -642,7 +628,7 @@ class DocumentAgentService:
         ctx_csv = dict(conversation.context) if conversation.context else {}
         ctx_csv["generated_document_ids"] = [d.id for d in generated_docs]
         conversation.context = ctx_csv
-        await self.db.commit()
+        await self._save(conversation, force=True)
         
         return {
             "session_id": session_id,
@@ -654,6 +640,7 @@ class DocumentAgentService:
             "template_name": template.name
         }
     
+    @_session_locked
     async def process_signature_upload(
         self, session_id: str, signature_data: bytes, filename: str
     ) -> Dict[str, Any]:
@@ -685,8 +672,7 @@ class DocumentAgentService:
             ctx["validation_status"]["signatory_designation"] = "valid"
         
         conversation.context = ctx
-        flag_modified(conversation, "context")
-        await self.db.commit()
+        await self._save(conversation)
         
         # Find next field (skip signatory name/designation)
         filled_fields = list(ctx["manual_data"].keys())
@@ -711,8 +697,7 @@ class DocumentAgentService:
         else:
             # All fields collected
             conversation.current_step = "manual_complete"
-            flag_modified(conversation, "current_step")
-            await self.db.commit()
+            await self._save(conversation)
             
             return {
                 "session_id": session_id,
@@ -722,7 +707,7 @@ class DocumentAgentService:
             }
     
     async def _generate_document(
-        self, template: DocumentTemplate, data: Dict[str, Any], user_id: int
+        self, template: TemplateEntry, data: Dict[str, Any], user_id: int
     ) -> GeneratedDocument:
         """Generate a single document from template and data"""
         # Extract identifier (employee_code or phone_number)
@@ -758,6 +743,7 @@ class DocumentAgentService:
         await self.db.flush()
         return doc
     
+    @_session_locked
     async def generate_preview(self, session_id: str) -> Dict[str, Any]:
         """Generate preview HTML of the document with validation"""
         from app.utils.document_generator import DocumentGenerator
@@ -783,7 +769,7 @@ class DocumentAgentService:
         # Update context with validation status
         ctx["validation_status"] = validation_status
         conversation.context = ctx
-        await self.db.commit()
+        await self._save(conversation)
         
         all_valid = len(validation_errors) == 0
         
@@ -797,7 +783,6 @@ class DocumentAgentService:
             }
         
         # Generate preview HTML
-        conversation = await self._get_conversation(session_id)
         print(f"🔍 DEBUG generate_preview: selected_template_id={conversation.selected_template_id}")
         
         if conversation.selected_template_id is None:
@@ -806,18 +791,8 @@ class DocumentAgentService:
         template = await self._get_template(conversation.selected_template_id)
         template_name_lower = template.name.lower()
         
-        # Find matching template file with flexible name matching
-        template_filename = ""
-        
-        # Try exact match first
-        if template_name_lower in self.template_file_map:
-            template_filename = self.template_file_map[template_name_lower]
-        else:
-            # Try partial match - find which base template this belongs to
-            for base_name, filename in self.template_file_map.items():
-                if base_name in template_name_lower:
-                    template_filename = filename
-                    break
+        # Template file resolved once by the catalog (exact, then partial name match)
+        template_filename = template.template_filename
         
         template_path = self.templates_dir / template_filename if template_filename else None
         
@@ -851,6 +826,7 @@ class DocumentAgentService:
             "collected_data": manual_data
         }
     
+    @_session_locked
     async def generate_documents(
         self, session_id: str, user_id: int, output_format: str = "pdf"
     ) -> Dict[str, Any]:
@@ -880,19 +856,8 @@ class DocumentAgentService:
         
         template = await self._get_template(conversation.selected_template_id)
         
-        # Find matching template file with flexible name matching
-        template_name_lower = template.name.lower()
-        template_filename = ""
-        
-        # Try exact match first
-        if template_name_lower in self.template_file_map:
-            template_filename = self.template_file_map[template_name_lower]
-        else:
-            # Try partial match - find which base template this belongs to
-            for base_name, filename in self.template_file_map.items():
-                if base_name in template_name_lower:
-                    template_filename = filename
-                    break
+        # Template file resolved once by the catalog (exact, then partial name match)
+        template_filename = template.template_filename
         
         if not template_filename:
             # Fallback to text generation if no PDF found
@@ -902,7 +867,12 @@ class DocumentAgentService:
         
         document_ids = []
         
-        for entry_data in all_entries:
+        # Encrypt all recipient names in one pass before rendering
+        encrypted_names = self.cipher.encrypt_many(
+            entry.get("employee_name") or entry.get("name") or "Unknown" for entry in all_entries
+        )
+        
+        for entry_data, encrypted_name in zip(all_entries, encrypted_names):
             # Debug: Log the data being used for generation
             print(f"🔍 DEBUG: Generating document with data: {entry_data}")
             
@@ -924,8 +894,6 @@ class DocumentAgentService:
                 # Fallback text generation
                 content = self._generate_document_content(template, entry_data)
             
-            # Extract PII for encryption
-            recipient_name = entry_data.get("employee_name") or entry_data.get("name") or "Unknown"
             phone = entry_data.get("phone_number") or entry_data.get("phone")
             
             # Create document record
@@ -935,7 +903,7 @@ class DocumentAgentService:
                 document_type=template.name.lower().replace(' ', '_'),
                 employee_code=entry_data.get("employee_code"),
                 phone_number_hash=hashlib.sha256(phone.encode()).hexdigest() if phone else None,
-                recipient_name_encrypted=self._encrypt_data(recipient_name),
+                recipient_name_encrypted=encrypted_name,
                 content=content[:5000],  # Store preview
                 document_data=entry_data,
                 status="generated",
@@ -945,7 +913,9 @@ class DocumentAgentService:
             await self.db.flush()
             document_ids.append(doc.id)
         
-        await self.db.commit()
+        # One commit for the documents and the step change
+        conversation.current_step = "completed"
+        await self._save(conversation, force=True)
         
         return {
             "session_id": session_id,
@@ -955,7 +925,7 @@ class DocumentAgentService:
             "document_ids": document_ids
         }
     
-    def _generate_simple_preview(self, template: DocumentTemplate, data: Dict[str, Any]) -> str:
+    def _generate_simple_preview(self, template: TemplateEntry, data: Dict[str, Any]) -> str:
         """Generate simple HTML preview when template file not found"""
         html = f"""
 <!DOCTYPE html>
@@ -985,24 +955,23 @@ class DocumentAgentService:
 """
         return html
     
-    async def _get_conversation(self, session_id: str) -> DocumentConversation:
-        """Get conversation by session ID"""
-        result = await self.db.execute(
-            select(DocumentConversation).where(
-                DocumentConversation.session_id == session_id
-            )
-        )
-        return result.scalar_one()
+    async def _get_conversation(self, session_id: str) -> ConversationState:
+        """Get conversation state by session ID (cached between calls)"""
+        return await conversation_store.get(self.db, session_id)
     
-    async def _get_template(self, template_id: int) -> DocumentTemplate:
-        """Get template by ID"""
-        result = await self.db.execute(
-            select(DocumentTemplate).where(DocumentTemplate.id == template_id)
-        )
-        return result.scalar_one()
+    async def _save(self, conversation: ConversationState, force: bool = False) -> None:
+        """Record conversation changes; written (with any pending work) at step boundaries or when forced"""
+        await conversation_store.save(self.db, conversation, force=force)
+    
+    async def _get_template(self, template_id: int) -> TemplateEntry:
+        """Get template by ID from the shared catalog"""
+        template = await template_catalog.get(self.db, template_id)
+        if template is None:
+            raise ValueError(f"Template {template_id} not found")
+        return template
     
     async def _validate_csv_data(
-        self, csv_data: List[Dict[str, Any]], template: DocumentTemplate
+        self, csv_data: List[Dict[str, Any]], template: TemplateEntry
     ) -> List[str]:
         """Validate CSV data against template requirements (lenient with synonyms) and include hints."""
         from app.utils.field_validators import FieldValidator
@@ -1015,9 +984,7 @@ class DocumentAgentService:
         headers = set(first_row.keys())
 
         # Prefer PDF-extracted fields when available
-        pdf_required, pdf_optional = self._extract_fields_from_pdf(template.name)
-        required_list = pdf_required or (template.required_fields or [])
-        optional_list = pdf_optional or (template.optional_fields or [])
+        required_list, optional_list = template.resolved_fields()
 
         # Determine missing required after normalization
         missing = []
@@ -1092,7 +1059,7 @@ class DocumentAgentService:
             normalized[canonical] = v
         return normalized
     
-    async def _generate_csv_template(self, template: DocumentTemplate) -> str:
+    async def _generate_csv_template(self, template: TemplateEntry) -> str:
         """Generate downloadable CSV template with column headers"""
         # In production, this would generate actual CSV file
         # For now, return a URL path
@@ -1100,13 +1067,13 @@ class DocumentAgentService:
     
     def _encrypt_data(self, data: str) -> str:
         """Encrypt sensitive data"""
-        return self.cipher.encrypt(data.encode()).decode()
+        return self.cipher.encrypt(data)
     
     def _decrypt_data(self, encrypted_data: str) -> str:
         """Decrypt sensitive data"""
-        return self.cipher.decrypt(encrypted_data.encode()).decode()
+        return self.cipher.decrypt(encrypted_data)
     
-    def _generate_document_content(self, template: DocumentTemplate, data: Dict[str, Any]) -> str:
+    def _generate_document_content(self, template: TemplateEntry, data: Dict[str, Any]) -> str:
         """Generate document content from PDF template if available, otherwise use fallback"""
         template_name_lower = template.name.lower()
         template_filename = self.template_file_map.get(template_name_lower)
@@ -1116,6 +1083,8 @@ class DocumentAgentService:
             
             if template_path.exists():
                 try:
+                    from PyPDF2 import PdfReader
+                    
                     # Read PDF template
                     reader = PdfReader(str(template_path))
                     
@@ -1,9 +1,10 @@
 """
 Document Chat Service - AI-powered conversational document generation
 """
-from openai import OpenAI
-from typing import List, Dict, Any
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
 from app.config import settings
+from app.services.ai.chat_rules import match_input_method, match_template
+from app.utils.openai_client import chat_completion, stream_chat_completion
 import json
 
 
@@ -13,14 +14,19 @@ class DocumentChatService:
     Provides natural conversation for creating HR documents
     """
     
+    METHOD_REPLIES = {
+        "manual_entry": "Let's fill it in together. I'll ask for each detail one at a time.",
+        "upload_csv": "Upload your CSV file and I'll generate a document for every row.",
+        "download_template": "Download the CSV template, add one row per employee, then upload it here.",
+    }
+    
     def __init__(self):
         """Initialize the chat service with OpenAI API."""
         if not settings.OPENAI_API_KEY:
             raise ValueError("OPENAI_API_KEY not configured")
-        self.client = OpenAI(api_key=settings.OPENAI_API_KEY)
         self.model = "gpt-4o-mini"
     
-    def generate_response(
+    async def generate_response(
         self,
         user_message: str,
         conversation_history: List[Dict[str, str]],
@@ -39,7 +45,72 @@ class DocumentChatService:
         Returns:
             Dictionary with reply, action, and metadata
         """
+        result = self._rule_based_result(user_message, available_templates)
+        if result is not None:
+            return result
+        
+        messages = self._build_messages(user_message, conversation_history, available_templates, session_context)
+        
+        try:
+            # Call OpenAI API
+            response = await chat_completion(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=500
+            )
+            
+            reply = response.choices[0].message.content.strip()
+            return self._build_result(user_message, reply, available_templates)
+            
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            return self._fallback_result(available_templates)
+    
+    async def stream_response(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        available_templates: List[Dict[str, Any]],
+        session_context: Dict[str, Any] = None
+    ) -> AsyncIterator[Tuple[str, Any]]:
+        """
+        Streaming variant of ``generate_response``. Yields ``("token", {"text"})``
+        as the reply is written, then ``("done", result)``.
+        """
+        result = self._rule_based_result(user_message, available_templates)
+        if result is not None:
+            yield "token", {"text": result["reply"]}
+            yield "done", result
+            return
+        
+        messages = self._build_messages(user_message, conversation_history, available_templates, session_context)
+        parts = []
+        
+        try:
+            async for delta in stream_chat_completion(
+                model=self.model,
+                messages=messages,
+                temperature=0.7,
+                max_tokens=500
+            ):
+                parts.append(delta)
+                yield "token", {"text": delta}
+            result = self._build_result(user_message, "".join(parts).strip(), available_templates)
+        except Exception as e:
+            print(f"OpenAI API error: {e}")
+            result = self._fallback_result(available_templates)
         
+        yield "done", result
+    
+    def _build_messages(
+        self,
+        user_message: str,
+        conversation_history: List[Dict[str, str]],
+        available_templates: List[Dict[str, Any]],
+        session_context: Dict[str, Any] = None
+    ) -> List[Dict[str, str]]:
+        """System prompt, recent history and the new message"""
         # Build system prompt with context
         template_list = "\n".join([f"- {t['name']}: {t.get('description', '')}" for t in available_templates])
         
@@ -78,37 +149,56 @@ Guidelines:
         
         # Add current user message
         messages.append({"role": "user", "content": user_message})
+        return messages
+    
+    def _build_result(
+        self, user_message: str, reply: str, available_templates: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        # Analyze reply for actions
+        action = self._detect_action(user_message, reply, available_templates)
         
-        try:
-            # Call OpenAI API
-            response = self.client.chat.completions.create(
-                model=self.model,
-                messages=messages,
-                temperature=0.7,
-                max_tokens=500
-            )
-            
-            reply = response.choices[0].message.content.strip()
-            
-            # Analyze reply for actions
-            action = self._detect_action(user_message, reply, available_templates)
-            
+        return {
+            "reply": reply,
+            "action": action.get("type"),
+            "action_data": action.get("data"),
+            "is_complete": False
+        }
+    
+    def _rule_based_result(
+        self, user_message: str, available_templates: List[Dict[str, Any]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Answer a message that only names a template or an input method
+        without calling the model. Returns None for anything else.
+        """
+        if not settings.CHAT_RULES_ENABLED:
+            return None
+        template = match_template(user_message, available_templates)
+        if template is not None:
             return {
-                "reply": reply,
-                "action": action.get("type"),
-                "action_data": action.get("data"),
+                "reply": f"Great choice! Let's create your {template['name']}. Would you like to fill in the "
+                         f"details step by step, upload a CSV for several employees, or download the CSV template?",
+                "action": "template_selected",
+                "action_data": {"template_id": template['id'], "template_name": template['name']},
                 "is_complete": False
             }
-            
-        except Exception as e:
-            print(f"OpenAI API error: {e}")
-            # Fallback response
+        method = match_input_method(user_message)
+        if method is not None:
             return {
-                "reply": f"I can help you create: {', '.join([t['name'] for t in available_templates])}. Which document do you need?",
-                "action": None,
-                "action_data": None,
+                "reply": self.METHOD_REPLIES[method],
+                "action": "method_selected",
+                "action_data": {"method": method},
                 "is_complete": False
             }
+        return None
+    
+    def _fallback_result(self, available_templates: List[Dict[str, Any]]) -> Dict[str, Any]:
+        return {
+            "reply": f"I can help you create: {', '.join([t['name'] for t in available_templates])}. Which document do you need?",
+            "action": None,
+            "action_data": None,
+            "is_complete": False
+        }
     
     def _detect_action(
         self,
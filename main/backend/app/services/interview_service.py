@@ -1,7 +1,8 @@
 import uuid
 from datetime import datetime
-from typing import List, Optional
-from sqlalchemy import select
+from typing import List, Optional, Tuple
+from sqlalchemy import select, func
+from sqlalchemy.orm import undefer
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.models.interview import Interview
@@ -18,19 +19,84 @@ def _generate_key(prefix: str) -> str:
     return f"{prefix}-{uuid.uuid4().hex[:10]}"
 
 
+# refresh() skips deferred columns unless they are named explicitly
+_REFRESH_ATTRS = [attr.key for attr in Interview.__mapper__.column_attrs]
+
+
+async def _refresh(db: AsyncSession, interview: Interview) -> None:
+    await db.refresh(interview, _REFRESH_ATTRS)
+
+
+# Dashboard projection: no transcript/notes/JD bodies, just the question count
+_SUMMARY_COLUMNS = (
+    Interview.id,
+    Interview.candidate_name,
+    Interview.candidate_email,
+    Interview.role,
+    Interview.company,
+    Interview.round_type,
+    Interview.scheduled_at,
+    Interview.status,
+    Interview.interviewer_key,
+    Interview.candidate_key,
+    Interview.resume_filename,
+    Interview.jd_filename,
+    Interview.feedback_rating,
+    Interview.feedback_decision,
+    func.coalesce(func.json_array_length(Interview.transcript), 0).label("question_count"),
+)
+
+
 async def list_interviews(db: AsyncSession) -> List[Interview]:
-    result = await db.execute(select(Interview).order_by(Interview.created_at.desc()))
+    result = await db.execute(
+        select(Interview).options(undefer(Interview.transcript)).order_by(Interview.created_at.desc())
+    )
     return result.scalars().all()
 
 
+async def list_interview_summaries(
+    db: AsyncSession,
+    status: Optional[str] = None,
+    role: Optional[str] = None,
+    scheduled_from: Optional[datetime] = None,
+    scheduled_to: Optional[datetime] = None,
+    offset: int = 0,
+    limit: int = 20,
+) -> Tuple[List[dict], int]:
+    """One page of dashboard rows (newest scheduled first) and the filtered total."""
+    filters = []
+    if status:
+        filters.append(Interview.status == status)
+    if role:
+        filters.append(Interview.role == role)
+    if scheduled_from:
+        filters.append(Interview.scheduled_at >= scheduled_from)
+    if scheduled_to:
+        filters.append(Interview.scheduled_at <= scheduled_to)
+
+    # Counted from the (status|role, scheduled_at, id) indexes without touching the table
+    total = (await db.execute(select(func.count(Interview.id)).where(*filters))).scalar_one()
+
+    result = await db.execute(
+        select(*_SUMMARY_COLUMNS)
+        .where(*filters)
+        .order_by(Interview.scheduled_at.desc(), Interview.id.desc())
+        .offset(offset)
+        .limit(limit)
+    )
+    return [dict(row._mapping) for row in result], total
+
+
 async def get_interview(db: AsyncSession, interview_id: int) -> Optional[Interview]:
-    result = await db.execute(select(Interview).where(Interview.id == interview_id))
+    result = await db.execute(
+        select(Interview).options(undefer(Interview.transcript)).where(Interview.id == interview_id)
+    )
     return result.scalar_one_or_none()
 
 
 async def get_interview_by_key(db: AsyncSession, key: str) -> Optional[Interview]:
     result = await db.execute(
-        select(Interview).where(
+        select(Interview).options(undefer(Interview.transcript)).where(
             (Interview.interviewer_key == key) | (Interview.candidate_key == key)
         )
     )
@@ -56,7 +122,7 @@ async def create_interview(db: AsyncSession, payload: InterviewCreate) -> Interv
     )
     db.add(interview)
     await db.flush()
-    await db.refresh(interview)
+    await _refresh(db, interview)
     return interview
 
 
@@ -64,18 +130,19 @@ async def update_status(db: AsyncSession, interview: Interview, status: str) ->
     interview.status = status
     interview.updated_at = datetime.utcnow()
     await db.flush()
-    await db.refresh(interview)
+    await _refresh(db, interview)
     return interview
 
 
 async def add_question(db: AsyncSession, interview: Interview, payload: QuestionCreate) -> Interview:
-    transcript = interview.transcript or []
+    # Copy so the JSON column sees a new value (in-place appends are not tracked)
+    transcript = list(interview.transcript or [])
     question_id = f"q-{uuid.uuid4().hex[:8]}"
     transcript.append({"id": question_id, "question": payload.question, "answer": None})
     interview.transcript = transcript
     interview.updated_at = datetime.utcnow()
     await db.flush()
-    await db.refresh(interview)
+    await _refresh(db, interview)
     return interview
 
 
@@ -90,7 +157,7 @@ async def add_response(db: AsyncSession, interview: Interview, payload: Response
     interview.transcript = updated
     interview.updated_at = datetime.utcnow()
     await db.flush()
-    await db.refresh(interview)
+    await _refresh(db, interview)
     return interview
 
 
@@ -102,5 +169,5 @@ async def save_feedback(db: AsyncSession, interview: Interview, payload: Feedbac
     interview.status = "completed"
     interview.updated_at = datetime.utcnow()
     await db.flush()
-    await db.refresh(interview)
+    await _refresh(db, interview)
     return interview
@@ -0,0 +1,153 @@
+"""
+Cache of generated job descriptions.
+
+``/jobs/generate-jd`` used to call the model for every request, including
+repeats after UI navigation or when several managers open the same
+requisition. Results are now cached under a hash of the canonical request:
+text fields are case- and whitespace-normalized, skill lists de-duplicated
+and sorted, and the tone is the normalized bucket.
+
+Entries live in a bounded in-memory LRU in front of the ``jd_cache`` table,
+so they survive restarts, and expire after ``JD_CACHE_TTL`` seconds.
+Concurrent misses for one request share a single generation.
+"""
+import copy
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import delete, select
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.jd_cache import JDCacheEntry
+from app.utils.single_flight import SingleFlight, request_key
+
+
+def _text(value: Optional[str]) -> Optional[str]:
+    if not value:
+        return None
+    return " ".join(value.split()).lower() or None
+
+
+def _skills(skills: Optional[List[str]]) -> List[str]:
+    return sorted({_text(skill) for skill in skills or [] if _text(skill)})
+
+
+def jd_cache_key(arguments: Dict[str, Any]) -> str:
+    """Key for JD agent arguments (as built by the endpoint, tone already normalized)."""
+    return request_key({
+        "role": _text(arguments.get("role")),
+        "seniority": _text(arguments.get("seniority")),
+        "expectations": _text(arguments.get("expectations")),
+        "must_have_skills": _skills(arguments.get("must_have_skills")),
+        "preferred_skills": _skills(arguments.get("preferred_skills")),
+        "company_tone": _text(arguments.get("company_tone")),
+        "department": _text(arguments.get("department")),
+        "location": _text(arguments.get("location")),
+    })
+
+
+class JDCache:
+    """LRU of generated JDs backed by the ``jd_cache`` table."""
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        ttl: Optional[float] = None,
+        max_entries: Optional[int] = None,
+        max_rows: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.ttl = ttl or settings.JD_CACHE_TTL
+        self.max_entries = max_entries or settings.JD_CACHE_SIZE
+        self.max_rows = max_rows or settings.JD_CACHE_MAX_ROWS
+        self._entries: "OrderedDict[str, Tuple[datetime, Dict[str, Any]]]" = OrderedDict()
+        self._flights = SingleFlight()
+        self.hits = 0
+        self.misses = 0
+
+    def _remember(self, key: str, expires_at: datetime, result: Dict[str, Any]) -> None:
+        self._entries[key] = (expires_at, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Cached result (a copy), or None if missing or expired."""
+        now = datetime.utcnow()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return copy.deepcopy(result)
+            del self._entries[key]
+
+        row = None
+        try:
+            async with self.session_factory() as db:
+                row = await db.get(JDCacheEntry, key)
+        except Exception as e:
+            print(f"JD cache read failed: {type(e).__name__}: {e}")
+        if row is None or row.expires_at <= now:
+            self.misses += 1
+            return None
+        self._remember(key, row.expires_at, row.result)
+        self.hits += 1
+        return copy.deepcopy(row.result)
+
+    async def put(self, key: str, result: Dict[str, Any]) -> None:
+        """Store a result; also drops expired rows and the oldest beyond ``max_rows``."""
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=self.ttl)
+        self._remember(key, expires_at, copy.deepcopy(result))
+        try:
+            async with self.session_factory() as db:
+                await db.merge(JDCacheEntry(cache_key=key, result=result, created_at=now, expires_at=expires_at))
+                await db.execute(delete(JDCacheEntry).where(JDCacheEntry.expires_at <= now))
+                overflow = (
+                    select(JDCacheEntry.cache_key)
+                    .order_by(JDCacheEntry.created_at.desc())
+                    .offset(self.max_rows)
+                )
+                await db.execute(delete(JDCacheEntry).where(JDCacheEntry.cache_key.in_(overflow)))
+                await db.commit()
+        except Exception as e:
+            # The in-memory entry still serves this process
+            print(f"JD cache write failed: {type(e).__name__}: {e}")
+
+    async def get_or_generate(
+        self,
+        arguments: Dict[str, Any],
+        generate: Callable[[], Awaitable[Dict[str, Any]]],
+        regenerate: bool = False,
+    ) -> Dict[str, Any]:
+        """
+        Cached JD for ``arguments`` (``metadata.cached`` set), or the result of
+        ``generate()``, which is then cached. ``regenerate`` skips the lookup
+        and replaces the entry.
+        """
+        key = jd_cache_key(arguments)
+        if not regenerate:
+            cached = await self.get(key)
+            if cached is not None:
+                cached["metadata"] = {**cached.get("metadata", {}), "cached": True}
+                return cached
+
+        async def generate_and_store() -> Dict[str, Any]:
+            result = await generate()
+            await self.put(key, result)
+            return result
+
+        return await self._flights.do(key, generate_and_store)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self._entries)}
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+jd_cache = JDCache()
@@ -0,0 +1,148 @@
+"""
+In-process catalog of document templates.
+
+Templates change only when they are seeded or edited, yet the API and the
+document agent used to query them (and re-parse the PDF placeholders) on
+nearly every request. The catalog loads every template once, precomputes the
+field lists and PDF file mapping, and serves immutable entries from memory.
+
+Writes through the ORM bump the catalog version (see the mapper listeners at
+the bottom), so the next read reloads. Writes from other processes, such as
+the seed scripts, are picked up after ``TEMPLATE_CATALOG_TTL`` seconds.
+"""
+import asyncio
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import settings
+from app.models.document import DocumentTemplate
+
+
+@dataclass(frozen=True)
+class TemplateEntry:
+    """Read-only snapshot of a template row plus its precomputed PDF metadata."""
+
+    id: int
+    name: str
+    category: str
+    description: Optional[str]
+    file_path: Optional[str]
+    required_fields: List[str]
+    optional_fields: List[str]
+    uses_company_logo: bool
+    uses_company_letterhead: bool
+    is_active: bool
+    created_at: Optional[datetime]
+    # PDF placeholders mapped to field names (empty when there is no PDF)
+    pdf_required_fields: List[str]
+    pdf_optional_fields: List[str]
+    # PDF file for this template (exact name match, then partial match)
+    template_filename: str
+
+    def resolved_fields(self) -> Tuple[List[str], List[str]]:
+        """Required/optional fields, preferring the PDF placeholders when present."""
+        if self.pdf_required_fields:
+            return list(self.pdf_required_fields), list(self.pdf_optional_fields)
+        return list(self.required_fields), list(self.optional_fields)
+
+
+def _match_template_file(template_name: str, file_map: Dict[str, str]) -> str:
+    name = template_name.lower()
+    if name in file_map:
+        return file_map[name]
+    for base_name, filename in file_map.items():
+        if base_name in name:
+            return filename
+    return ""
+
+
+class TemplateCatalog:
+    """Versioned, lazily reloaded snapshot of all document templates."""
+
+    def __init__(self, ttl: Optional[float] = None):
+        self.ttl = settings.TEMPLATE_CATALOG_TTL if ttl is None else ttl
+        self.version = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self._entries: Dict[int, TemplateEntry] = {}
+        self._lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """Mark the snapshot stale; the next read reloads it."""
+        self.version += 1
+
+    def _is_fresh(self) -> bool:
+        if self._loaded_version != self.version:
+            return False
+        return time.monotonic() - self._loaded_at < self.ttl
+
+    async def load(self, db: AsyncSession) -> int:
+        """Load every template and precompute its fields. Returns the entry count."""
+        # Function-local import: the agent module imports this one
+        from app.services.document_agent import DocumentAgentService
+
+        version = self.version
+        result = await db.execute(select(*DocumentTemplate.__table__.c).order_by(DocumentTemplate.id))
+        rows = result.mappings().all()
+
+        agent = DocumentAgentService(db)
+        entries = {}
+        for row in rows:
+            pdf_required, pdf_optional = agent._extract_fields_from_pdf(row["name"] or "")
+            entries[row["id"]] = TemplateEntry(
+                id=row["id"],
+                name=row["name"],
+                category=row["category"],
+                description=row["description"],
+                file_path=row["file_path"],
+                required_fields=list(row["required_fields"] or []),
+                optional_fields=list(row["optional_fields"] or []),
+                uses_company_logo=bool(row["uses_company_logo"]),
+                uses_company_letterhead=bool(row["uses_company_letterhead"]),
+                is_active=bool(row["is_active"]),
+                created_at=row["created_at"],
+                pdf_required_fields=pdf_required,
+                pdf_optional_fields=pdf_optional,
+                template_filename=_match_template_file(row["name"] or "", agent.template_file_map),
+            )
+
+        self._entries = entries
+        # A write during the load leaves the snapshot stale so it reloads again
+        self._loaded_version = version
+        self._loaded_at = time.monotonic()
+        return len(entries)
+
+    async def _ensure_loaded(self, db: AsyncSession) -> None:
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if not self._is_fresh():
+                await self.load(db)
+
+    async def list_active(self, db: AsyncSession, category: Optional[str] = None) -> List[TemplateEntry]:
+        """Active templates in id order, optionally filtered by category."""
+        await self._ensure_loaded(db)
+        return [
+            entry for entry in self._entries.values()
+            if entry.is_active and (category is None or entry.category == category)
+        ]
+
+    async def get(self, db: AsyncSession, template_id: int) -> Optional[TemplateEntry]:
+        """Template by id (active or not), or None."""
+        await self._ensure_loaded(db)
+        return self._entries.get(template_id)
+
+
+template_catalog = TemplateCatalog()
+
+
+@event.listens_for(DocumentTemplate, "after_insert")
+@event.listens_for(DocumentTemplate, "after_update")
+@event.listens_for(DocumentTemplate, "after_delete")
+def _invalidate_on_template_change(mapper, connection, target: DocumentTemplate) -> None:
+    template_catalog.invalidate()
@@ -0,0 +1,352 @@
+"""
+Write-behind transcript buffer for live interviews.
+
+Questions and answers are applied to an in-memory transcript and broadcast
+straight away; the database is updated in small batches (or after a short
+timer) instead of once per message. Every change is also appended to a
+recovery log so a crash between flushes loses nothing: the log is replayed
+into the database on the next startup.
+
+Each worker writes its own logs (``interview_<id>.<owner>.log``) and holds an
+exclusive lock on ``worker_<owner>.lock`` for its lifetime. Recovery runs
+under the startup lock and only replays logs whose owner lock is free, so a
+worker booting next to live ones leaves their logs alone. Log lines are
+written off the event loop, batched per interview.
+
+Flushes merge the buffer into the stored transcript by question id, so
+questions or answers written directly to the database (the REST endpoints of
+a worker that does not host the live session) are kept.
+"""
+import asyncio
+import json
+import os
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, TextIO
+
+from sqlalchemy import select, update
+
+from app.config import settings
+from app.db.session import AsyncSessionLocal
+from app.models.interview import Interview
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+
+class _TranscriptState:
+    """In-memory transcript for a single interview."""
+
+    def __init__(self, transcript: List[Dict[str, Any]]):
+        self.transcript = [dict(item) for item in transcript]
+        self.pending = 0
+        self.lock = asyncio.Lock()
+        self.timer: Optional[asyncio.TimerHandle] = None
+        self.flush_task: Optional[asyncio.Task] = None
+        self.log_lines: List[str] = []
+        self.log_task: Optional[asyncio.Task] = None
+
+
+def _apply_op(transcript: List[Dict[str, Any]], op: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Apply a logged operation to a transcript. Replaying an op twice is a no-op."""
+    if op.get("op") == "question":
+        item = op["item"]
+        if not any(existing.get("id") == item["id"] for existing in transcript):
+            transcript.append(dict(item))
+        return item
+    if op.get("op") == "response":
+        for item in transcript:
+            if item.get("id") == op["question_id"]:
+                item["answer"] = op["answer"]
+                return item
+    return None
+
+
+def _merge(stored: List[Dict[str, Any]], buffered: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Stored transcript with buffered questions added and buffered answers applied, by question id."""
+    merged = [dict(item) for item in stored or []]
+    by_id = {item.get("id"): item for item in merged}
+    for item in buffered:
+        existing = by_id.get(item.get("id"))
+        if existing is None:
+            by_id[item.get("id")] = dict(item)
+            merged.append(by_id[item.get("id")])
+        elif item.get("answer") is not None:
+            existing["answer"] = item["answer"]
+    return merged
+
+
+def _write_lines(path: Path, lines: List[str]) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a", encoding="utf-8") as fh:
+        fh.write("".join(lines))
+
+
+class TranscriptBuffer:
+    """Buffers transcript writes and persists them in batches."""
+
+    def __init__(
+        self,
+        session_factory: Callable = AsyncSessionLocal,
+        log_dir: Optional[str] = None,
+        flush_interval: Optional[float] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self.session_factory = session_factory
+        self.log_dir = Path(log_dir or settings.TRANSCRIPT_LOG_DIR)
+        self.flush_interval = settings.TRANSCRIPT_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.batch_size = batch_size or settings.TRANSCRIPT_FLUSH_BATCH
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._owner_lock: Optional[TextIO] = None
+        self._states: Dict[int, _TranscriptState] = {}
+
+    # ------------------------------------------------------------------
+    # State management
+    # ------------------------------------------------------------------
+    def _log_path(self, interview_id: int) -> Path:
+        return self.log_dir / f"interview_{interview_id}.{self.owner}.log"
+
+    def _owner_lock_path(self, owner: str) -> Path:
+        return self.log_dir / f"worker_{owner}.lock"
+
+    def _hold_owner_lock(self) -> None:
+        """
+        Lock this worker's owner file (once) so recovery elsewhere skips its logs.
+        Recovery removes lock files it can lock, which may happen between our open
+        and flock, so the lock only counts once it is on the file at the path.
+        """
+        if self._owner_lock is not None:
+            return
+        self.log_dir.mkdir(parents=True, exist_ok=True)
+        path = self._owner_lock_path(self.owner)
+        while True:
+            fh = open(path, "a")
+            if fcntl is None:
+                break
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+            try:
+                if os.fstat(fh.fileno()).st_ino == os.stat(path).st_ino:
+                    break
+            except FileNotFoundError:
+                pass
+            fh.close()
+        self._owner_lock = fh
+
+    def _owner_alive(self, owner: Optional[str]) -> bool:
+        """
+        Whether another worker still holds ``owner``'s lock. Without fcntl
+        (Windows, single-worker development) other owners count as gone.
+        """
+        if owner is None:
+            return False  # Log from before logs were per worker
+        if owner == self.owner:
+            return True
+        path = self._owner_lock_path(owner)
+        if fcntl is None or not path.exists():
+            return False
+        with open(path, "a") as fh:
+            try:
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return True
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+        return False
+
+    def is_tracked(self, interview_id: int) -> bool:
+        return interview_id in self._states
+
+    def track(self, interview: Interview) -> None:
+        """Start buffering an interview, seeding state from its persisted transcript."""
+        if interview.id not in self._states:
+            self._states[interview.id] = _TranscriptState(interview.transcript or [])
+
+    def snapshot(self, interview_id: int) -> Optional[List[Dict[str, Any]]]:
+        """Latest transcript (including unflushed changes), or None if not tracked."""
+        state = self._states.get(interview_id)
+        if state is None:
+            return None
+        return [dict(item) for item in state.transcript]
+
+    def _append_log(self, interview_id: int, state: _TranscriptState, op: Dict[str, Any]) -> None:
+        """Queue a log line; a background task writes queued lines in a thread."""
+        self._hold_owner_lock()
+        state.log_lines.append(json.dumps(op, ensure_ascii=False) + "\n")
+        if state.log_task is None or state.log_task.done():
+            state.log_task = asyncio.ensure_future(self._write_log(interview_id, state))
+
+    async def _write_log(self, interview_id: int, state: _TranscriptState) -> None:
+        # Lines queued while a write is in progress go out together in the next one
+        while state.log_lines:
+            lines, state.log_lines = state.log_lines, []
+            try:
+                await asyncio.to_thread(_write_lines, self._log_path(interview_id), lines)
+            except OSError as e:
+                print(f"Transcript log write failed for interview {interview_id}: {type(e).__name__}: {e}")
+
+    async def _drain_log(self, state: _TranscriptState) -> None:
+        if state.log_task is not None:
+            await asyncio.shield(state.log_task)
+
+    def _record(self, interview_id: int, op: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        state = self._states[interview_id]
+        item = _apply_op(state.transcript, op)
+        if item is None:
+            return None
+        self._append_log(interview_id, state, op)
+        state.pending += 1
+        self._schedule_flush(interview_id, state)
+        return dict(item)
+
+    # ------------------------------------------------------------------
+    # Transcript mutations
+    # ------------------------------------------------------------------
+    def add_question(self, interview_id: int, question: str) -> Dict[str, Any]:
+        """Append a question to the buffered transcript and return the new item."""
+        item = {"id": f"q-{uuid.uuid4().hex[:8]}", "question": question, "answer": None}
+        return self._record(interview_id, {"op": "question", "item": item})
+
+    def add_response(self, interview_id: int, question_id: str, answer: str) -> Optional[Dict[str, Any]]:
+        """Record an answer for a buffered question. Returns None for unknown questions."""
+        return self._record(
+            interview_id, {"op": "response", "question_id": question_id, "answer": answer}
+        )
+
+    # ------------------------------------------------------------------
+    # Flushing
+    # ------------------------------------------------------------------
+    def _schedule_flush(self, interview_id: int, state: _TranscriptState) -> None:
+        loop = asyncio.get_running_loop()
+        if state.pending >= self.batch_size:
+            if state.timer:
+                state.timer.cancel()
+                state.timer = None
+            self._spawn_flush(interview_id, state)
+        elif state.timer is None:
+            state.timer = loop.call_later(self.flush_interval, self._spawn_flush, interview_id, state)
+
+    def _spawn_flush(self, interview_id: int, state: _TranscriptState) -> None:
+        state.timer = None
+        if state.flush_task is None or state.flush_task.done():
+            state.flush_task = asyncio.ensure_future(self.flush(interview_id))
+
+    async def flush(self, interview_id: int) -> None:
+        """Persist any buffered changes for an interview (durability point)."""
+        state = self._states.get(interview_id)
+        if state is None:
+            return
+        async with state.lock:
+            if state.timer:
+                state.timer.cancel()
+                state.timer = None
+            if not state.pending:
+                return
+            pending = state.pending
+            buffered = [dict(item) for item in state.transcript]
+            try:
+                async with self.session_factory() as session:
+                    result = await session.execute(
+                        select(Interview.transcript).where(Interview.id == interview_id).with_for_update()
+                    )
+                    merged = _merge(result.scalar() or [], buffered)
+                    await session.execute(
+                        update(Interview)
+                        .where(Interview.id == interview_id)
+                        .values(transcript=merged, updated_at=datetime.utcnow())
+                    )
+                    await session.commit()
+            except Exception as e:
+                # Keep the log and pending count; the next flush retries
+                print(f"Transcript flush failed for interview {interview_id}: {type(e).__name__}: {e}")
+                return
+            # Pick up questions and answers written to the database directly (and keep
+            # changes buffered while this flush was waiting)
+            state.transcript = _merge(merged, state.transcript)
+            state.pending -= pending
+            if not state.pending:
+                await self._drain_log(state)
+                if not state.pending:
+                    self._log_path(interview_id).unlink(missing_ok=True)
+
+    async def flush_all(self) -> None:
+        for interview_id in list(self._states):
+            await self.flush(interview_id)
+
+    async def release(self, interview_id: int) -> None:
+        """Flush and stop buffering an interview (e.g. last participant left)."""
+        await self.flush(interview_id)
+        state = self._states.get(interview_id)
+        if state is not None and not state.pending:
+            self._states.pop(interview_id, None)
+
+    async def close(self) -> None:
+        """
+        Finish queued log writes and release the owner lock (worker shutdown,
+        after ``flush_all``). Logs that could not be flushed are left for recovery.
+        """
+        for state in list(self._states.values()):
+            await self._drain_log(state)
+        if self._owner_lock is None:
+            return
+        if not any(self.log_dir.glob(f"interview_*.{self.owner}.log")):
+            self._owner_lock_path(self.owner).unlink(missing_ok=True)
+        self._owner_lock.close()
+        self._owner_lock = None
+
+    # ------------------------------------------------------------------
+    # Crash recovery
+    # ------------------------------------------------------------------
+    async def recover(self) -> int:
+        """
+        Replay recovery logs left by workers that are gone into the database.
+        Returns interviews recovered. Call under the startup lock
+        (``app.db.migrations.startup_lock``) so workers do not recover at once.
+        """
+        if not self.log_dir.exists():
+            return 0
+        self._hold_owner_lock()
+        recovered = 0
+        for log_path in sorted(self.log_dir.glob("interview_*.log")):
+            name, _, owner = log_path.stem.partition(".")
+            owner = owner or None
+            try:
+                interview_id = int(name.split("_", 1)[1])
+            except ValueError:
+                continue
+            if self._owner_alive(owner):
+                continue
+            text = await asyncio.to_thread(log_path.read_text, encoding="utf-8")
+            ops = []
+            for line in text.splitlines():
+                try:
+                    ops.append(json.loads(line))
+                except json.JSONDecodeError:
+                    # A torn final line from a crash mid-write; everything before it is intact
+                    break
+            async with self.session_factory() as session:
+                result = await session.execute(
+                    select(Interview.transcript).where(Interview.id == interview_id)
+                )
+                row = result.first()
+                if row is not None:
+                    transcript = [dict(item) for item in (row[0] or [])]
+                    for op in ops:
+                        _apply_op(transcript, op)
+                    await session.execute(
+                        update(Interview)
+                        .where(Interview.id == interview_id)
+                        .values(transcript=transcript, updated_at=datetime.utcnow())
+                    )
+                    await session.commit()
+                    recovered += 1
+            log_path.unlink(missing_ok=True)
+        for lock_path in self.log_dir.glob("worker_*.lock"):
+            owner = lock_path.stem.split("_", 1)[1]
+            if not self._owner_alive(owner):
+                lock_path.unlink(missing_ok=True)
+        return recovered
+
+
+transcript_buffer = TranscriptBuffer()
@@ -1,6 +1,8 @@
 from typing import Dict, List, Tuple
 from fastapi import WebSocket
 
+from app.core.serialization import dumps_str
+
 
 class ConnectionManager:
     def __init__(self):
@@ -21,14 +23,20 @@ class ConnectionManager:
 
     async def broadcast(self, interview_id: int, message: dict):
         connections = self.active_connections.get(interview_id, [])
+        # Encode once, send the same text frame to every peer
+        payload = dumps_str(message)
         for ws, _ in connections:
-            await ws.send_json(message)
+            await ws.send_text(payload)
 
     async def send_role(self, interview_id: int, message: dict, role: str):
         connections = self.active_connections.get(interview_id, [])
+        payload = dumps_str(message)
         for ws, r in connections:
             if r == role:
-                await ws.send_json(message)
+                await ws.send_text(payload)
+
+    async def send(self, websocket: WebSocket, message: dict):
+        await websocket.send_text(dumps_str(message))
 
 
 manager = ConnectionManager()
@@ -0,0 +1,84 @@
+"""
+Startup profile mode: report import time per module for the API.
+
+Run with: python -m app.startup_profile [--module app.main] [--top 25] [--group]
+
+Imports the target module in a fresh interpreter with ``-X importtime`` and
+prints the slowest modules by cumulative (or self) time. ``--group`` sums
+self time per top-level package, which is handy for spotting heavy
+third-party dependencies that should be loaded lazily.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+
+def profile_imports(module: str) -> Tuple[List[Tuple[str, int, int]], float]:
+    """
+    Import ``module`` in a subprocess with -X importtime.
+    Returns ([(module, self_us, cumulative_us)], wall_seconds).
+    """
+    env = dict(os.environ)
+    code = (
+        "import time, importlib; _t = time.perf_counter(); "
+        f"importlib.import_module({module!r}); "
+        "print(time.perf_counter() - _t)"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, self_us, cumulative_us, name = [part.strip() for part in line.replace("import time:", "|", 1).split("|")]
+            rows.append((name, int(self_us), int(cumulative_us)))
+        except ValueError:
+            continue
+    wall = float(proc.stdout.strip().splitlines()[-1])
+    return rows, wall
+
+
+def group_by_package(rows: List[Tuple[str, int, int]]) -> Dict[str, int]:
+    totals: Dict[str, int] = defaultdict(int)
+    for name, self_us, _ in rows:
+        totals[name.split(".")[0]] += self_us
+    return dict(totals)
+
+
+def main(argv=None) -> None:
+    parser = argparse.ArgumentParser(description="Report import time per module")
+    parser.add_argument("--module", default="app.main", help="Module to import (default: app.main)")
+    parser.add_argument("--top", type=int, default=25, help="Number of rows to show")
+    parser.add_argument("--self", dest="by_self", action="store_true", help="Sort by self time instead of cumulative")
+    parser.add_argument("--group", action="store_true", help="Sum self time per top-level package")
+    args = parser.parse_args(argv)
+
+    rows, wall = profile_imports(args.module)
+    print(f"Imported {args.module} in {wall * 1000:.1f} ms ({len(rows)} modules)\n")
+
+    if args.group:
+        totals = sorted(group_by_package(rows).items(), key=lambda item: item[1], reverse=True)
+        print(f"{'self ms':>10}  package")
+        for name, self_us in totals[: args.top]:
+            print(f"{self_us / 1000:10.1f}  {name}")
+        return
+
+    key = (lambda row: row[1]) if args.by_self else (lambda row: row[2])
+    print(f"{'self ms':>10} {'cumul ms':>10}  module")
+    for name, self_us, cumulative_us in sorted(rows, key=key, reverse=True)[: args.top]:
+        print(f"{self_us / 1000:10.1f} {cumulative_us / 1000:10.1f}  {name}")
+
+
+if __name__ == "__main__":
+    main()
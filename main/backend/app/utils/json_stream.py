@@ -0,0 +1,164 @@
+"""
+Incremental parsing of a JSON object that arrives in text chunks.
+
+Used to stream structured LLM output: each object field (down to
+``max_depth`` keys) is reported as soon as its value is complete, and string
+values are reported while they are still growing, so a UI can render
+sections progressively instead of waiting for the whole object.
+"""
+import json
+import re
+from typing import Any, List, Optional, Tuple
+
+# An unfinished unicode escape at the end of a partial string ("\u00")
+_INCOMPLETE_UNICODE = re.compile(r'\\u[0-9a-fA-F]{0,3}$')
+_WHITESPACE = " \t\r\n"
+
+Event = Tuple[str, Tuple[str, ...], Any]
+
+
+class _Frame:
+    __slots__ = ("kind", "path", "key", "expect", "value_start", "start")
+
+    def __init__(self, kind: str, path: Optional[Tuple[str, ...]], start: int):
+        self.kind = kind  # "object" or "array"
+        self.path = path  # None inside arrays (their elements are not reported)
+        self.key: Optional[str] = None
+        self.expect = "key" if kind == "object" else "value"
+        self.value_start: Optional[int] = None
+        self.start = start
+
+
+class JSONFieldStream:
+    """
+    Feed text chunks with ``feed``; each call returns new events:
+
+    - ``("partial", path, text)``: a string value is still arriving
+    - ``("field", path, value)``: a value is complete
+
+    ``path`` is the tuple of object keys from the root. Text before the root
+    object (such as a Markdown code fence) is ignored.
+    """
+
+    def __init__(self, max_depth: int = 2):
+        self.max_depth = max_depth
+        self.done = False
+        self._text = ""
+        self._pos = 0
+        self._stack: List[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self._last_partial: Optional[Tuple[Tuple[str, ...], str]] = None
+
+    @property
+    def text(self) -> str:
+        """All text fed so far."""
+        return self._text
+
+    def _reportable(self, frame: _Frame) -> Optional[Tuple[str, ...]]:
+        if frame.kind != "object" or frame.path is None or frame.key is None:
+            return None
+        path = frame.path + (frame.key,)
+        return path if len(path) <= self.max_depth else None
+
+    def _complete(self, frame: _Frame, start: int, end: int, events: List[Event]) -> None:
+        path = self._reportable(frame)
+        if path is not None:
+            try:
+                events.append(("field", path, json.loads(self._text[start:end])))
+            except ValueError:
+                pass
+        frame.value_start = None
+        frame.expect = "comma"
+
+    def _finish_primitive(self, frame: _Frame, end: int, events: List[Event]) -> None:
+        if frame.value_start is not None and frame.expect == "value":
+            self._complete(frame, frame.value_start, end, events)
+
+    def feed(self, chunk: str) -> List[Event]:
+        """Consume a chunk of text and return the events it completes."""
+        events: List[Event] = []
+        if self.done or not chunk:
+            return events
+        self._text += chunk
+        text = self._text
+        stack = self._stack
+
+        i = self._pos
+        while i < len(text) and not self.done:
+            c = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    top = stack[-1]
+                    if self._string_is_key:
+                        top.key = json.loads(text[self._string_start:i + 1])
+                        top.expect = "colon"
+                    elif top.kind == "object":
+                        self._complete(top, self._string_start, i + 1, events)
+                i += 1
+                continue
+
+            if not stack:
+                if c == "{":
+                    stack.append(_Frame("object", (), i))
+                i += 1
+                continue
+
+            top = stack[-1]
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+                self._string_is_key = top.kind == "object" and top.expect == "key"
+            elif c in "{[":
+                if top.kind == "object":
+                    path = top.path + (top.key,) if top.path is not None else None
+                else:
+                    path = None
+                stack.append(_Frame("object" if c == "{" else "array", path, i))
+            elif c in "}]":
+                self._finish_primitive(top, i, events)
+                frame = stack.pop()
+                if not stack:
+                    self.done = True
+                elif stack[-1].kind == "object":
+                    self._complete(stack[-1], frame.start, i + 1, events)
+            elif c == ":":
+                top.expect = "value"
+                top.value_start = None
+            elif c == ",":
+                self._finish_primitive(top, i, events)
+                if top.kind == "object":
+                    top.expect = "key"
+            elif c not in _WHITESPACE and top.expect == "value" and top.value_start is None:
+                top.value_start = i
+            i += 1
+        self._pos = i
+
+        partial = self._partial_string()
+        if partial is not None and partial != self._last_partial:
+            self._last_partial = partial
+            events.append(("partial", partial[0], partial[1]))
+        return events
+
+    def _partial_string(self) -> Optional[Tuple[Tuple[str, ...], str]]:
+        if not self._in_string or self._string_is_key or not self._stack:
+            return None
+        path = self._reportable(self._stack[-1])
+        if path is None:
+            return None
+        raw = self._text[self._string_start + 1:]
+        if self._escape:
+            raw = raw[:-1]
+        for candidate in (raw, _INCOMPLETE_UNICODE.sub("", raw)):
+            try:
+                return path, json.loads('"' + candidate + '"')
+            except ValueError:
+                continue
+        return None
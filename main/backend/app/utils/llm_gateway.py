@@ -0,0 +1,560 @@
+"""
+Rate limiting and retry for every LLM request the backend makes.
+
+All chat completions go through one ``LLMGateway`` (see
+``app.utils.openai_client.chat_completion``), which:
+
+- spends from two token buckets, requests per minute and tokens per minute,
+  before sending (the token cost is estimated up front and corrected from the
+  reported usage afterwards);
+- caps in-flight requests with an AIMD window: the limit grows by roughly one
+  per window of successful requests and halves on a 429, so it settles just
+  below the provider's real limit without having to be tuned;
+- retries 429s, timeouts and 5xx responses, honouring ``Retry-After`` with
+  added jitter. A 429 also pauses every other caller until the retry time;
+- admits queued requests by lane: ``interactive`` (a user is waiting on the
+  reply) always goes first and keeps ``LLM_INTERACTIVE_RESERVED`` slots of
+  the window, and ``LLM_INTERACTIVE_RATE_RESERVED`` of the request and token
+  budgets, that ``batch`` work (matcher runs) cannot take. The window never
+  shrinks below the reserved slots plus one, so batch work always keeps a
+  slot of its own. Within the batch
+  lane, users get equal shares of token throughput by weighted fair queuing
+  (each request weighted by its estimated tokens);
+- hedges slow requests: once enough latencies have been seen for a kind of
+  request, a duplicate is sent if the first has not answered by the p95
+  latency (and capacity is spare), and the first response wins;
+- trips a circuit breaker after consecutive outage errors (5xx, timeouts,
+  connection failures), failing calls fast with ``LLMUnavailableError`` so
+  agents can answer from their deterministic fallbacks until a probe
+  request succeeds.
+"""
+import asyncio
+import heapq
+import random
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, Tuple, TypeVar
+
+from app.config import settings
+
+T = TypeVar("T")
+
+# Lanes in priority order
+INTERACTIVE = "interactive"
+BATCH = "batch"
+LANES = (INTERACTIVE, BATCH)
+
+
+class TokenBucket:
+    """Continuously refilled budget of ``rate_per_minute`` units."""
+
+    def __init__(self, rate_per_minute: float):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay_for(self, amount: float) -> float:
+        """Seconds until ``amount`` is available (0 if it is now)."""
+        self._refill()
+        amount = min(amount, self.capacity)
+        if self.tokens >= amount:
+            return 0.0
+        return (amount - self.tokens) / self.rate
+
+    def take(self, amount: float) -> None:
+        """Spend ``amount``; the balance may go negative to record overuse."""
+        self._refill()
+        self.tokens -= amount
+
+
+class AIMDWindow:
+    """Concurrency limit with additive increase and multiplicative decrease."""
+
+    def __init__(self, initial: float, minimum: float = 1, maximum: float = 64):
+        self.limit = float(initial)
+        self.minimum = float(minimum)
+        self.maximum = float(maximum)
+        self.last_decrease = 0.0
+
+    def on_success(self) -> None:
+        self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_throttle(self, started: float) -> None:
+        # Requests already in flight when the limit was cut tell us nothing new
+        if started < self.last_decrease:
+            return
+        self.limit = max(self.minimum, self.limit / 2)
+        self.last_decrease = time.monotonic()
+
+
+class LLMUnavailableError(Exception):
+    """Raised without contacting the provider while the circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """Closed, open for ``reset_timeout`` seconds, then half-open for one probe."""
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probing = False
+        self._probe_started = 0.0
+
+    def before_call(self) -> None:
+        if self.state == "open":
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                raise LLMUnavailableError("LLM provider unavailable (circuit open)")
+            self.state = "half_open"
+        if self.state == "half_open":
+            # A probe that never reported back (cancelled) is replaced after a while
+            if self._probing and time.monotonic() - self._probe_started < self.reset_timeout:
+                raise LLMUnavailableError("LLM provider unavailable (waiting for probe request)")
+            self._probing = True
+            self._probe_started = time.monotonic()
+
+    def on_success(self) -> None:
+        self.state = "closed"
+        self.failures = 0
+        self._probing = False
+
+    def on_failure(self, outage: bool) -> None:
+        """Record a failed attempt; only outage errors count towards opening."""
+        if not outage:
+            # The provider answered, so a half-open probe may be retried
+            self._probing = False
+            return
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                print(f"LLM circuit opened after {self.failures} consecutive failures")
+            self.state = "open"
+            self.opened_at = time.monotonic()
+            self._probing = False
+
+
+def is_llm_unavailable(error: Exception) -> bool:
+    """Whether ``error`` means the provider is down (rather than a bad request or reply)."""
+    return isinstance(error, LLMUnavailableError) or (is_retryable(error) and not is_rate_limited(error))
+
+
+def _header_delay(error: Exception) -> Optional[float]:
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if not headers:
+        return None
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429
+
+
+def is_retryable(error: Exception) -> bool:
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status == 429 or status >= 500
+    try:
+        from openai import APIConnectionError
+    except ImportError:
+        return False
+    # Includes APITimeoutError
+    return isinstance(error, APIConnectionError)
+
+
+class _Waiter:
+    __slots__ = ("future", "lane", "user_id", "tokens", "enqueued")
+
+    def __init__(self, future: asyncio.Future, lane: str, user_id: Any, tokens: int):
+        self.future = future
+        self.lane = lane
+        self.user_id = user_id
+        self.tokens = tokens
+        self.enqueued = time.monotonic()
+
+
+class _LaneStats:
+    """Queue depth and admission wait times for one lane."""
+
+    def __init__(self):
+        self.queued = 0
+        self.in_flight = 0
+        self.admitted = 0
+        self.wait_avg = 0.0
+        self.wait_max = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        self.admitted += 1
+        # Exponentially weighted, so the figure follows current load
+        self.wait_avg = wait if self.admitted == 1 else 0.8 * self.wait_avg + 0.2 * wait
+        self.wait_max = max(self.wait_max, wait)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "queued": self.queued,
+            "in_flight": self.in_flight,
+            "admitted": self.admitted,
+            "wait_avg_ms": round(self.wait_avg * 1000, 1),
+            "wait_max_ms": round(self.wait_max * 1000, 1),
+        }
+
+
+class LLMGateway:
+    """Shared limiter for LLM requests (see the module docstring)."""
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None,
+        initial_concurrency: Optional[int] = None,
+        max_concurrency: Optional[int] = None,
+        max_retries: Optional[int] = None,
+        base_delay: Optional[float] = None,
+        max_delay: Optional[float] = None,
+        reserved_interactive: Optional[int] = None,
+        reserved_rate: Optional[float] = None,
+        hedge_min_samples: Optional[int] = None,
+        hedge_min_delay: Optional[float] = None,
+        breaker_failures: Optional[int] = None,
+        breaker_reset: Optional[float] = None,
+    ):
+        self.requests = TokenBucket(requests_per_minute or settings.LLM_REQUESTS_PER_MINUTE)
+        self.tokens = TokenBucket(tokens_per_minute or settings.LLM_TOKENS_PER_MINUTE)
+        self.reserved_interactive = (
+            settings.LLM_INTERACTIVE_RESERVED if reserved_interactive is None else reserved_interactive
+        )
+        self.reserved_rate = settings.LLM_INTERACTIVE_RATE_RESERVED if reserved_rate is None else reserved_rate
+        # Batch work is never admitted into the reserved slots, so a window
+        # shrunk to them would stall it with nothing left to grow the window
+        minimum = self.reserved_interactive + 1
+        self.window = AIMDWindow(
+            max(minimum, initial_concurrency or settings.LLM_INITIAL_CONCURRENCY),
+            minimum=minimum,
+            maximum=max(minimum, max_concurrency or settings.LLM_MAX_CONCURRENCY),
+        )
+        self.max_retries = settings.LLM_MAX_RETRIES if max_retries is None else max_retries
+        self.base_delay = settings.LLM_RETRY_BASE_DELAY if base_delay is None else base_delay
+        self.max_delay = max_delay or settings.LLM_RETRY_MAX_DELAY
+        self.hedge_min_samples = settings.LLM_HEDGE_MIN_SAMPLES if hedge_min_samples is None else hedge_min_samples
+        self.hedge_min_delay = settings.LLM_HEDGE_MIN_DELAY if hedge_min_delay is None else hedge_min_delay
+        self.breaker = CircuitBreaker(
+            breaker_failures or settings.LLM_BREAKER_FAILURES,
+            settings.LLM_BREAKER_RESET if breaker_reset is None else breaker_reset,
+        )
+        self.paused_until = 0.0
+        self.throttled = 0
+        self.retries = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._reset()
+
+    def _reset(self) -> None:
+        self.in_flight = 0
+        self.lanes = {lane: _LaneStats() for lane in LANES}
+        self._queues: Dict[str, List[Tuple[float, int, _Waiter]]] = {lane: [] for lane in LANES}
+        self._seq = 0
+        self._virtual_time = 0.0
+        self._user_finish: Dict[Any, float] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    def _check_loop(self) -> asyncio.AbstractEventLoop:
+        # Queues hold futures of one event loop; start afresh under a new one
+        # (the app's loop, or tests that run their own)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._reset()
+        return loop
+
+    def _enqueue(self, waiter: _Waiter) -> None:
+        self._seq += 1
+        if waiter.lane == BATCH:
+            # Weighted fair queuing: a user's requests are tagged with virtual
+            # finish times, so each user with queued work gets an equal share
+            # of tokens however many requests they have queued
+            start = max(self._virtual_time, self._user_finish.get(waiter.user_id, 0.0))
+            key = start + max(waiter.tokens, 1)
+            self._user_finish[waiter.user_id] = key
+        else:
+            key = float(self._seq)
+        heapq.heappush(self._queues[waiter.lane], (key, self._seq, waiter))
+        self.lanes[waiter.lane].queued += 1
+
+    def _lane_limit(self, lane: str) -> int:
+        limit = int(self.window.limit)
+        if lane == BATCH:
+            return max(0, limit - self.reserved_interactive)
+        return limit
+
+    def _rate_delay(self, lane: str, tokens: int) -> float:
+        """Seconds until the buckets can pay for a request; batch work leaves the reserved share unspent."""
+        reserve = self.reserved_rate if lane == BATCH else 0.0
+        return max(
+            self.requests.delay_for(1 + reserve * self.requests.capacity),
+            self.tokens.delay_for(tokens + reserve * self.tokens.capacity),
+        )
+
+    def _head(self) -> Optional[Tuple[str, float, _Waiter]]:
+        for lane in LANES:
+            queue = self._queues[lane]
+            while queue and queue[0][2].future.done():
+                # Cancelled while queued
+                heapq.heappop(queue)
+                self.lanes[lane].queued -= 1
+            if queue:
+                return lane, queue[0][0], queue[0][2]
+        return None
+
+    def _dispatch(self) -> None:
+        """Admit queued requests in lane and fair-share order while capacity allows."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        while True:
+            head = self._head()
+            if head is None:
+                self._user_finish.clear()
+                return
+            lane, key, waiter = head
+            lane_stats = self.lanes[lane]
+            if self.in_flight >= int(self.window.limit) or lane_stats.in_flight >= self._lane_limit(lane):
+                return  # woken again by a release
+            delay = max(self.paused_until - time.monotonic(), self._rate_delay(lane, waiter.tokens))
+            if delay > 0:
+                self._timer = self._loop.call_later(delay, self._dispatch)
+                return
+            heapq.heappop(self._queues[lane])
+            if lane == BATCH:
+                self._virtual_time = key
+            self.requests.take(1)
+            self.tokens.take(waiter.tokens)
+            self.in_flight += 1
+            lane_stats.queued -= 1
+            lane_stats.in_flight += 1
+            lane_stats.record_wait(time.monotonic() - waiter.enqueued)
+            waiter.future.set_result(None)
+
+    async def _acquire(self, estimated_tokens: int, lane: str, user_id: Any) -> None:
+        if lane not in LANES:
+            raise ValueError(f"Unknown LLM lane: {lane}")
+        loop = self._check_loop()
+        waiter = _Waiter(loop.create_future(), lane, user_id, estimated_tokens)
+        self._enqueue(waiter)
+        self._dispatch()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # Admitted just as the caller was cancelled
+                self._release(lane)
+            raise
+
+    def _release(self, lane: str) -> None:
+        self.in_flight -= 1
+        self.lanes[lane].in_flight -= 1
+        self._dispatch()
+
+    def _retry_delay(self, error: Exception, attempt: int, started: float) -> Optional[float]:
+        """
+        Record a failed attempt; returns seconds to wait before retrying
+        ``error``, or None to give up.
+        """
+        if isinstance(error, LLMUnavailableError):
+            return None
+        self.breaker.on_failure(is_llm_unavailable(error))
+        if attempt >= self.max_retries or not is_retryable(error) or self.breaker.state == "open":
+            return None
+        backoff = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = _header_delay(error)
+        if delay is None:
+            # Full jitter
+            delay = random.uniform(0, backoff)
+        else:
+            delay = min(self.max_delay, delay) + random.uniform(0, self.base_delay)
+        if is_rate_limited(error):
+            self.throttled += 1
+            self.window.on_throttle(started)
+            self.paused_until = max(self.paused_until, time.monotonic() + delay)
+        self.retries += 1
+        return delay
+
+    def _record_usage(self, response: Any, estimated_tokens: int) -> None:
+        usage = getattr(response, "usage", None)
+        total = getattr(usage, "total_tokens", None)
+        if isinstance(total, int):
+            self.tokens.take(total - estimated_tokens)
+
+    @asynccontextmanager
+    async def _slot(self, estimated_tokens: int, lane: str, user_id: Any):
+        """Hold a request slot for the body of the block."""
+        await self._acquire(estimated_tokens, lane, user_id)
+        try:
+            yield
+        finally:
+            self._release(lane)
+
+    def _record_latency(self, hedge_key: Optional[str], latency: float) -> None:
+        if hedge_key is not None:
+            self._latencies.setdefault(hedge_key, deque(maxlen=200)).append(latency)
+
+    def _hedge_delay(self, hedge_key: Optional[str]) -> Optional[float]:
+        """p95 latency of ``hedge_key`` requests, once enough have been seen."""
+        samples = self._latencies.get(hedge_key) if hedge_key is not None else None
+        if not samples or len(samples) < self.hedge_min_samples:
+            return None
+        ordered = sorted(samples)
+        return max(self.hedge_min_delay, ordered[int(0.95 * (len(ordered) - 1))])
+
+    def _has_spare_capacity(self, lane: str) -> bool:
+        # Hedges are extra load; never let them queue ahead of real requests
+        return (
+            self.in_flight < int(self.window.limit)
+            and self.lanes[lane].in_flight < self._lane_limit(lane)
+            and not any(self._queues[name] for name in LANES)
+        )
+
+    async def call(
+        self,
+        send: Callable[[], Awaitable[T]],
+        estimated_tokens: int = 0,
+        lane: str = INTERACTIVE,
+        user_id: Any = None,
+        hedge_key: Optional[str] = None,
+    ) -> T:
+        """
+        Run ``send()`` within the limits, retrying retryable failures.
+        ``lane`` is ``"interactive"`` (someone is waiting on the reply) or
+        ``"batch"``, where ``user_id`` is the fair-share key. Requests with a
+        ``hedge_key`` (requests of similar size share one) are hedged at that
+        key's p95 latency.
+        """
+        delay = self._hedge_delay(hedge_key)
+        run = lambda: self._call_with_retries(send, estimated_tokens, lane, user_id, hedge_key)
+        if delay is None:
+            return await run()
+
+        primary = asyncio.ensure_future(run())
+        tasks = [primary]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done or not self._has_spare_capacity(lane):
+                return await primary
+            self.hedged += 1
+            tasks.append(asyncio.ensure_future(run()))
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is not primary:
+                            self.hedge_wins += 1
+                        return task.result()
+                    if error is None or task is primary:
+                        error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def _call_with_retries(
+        self,
+        send: Callable[[], Awaitable[T]],
+        estimated_tokens: int,
+        lane: str,
+        user_id: Any,
+        hedge_key: Optional[str],
+    ) -> T:
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            try:
+                self.breaker.before_call()
+                async with self._slot(estimated_tokens, lane, user_id):
+                    sent = time.monotonic()
+                    response = await send()
+                    latency = time.monotonic() - sent
+            except Exception as e:
+                delay = self._retry_delay(e, attempt, started)
+                if delay is None:
+                    raise
+                print(f"LLM request failed ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            self.window.on_success()
+            self.breaker.on_success()
+            self._record_latency(hedge_key, latency)
+            self._record_usage(response, estimated_tokens)
+            return response
+
+    async def stream(
+        self,
+        open_stream: Callable[[], Awaitable[AsyncIterator[T]]],
+        estimated_tokens: int = 0,
+        lane: str = INTERACTIVE,
+        user_id: Any = None,
+    ) -> AsyncIterator[T]:
+        """
+        Like ``call`` for a streamed response: the slot is held until the
+        stream is consumed. Only opening the stream is retried, since a
+        partly delivered stream cannot be replayed, and streams are not hedged.
+        """
+        attempt = 0
+        while True:
+            started = time.monotonic()
+            self.breaker.before_call()
+            await self._acquire(estimated_tokens, lane, user_id)
+            try:
+                stream = await open_stream()
+            except Exception as e:
+                self._release(lane)
+                delay = self._retry_delay(e, attempt, started)
+                if delay is None:
+                    raise
+                print(f"LLM stream failed to open ({type(e).__name__}), retry {attempt + 1} in {delay:.1f}s")
+                attempt += 1
+                await asyncio.sleep(delay)
+                continue
+            try:
+                async for item in stream:
+                    yield item
+                self.window.on_success()
+                self.breaker.on_success()
+            finally:
+                self._release(lane)
+            return
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "concurrency_limit": round(self.window.limit, 2),
+            "in_flight": self.in_flight,
+            "throttled": self.throttled,
+            "retries": self.retries,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "circuit": self.breaker.state,
+            "lanes": {lane: lane_stats.to_dict() for lane, lane_stats in self.lanes.items()},
+        }
+
+
+llm_gateway = LLMGateway()
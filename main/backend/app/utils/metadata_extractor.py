@@ -6,8 +6,6 @@ import re
 from pathlib import Path
 from typing import Dict, Any, Optional, List
 from datetime import datetime
-from PyPDF2 import PdfReader
-from docx import Document
 import json
 
 
@@ -98,6 +96,7 @@ class MetadataExtractor:
         Returns: (text, has_selectable_text, page_count)
         """
         try:
+            from PyPDF2 import PdfReader
             reader = PdfReader(path)
             page_count = len(reader.pages)
             pages = []
@@ -121,6 +120,7 @@ class MetadataExtractor:
         Returns: (text, paragraph_count)
         """
         try:
+            from docx import Document
             doc = Document(path)
             paragraphs = [p.text for p in doc.paragraphs if p.text.strip()]
             text = "\n".join(paragraphs)
@@ -1,41 +1,155 @@
 """
 Global OpenAI client configuration with SSL settings
+
+Clients are created lazily (or by the app lifespan at startup) rather than at
+import time, so importing the API does not pull in the OpenAI SDK.
+
+Agents call ``chat_completion`` / ``stream_chat_completion``, which send every
+request through the shared ``llm_gateway`` (rate limits, adaptive concurrency
+and 429 retries). Identical concurrent ``chat_completion`` requests share one
+upstream call (``llm_single_flight``).
 """
-import httpx
-from openai import OpenAI, AsyncOpenAI
+from typing import TYPE_CHECKING, Any, AsyncIterator, Dict, Optional
 from app.config import settings
+from app.utils.llm_gateway import INTERACTIVE, llm_gateway
+from app.utils.single_flight import SingleFlight, request_key
+from app.utils.token_counter import count_tokens
+
+if TYPE_CHECKING:
+    from openai import OpenAI, AsyncOpenAI
+
+
+# Assumed completion size for requests without max_tokens
+_DEFAULT_COMPLETION_TOKENS = 1000
 
+# Shares identical in-flight requests; with LLM_RESULT_CACHE_TTL set, also
+# serves repeats of recent requests
+llm_single_flight = SingleFlight(settings.LLM_RESULT_CACHE_TTL, settings.LLM_RESULT_CACHE_SIZE)
 
-def create_openai_client() -> OpenAI:
+_openai_client: Optional["OpenAI"] = None
+_async_openai_client: Optional["AsyncOpenAI"] = None
+
+
+def create_openai_client() -> "OpenAI":
     """
     Create OpenAI client with global SSL configuration
     """
+    import httpx
+    from openai import OpenAI
+
     http_client = httpx.Client(
         verify=settings.SSL_VERIFY,
         timeout=settings.HTTP_TIMEOUT
     )
-    
+
     return OpenAI(
         api_key=settings.OPENAI_API_KEY,
         http_client=http_client
     )
 
 
-def create_async_openai_client() -> AsyncOpenAI:
+def create_async_openai_client() -> "AsyncOpenAI":
     """
-    Create AsyncOpenAI client with global SSL configuration
+    Create AsyncOpenAI client with global SSL configuration.
+    SDK retries are disabled: the gateway retries with shared backoff.
     """
+    import httpx
+    from openai import AsyncOpenAI
+
     http_client = httpx.AsyncClient(
         verify=settings.SSL_VERIFY,
         timeout=settings.HTTP_TIMEOUT
     )
-    
+
     return AsyncOpenAI(
         api_key=settings.OPENAI_API_KEY,
-        http_client=http_client
+        http_client=http_client,
+        max_retries=0
+    )
+
+
+def get_openai_client() -> "OpenAI":
+    """Shared OpenAI client, created on first use"""
+    global _openai_client
+    if _openai_client is None:
+        _openai_client = create_openai_client()
+    return _openai_client
+
+
+def get_async_openai_client() -> "AsyncOpenAI":
+    """Shared AsyncOpenAI client, created on first use"""
+    global _async_openai_client
+    if _async_openai_client is None:
+        _async_openai_client = create_async_openai_client()
+    return _async_openai_client
+
+
+def init_openai_clients() -> None:
+    """Create the shared clients up front (called from the app lifespan)"""
+    if settings.OPENAI_API_KEY:
+        get_openai_client()
+        get_async_openai_client()
+
+
+async def close_openai_clients() -> None:
+    """Close the shared clients' HTTP connection pools"""
+    global _openai_client, _async_openai_client
+    if _openai_client is not None:
+        _openai_client.close()
+        _openai_client = None
+    if _async_openai_client is not None:
+        await _async_openai_client.close()
+        _async_openai_client = None
+
+
+def estimate_request_tokens(params: Dict[str, Any]) -> int:
+    """Tokens a chat completion may use: the prompt plus the completion limit"""
+    prompt = sum(count_tokens(str(m.get("content") or "")) + 4 for m in params.get("messages", []))
+    return prompt + (params.get("max_tokens") or _DEFAULT_COMPLETION_TOKENS)
+
+
+async def chat_completion(*, lane: str = INTERACTIVE, user_id: Any = None, **params: Any) -> Any:
+    """
+    Chat completion sent through the shared LLM gateway. Background work
+    passes ``lane="batch"`` and the requesting ``user_id``.
+    
+    Concurrent calls with the same model, messages and parameters share one
+    request (queued in the lane of the first caller).
+    """
+    client = get_async_openai_client()
+    return await llm_single_flight.do(
+        request_key(params),
+        lambda: llm_gateway.call(
+            lambda: client.chat.completions.create(**params),
+            estimate_request_tokens(params),
+            lane=lane,
+            user_id=user_id,
+            # Latency depends mostly on the model and completion size
+            hedge_key=f"{params.get('model')}:{params.get('max_tokens')}"
+        )
+    )
+
+
+async def stream_chat_completion(
+    *, lane: str = INTERACTIVE, user_id: Any = None, **params: Any
+) -> AsyncIterator[str]:
+    """Yield the text deltas of a streamed chat completion as they arrive"""
+    client = get_async_openai_client()
+    stream = llm_gateway.stream(
+        lambda: client.chat.completions.create(stream=True, **params),
+        estimate_request_tokens(params),
+        lane=lane,
+        user_id=user_id
     )
+    async for chunk in stream:
+        if chunk.choices and chunk.choices[0].delta.content:
+            yield chunk.choices[0].delta.content
 
 
-# Global instances
-openai_client = create_openai_client()
-async_openai_client = create_async_openai_client()
\ No newline at end of file
+def __getattr__(name: str):
+    # Backwards compatibility for the former module-level globals
+    if name == "openai_client":
+        return get_openai_client()
+    if name == "async_openai_client":
+        return get_async_openai_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
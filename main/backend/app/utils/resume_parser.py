@@ -4,8 +4,6 @@ Lightweight resume parsing utility with comprehensive metadata extraction.
 import re
 from pathlib import Path
 from typing import Tuple, Dict, Any
-from PyPDF2 import PdfReader
-from docx import Document
 from app.utils.pii_protector import protect_pii_from_text, protect_pii_profile
 from app.utils.metadata_extractor import MetadataExtractor
 
@@ -13,10 +11,12 @@ from app.utils.metadata_extractor import MetadataExtractor
 def extract_text(path: Path) -> str:
     suffix = path.suffix.lower()
     if suffix == ".pdf":
+        from PyPDF2 import PdfReader
         reader = PdfReader(path)
         pages = [page.extract_text() or "" for page in reader.pages]
         return "\n".join(pages)
     if suffix == ".docx":
+        from docx import Document
         doc = Document(path)
         return "\n".join([p.text for p in doc.paragraphs])
     if suffix == ".doc":
@@ -0,0 +1,112 @@
+"""
+Single-flight deduplication of identical concurrent calls.
+
+Callers that ask for the same key while a call is in flight await that call
+and share its result instead of starting their own. Optionally, results are
+also kept for ``ttl`` seconds so identical requests shortly afterwards are
+served from memory.
+"""
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+def request_key(params: Dict[str, Any]) -> str:
+    """
+    Stable hash of request parameters. Key order and surrounding whitespace in
+    string values do not change the key.
+    """
+    def normalize(value: Any) -> Any:
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, dict):
+            return {str(k): normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+
+    payload = json.dumps(normalize(params), sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Shares one in-flight call (and optionally its recent result) per key."""
+
+    def __init__(self, ttl: float = 0, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._flights: Dict[str, _Flight] = {}
+        self._results: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.calls = 0
+        self.shared = 0
+        self.cache_hits = 0
+
+    def _cached(self, key: str) -> Tuple[bool, Any]:
+        entry = self._results.get(key)
+        if entry is None:
+            return False, None
+        expires_at, result = entry
+        if expires_at < time.monotonic():
+            del self._results[key]
+            return False, None
+        self._results.move_to_end(key)
+        return True, result
+
+    def _store(self, key: str, result: Any) -> None:
+        if self.ttl <= 0:
+            return
+        self._results[key] = (time.monotonic() + self.ttl, result)
+        self._results.move_to_end(key)
+        while len(self._results) > self.max_entries:
+            self._results.popitem(last=False)
+
+    async def do(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        """Result of ``call()``, shared with every concurrent caller for ``key``."""
+        hit, result = self._cached(key)
+        if hit:
+            self.cache_hits += 1
+            return result
+
+        flight = self._flights.get(key)
+        if flight is None:
+            self.calls += 1
+            flight = _Flight(asyncio.ensure_future(call()))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda task: self._finished(key, flight, task))
+        else:
+            self.shared += 1
+
+        flight.waiters += 1
+        try:
+            # Shielded: one caller giving up must not cancel the others' result
+            return await asyncio.shield(flight.task)
+        finally:
+            flight.waiters -= 1
+            if flight.waiters == 0 and not flight.task.done():
+                # Nobody is waiting any more
+                flight.task.cancel()
+
+    def _finished(self, key: str, flight: _Flight, task: asyncio.Task) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not task.cancelled() and task.exception() is None:
+            self._store(key, task.result())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "upstream_calls": self.calls,
+            "shared": self.shared,
+            "cache_hits": self.cache_hits,
+            "in_flight": len(self._flights),
+        }
@@ -0,0 +1,72 @@
+"""
+Token counting for LLM prompts.
+
+Uses tiktoken when its encoding can be loaded. tiktoken downloads encoding
+files on first use, so when it is not installed or the download fails the
+counter falls back to a character estimate (about four characters per token),
+which is close enough for budgeting. The server loads the encoding at startup
+with ``load_encoding`` so the download never runs on the event loop.
+"""
+import asyncio
+from typing import Any, Optional
+
+from app.config import settings
+
+_TRUNCATION_MARKER = " ...[truncated]"
+
+_encoding: Optional[Any] = None
+_encoding_loaded = False
+
+
+def get_encoding() -> Optional[Any]:
+    """The tiktoken encoding, or None if it is unavailable (loaded once)."""
+    global _encoding, _encoding_loaded
+    if not _encoding_loaded:
+        _encoding_loaded = True
+        try:
+            import tiktoken
+            _encoding = tiktoken.get_encoding(settings.TOKENIZER_ENCODING)
+        except Exception as e:
+            print(f"tiktoken unavailable, estimating token counts: {type(e).__name__}: {e}")
+            _encoding = None
+    return _encoding
+
+
+async def load_encoding(timeout: Optional[float] = None) -> Optional[Any]:
+    """
+    Load the encoding in a thread, waiting at most ``timeout`` seconds. Counts
+    use the estimate until the load finishes, even if that is after the timeout.
+    """
+    timeout = settings.TOKENIZER_LOAD_TIMEOUT if timeout is None else timeout
+    try:
+        return await asyncio.wait_for(asyncio.to_thread(get_encoding), timeout)
+    except asyncio.TimeoutError:
+        print(f"tiktoken encoding not loaded after {timeout}s, estimating token counts meanwhile")
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Number of tokens in ``text``."""
+    if not text:
+        return 0
+    encoding = get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    """``text`` cut to at most ``max_tokens`` tokens, marked when shortened."""
+    if max_tokens <= 0 or not text:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    keep = max_tokens - count_tokens(_TRUNCATION_MARKER)
+    if keep <= 0:
+        return ""
+    encoding = get_encoding()
+    if encoding is not None:
+        head = encoding.decode(encoding.encode(text, disallowed_special=())[:keep])
+    else:
+        head = text[:(keep - 1) * 4]
+    return head.rstrip() + _TRUNCATION_MARKER
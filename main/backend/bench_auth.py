@@ -0,0 +1,62 @@
+"""
+Per-request micro-benchmark for authentication + permission checks.
+
+Compares the cold path (JWT decode + user SELECT + permission resolution)
+with the warm path served from the token/user caches.
+
+Run with: python bench_auth.py [iterations]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+_tmpdir = tempfile.mkdtemp()
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_tmpdir}/bench.db"
+os.environ["DEBUG"] = "False"
+
+from app.core.auth import create_access_token, get_current_user, clear_auth_caches  # noqa: E402
+from app.core.permissions import has_permission  # noqa: E402
+from app.db.base import Base, User  # noqa: E402
+from app.db.session import engine, AsyncSessionLocal  # noqa: E402
+
+
+async def _setup():
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with AsyncSessionLocal() as session:
+        session.add(User(email="bench@talent.com", hashed_password="x", full_name="Bench", role="hr"))
+        await session.commit()
+
+
+async def _one_request(token: str) -> None:
+    async with AsyncSessionLocal() as db:
+        user = await get_current_user(token=token, db=db)
+        assert has_permission(user, "docs.manage")
+
+
+async def main(iterations: int):
+    await _setup()
+    token = create_access_token({"sub": "bench@talent.com"})
+
+    start = time.perf_counter()
+    for _ in range(iterations):
+        clear_auth_caches()
+        await _one_request(token)
+    cold = (time.perf_counter() - start) / iterations
+
+    clear_auth_caches()
+    await _one_request(token)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        await _one_request(token)
+    warm = (time.perf_counter() - start) / iterations
+
+    print(f"auth + permission, cold (decode + SELECT): {cold * 1e6:8.1f} us/request")
+    print(f"auth + permission, warm (cached):          {warm * 1e6:8.1f} us/request")
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 2000))
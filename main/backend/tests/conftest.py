@@ -0,0 +1,38 @@
+"""
+Shared test fixtures.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
+
+from app.db.base import Base
+
+
+@pytest.fixture
+def session_factory(tmp_path):
+    """Session factory for a fresh SQLite database with the full schema."""
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    async def setup():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        return async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+
+    factory = asyncio.run(setup())
+    yield factory
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def seed():
+    """``seed(factory, *rows)`` inserts and commits rows (for modules that extend ``session_factory``)."""
+    def insert(factory, *rows):
+        async def run():
+            async with factory() as session:
+                session.add_all(rows)
+                await session.commit()
+
+        asyncio.run(run())
+
+    return insert
@@ -0,0 +1,125 @@
+"""
+Unit tests for the auth token/user caches.
+"""
+import asyncio
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import select
+
+from app.core import auth
+from app.core.auth import create_access_token, invalidate_user, clear_auth_caches, _verify_token
+from app.core.cache import TTLCache
+from app.models.user import User
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestTTLCache:
+    """Test the bounded TTL cache."""
+
+    def test_entries_expire(self):
+        clock = FakeClock()
+        cache = TTLCache(maxsize=10, ttl=5, timer=clock)
+        cache.set("a", 1)
+        clock.now = 4.9
+        assert cache.get("a") == 1
+        clock.now = 5.0
+        assert cache.get("a") is None
+
+    def test_lru_eviction(self):
+        cache = TTLCache(maxsize=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert "a" in cache
+        assert "b" not in cache
+
+
+class TestTokenCache:
+    """Test verified-token caching and invalidation."""
+
+    def setup_method(self):
+        clear_auth_caches()
+
+    def test_token_decoded_once(self, monkeypatch):
+        token = create_access_token({"sub": "hr@talent.com"})
+        calls = []
+        real_decode = auth.jwt.decode
+        monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: calls.append(1) or real_decode(*a, **kw))
+
+        assert _verify_token(token) == "hr@talent.com"
+        assert _verify_token(token) == "hr@talent.com"
+        assert len(calls) == 1
+
+    def test_expired_token_not_cached(self):
+        token = create_access_token({"sub": "hr@talent.com"}, expires_delta=timedelta(seconds=-1))
+        assert _verify_token(token) is None
+        assert len(auth._token_cache) == 0
+
+    def test_invalid_token_rejected(self):
+        assert _verify_token("not-a-jwt") is None
+
+    def test_invalidate_user_drops_tokens(self):
+        token = create_access_token({"sub": "hr@talent.com"})
+        other = create_access_token({"sub": "manager@talent.com"})
+        _verify_token(token)
+        _verify_token(other)
+        invalidate_user("hr@talent.com")
+        assert dict(auth._token_cache.items()) == {auth._token_key(other): "manager@talent.com"}
+
+
+@pytest.fixture
+def session_factory(session_factory, seed):
+    seed(session_factory, User(
+        id=1, email="hr@talent.com", hashed_password="x", full_name="HR", role="hr",
+    ))
+    return session_factory
+
+
+class TestUserChangeInvalidation:
+    """Test that user changes drop cached auth state once they commit."""
+
+    def setup_method(self):
+        clear_auth_caches()
+
+    def _change(self, session_factory, commit, **values):
+        seen = {}
+
+        async def run():
+            async with session_factory() as session:
+                user = (await session.execute(select(User).where(User.id == 1))).scalar_one()
+                for name, value in values.items():
+                    setattr(user, name, value)
+                await session.flush()
+                seen["after_flush"] = "hr@talent.com" in auth._user_cache
+                if commit:
+                    await session.commit()
+                else:
+                    await session.rollback()
+
+        asyncio.run(run())
+        return seen["after_flush"]
+
+    def test_cache_is_kept_until_commit(self, session_factory):
+        auth._user_cache.set("hr@talent.com", User(email="hr@talent.com"))
+        assert self._change(session_factory, commit=True, is_active=False)
+        assert "hr@talent.com" not in auth._user_cache
+
+    def test_old_and_new_email_are_invalidated(self, session_factory):
+        auth._user_cache.set("hr@talent.com", User(email="hr@talent.com"))
+        auth._user_cache.set("people@talent.com", User(email="people@talent.com"))
+        self._change(session_factory, commit=True, email="people@talent.com")
+        assert len(auth._user_cache) == 0
+
+    def test_rolled_back_change_keeps_cache(self, session_factory):
+        auth._user_cache.set("hr@talent.com", User(email="hr@talent.com"))
+        self._change(session_factory, commit=False, role="recruiter")
+        assert "hr@talent.com" in auth._user_cache
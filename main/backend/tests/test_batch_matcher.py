@@ -0,0 +1,160 @@
+"""
+Unit tests for offline batch evaluation of matcher runs.
+"""
+import asyncio
+import json
+
+from sqlalchemy import select
+
+from app.models.matcher import CandidateProfile, MatchResult, MatchRun, ResumeUpload
+from app.services.ai.batch_matcher import (
+    BatchTransport,
+    LocalBatchTransport,
+    build_batch_jsonl,
+    parse_batch_output,
+    poll_batch_run,
+    submit_batch_run,
+)
+
+
+def _completion(content):
+    return {"choices": [{"message": {"role": "assistant", "content": content}}]}
+
+
+def _verdict(score):
+    return {"match_percentage": score, "recommendation": "interview", "strengths": ["APIs"], "gaps": ["Go"],
+            "technical_alignment": "Strong Python."}
+
+
+async def _submit(db, transport, candidates):
+    """Submit a run for ``(name, skill)`` candidates."""
+    match_run = MatchRun(job_title="Backend", job_description="Python backend engineer", status="preparing")
+    db.add(match_run)
+    profiles = []
+    for name, skill in candidates:
+        upload = ResumeUpload(original_filename=f"{name}.txt", stored_path="", status="completed")
+        db.add(upload)
+        await db.flush()
+        profile = CandidateProfile(upload_id=upload.id, full_name=name, skills=[skill], raw_text=skill)
+        db.add(profile)
+        await db.flush()
+        protected = {"name": "[NAME]", "raw_text": f"Skills\n{skill}", "skills": [skill]}
+        profiles.append((profile, protected, {}))
+    return await submit_batch_run(db, match_run, profiles, transport=transport)
+
+
+class _PartialOutputTransport(BatchTransport):
+    """Completed batch whose output only covers the first submitted request."""
+
+    def __init__(self):
+        self.first_id = None
+
+    async def submit(self, content):
+        self.first_id = json.loads(content.decode().splitlines()[0])["custom_id"]
+        return "batch_partial"
+
+    async def status(self, batch_id):
+        return "completed"
+
+    async def results(self, batch_id):
+        return (json.dumps({
+            "custom_id": self.first_id,
+            "response": {"status_code": 200, "body": _completion(json.dumps(_verdict(75)))},
+        }) + "\n").encode()
+
+
+class TestBatchFormat:
+    """Test the Batch API input and output formats."""
+
+    def test_jsonl_lines_and_output_parsing(self):
+        content = build_batch_jsonl([("candidate-1", {"model": "m", "messages": []})])
+        line = json.loads(content.decode().splitlines()[0])
+        assert line == {"custom_id": "candidate-1", "method": "POST", "url": "/v1/chat/completions",
+                        "body": {"model": "m", "messages": []}}
+
+        output = "\n".join(json.dumps(item) for item in [
+            {"custom_id": "candidate-1", "response": {"status_code": 200, "body": _completion(json.dumps(_verdict(70)))}},
+            {"custom_id": "candidate-2", "response": {"status_code": 200, "body": _completion("not json")}},
+            {"custom_id": "candidate-3", "response": None, "error": {"code": "x", "message": "boom"}},
+        ]).encode()
+        outcomes = parse_batch_output(output)
+        assert outcomes["candidate-1"]["match_percentage"] == 70
+        assert outcomes["candidate-2"] == "malformed evaluation"
+        assert outcomes["candidate-3"] == "boom"
+
+
+class TestBatchRun:
+    """Test submitting a run and ingesting results with the local transport."""
+
+    def test_submit_poll_and_ingest(self, session_factory):
+        bodies = []
+
+        async def responder(body):
+            bodies.append(body)
+            prompt = body["messages"][0]["content"]
+            if '["Rust"]' in prompt:
+                raise RuntimeError("model error")
+            return _completion(json.dumps(_verdict(80 if '["Python"]' in prompt else 40)))
+
+        transport = LocalBatchTransport(responder)
+
+        async def run():
+            async with session_factory() as db:
+                match_run = await _submit(db, transport, (("Ann", "Python"), ("Bob", "Java"), ("Cy", "Rust")))
+                assert match_run.status == "submitted" and match_run.batch_id
+                assert await poll_batch_run(db, match_run, transport=transport)
+
+                rows = (await db.execute(
+                    select(CandidateProfile.full_name, MatchResult.score, MatchResult.matched_skills)
+                    .join(MatchResult, MatchResult.candidate_id == CandidateProfile.id)
+                    .order_by(MatchResult.score.desc())
+                )).all()
+                return match_run, rows
+
+        match_run, rows = asyncio.run(run())
+        assert len(bodies) == 3
+        assert bodies[0]["response_format"] == {"type": "json_object"}
+        assert [(name, score) for name, score, _ in rows] == [("Ann", 80.0), ("Bob", 40.0)]
+        assert rows[0][2] == ["Python"]
+        assert match_run.status == "completed"
+        assert match_run.error_message == "1 candidate(s) could not be evaluated"
+        assert match_run.completed_at is not None
+
+    def test_concurrent_polls_ingest_once(self, session_factory):
+        async def responder(body):
+            await asyncio.sleep(0.01)
+            return _completion(json.dumps(_verdict(60)))
+
+        transport = LocalBatchTransport(responder)
+
+        async def poll(run_id):
+            async with session_factory() as db:
+                return await poll_batch_run(db, await db.get(MatchRun, run_id), transport=transport)
+
+        async def run():
+            async with session_factory() as db:
+                run_id = (await _submit(db, transport, (("Ann", "Python"), ("Bob", "Java")))).id
+            finished = await asyncio.gather(poll(run_id), poll(run_id), poll(run_id))
+            async with session_factory() as db:
+                results = (await db.execute(select(MatchResult))).scalars().all()
+                return finished, len(results), await db.get(MatchRun, run_id)
+
+        finished, result_count, match_run = asyncio.run(run())
+        assert finished == [True, True, True]
+        assert result_count == 2
+        assert match_run.status == "completed" and match_run.error_message is None
+
+    def test_candidates_missing_from_output_count_as_failed(self, session_factory):
+        transport = _PartialOutputTransport()
+
+        async def run():
+            async with session_factory() as db:
+                match_run = await _submit(db, transport, (("Ann", "Python"), ("Bob", "Java"), ("Cy", "Rust")))
+                assert await poll_batch_run(db, match_run, transport=transport)
+                results = (await db.execute(select(MatchResult))).scalars().all()
+                return match_run, len(results)
+
+        match_run, result_count = asyncio.run(run())
+        assert len(match_run.candidate_ids) == 3
+        assert result_count == 1
+        assert match_run.error_message == "2 candidate(s) could not be evaluated"
@@ -0,0 +1,105 @@
+"""
+Unit tests for job builder chat sessions and history compaction.
+"""
+import asyncio
+import json
+
+from app.config import settings
+from app.services.ai import job_builder_chat
+from app.services.ai.job_builder_chat import JobBuilderChatAgent
+from app.services.builder_sessions import BuilderSessionStore
+
+
+def _agent():
+    agent = JobBuilderChatAgent.__new__(JobBuilderChatAgent)
+    agent.model = "test"
+    return agent
+
+
+def _turns(n):
+    return [
+        {"role": "user" if i % 2 == 0 else "assistant", "content": f"message {i}"}
+        for i in range(n)
+    ]
+
+
+class TestBuilderSessions:
+    """Test the sliding window, expiry and the compacted prompt."""
+
+    def test_session_keeps_a_sliding_window(self, monkeypatch):
+        monkeypatch.setattr(settings, "JOB_BUILDER_HISTORY_WINDOW", 4)
+        store = BuilderSessionStore(max_sessions=10, ttl=60)
+        session = store.create(7, history=_turns(2))
+        for i in range(3):
+            session.record(f"question {i}", {"reply": f"answer {i}", "extracted_data": {"role": f"Role {i}"}})
+
+        assert [m["content"] for m in session.history] == ["question 1", "answer 1", "question 2", "answer 2"]
+        assert session.folded == 4
+        assert session.current_data == {"role": "Role 2"}
+        assert store.get(session.session_id, 7) is session
+        # Other users cannot continue someone else's session
+        assert store.get(session.session_id, 8) is None
+
+    def test_sessions_expire_and_are_bounded(self):
+        store = BuilderSessionStore(max_sessions=2, ttl=60)
+        first, second, third = (store.create(1) for _ in range(3))
+        assert store.get(first.session_id, 1) is None
+        assert store.get(third.session_id, 1) is third
+
+        async def take_lock():
+            async with store.lock(second.session_id):
+                pass
+
+        asyncio.run(take_lock())
+        store.ttl = 0.01
+        asyncio.run(asyncio.sleep(0.02))
+        assert store.get(second.session_id, 1) is None
+        # The expired session's lock goes with it
+        assert second.session_id not in store._locks
+
+    def test_prompt_size_does_not_grow_with_the_conversation(self, monkeypatch):
+        monkeypatch.setattr(settings, "JOB_BUILDER_HISTORY_WINDOW", 4)
+        agent = _agent()
+        data = agent._initialize_data_structure()
+        data.update(role="Backend Engineer", must_have_skills=["Python", "SQL"])
+
+        short = agent._completion_params("Remote please", _turns(4), data)
+        long = agent._completion_params("Remote please", _turns(2), data, folded_turns=40)
+
+        assert len(short["messages"]) == 6
+        # The folded-turn note replaces everything before the window
+        assert len(long["messages"]) == 5
+        assert "40 earlier messages" in long["messages"][1]["content"]
+        last = long["messages"][-1]["content"]
+        assert '{"role":"Backend Engineer","must_have_skills":["Python","SQL"]}' in last
+        assert "null" not in last
+
+    def test_agent_reads_the_session_history(self, monkeypatch):
+        sent = []
+
+        async def fake_completion(**params):
+            sent.append(params)
+            content = json.dumps({"reply": "Where is it based?", "extracted_data": {"role": "Engineer"}})
+            message = type("Message", (), {"content": content})()
+            return type("Response", (), {"choices": [type("Choice", (), {"message": message})()]})()
+
+        monkeypatch.setattr(job_builder_chat, "chat_completion", fake_completion)
+        monkeypatch.setattr(settings, "JOB_BUILDER_HISTORY_WINDOW", 2)
+        store = BuilderSessionStore(max_sessions=10, ttl=60)
+        session = store.create(1)
+        agent = _agent()
+
+        async def turn(message):
+            result = await agent.process_message(message, session.history, session.current_data,
+                                                 folded_turns=session.folded)
+            session.record(message, result)
+            return result
+
+        asyncio.run(turn("Hiring an engineer"))
+        result = asyncio.run(turn("Python and SQL"))
+
+        assert result["extracted_data"]["role"] == "Engineer"
+        assert [m["content"] for m in sent[1]["messages"][1:3]] == ["Hiring an engineer", "Where is it based?"]
+        asyncio.run(turn("Remote, reporting to the CTO"))
+        # Two messages fell out of the window and were folded
+        assert "2 earlier messages" in sent[2]["messages"][1]["content"]
@@ -0,0 +1,84 @@
+"""
+Unit tests for the rule-based chat fast path.
+"""
+import asyncio
+
+import pytest
+
+from app.services import document_chat
+from app.services.ai import job_builder_chat
+from app.services.ai.chat_rules import extract_job_slots, match_input_method, match_template
+from app.services.ai.job_builder_chat import JobBuilderChatAgent
+from app.services.document_chat import DocumentChatService
+
+_TEMPLATES = [
+    {"id": 1, "name": "Offer Letter"},
+    {"id": 2, "name": "Internship Offer Letter"},
+    {"id": 3, "name": "Promotion Letter"},
+]
+
+
+async def _no_llm(**params):
+    raise AssertionError("the model should not be called")
+
+
+class TestChatRules:
+    """Test slot extraction and the agents answering without the model."""
+
+    @pytest.mark.parametrize("message, focus, expected", [
+        ("Senior", None, {"seniority": "Senior"}),
+        ("5 years", None, {"seniority": "Mid"}),
+        ("Senior, 7 years", None, {"seniority": "Senior"}),
+        ("Hybrid in Pune", None, {"location": "Pune (Hybrid)"}),
+        ("Kuala Lumpur", "location", {"location": "Kuala Lumpur"}),
+        ("Python, Docker and AWS", None, {"must_have_skills": ["Python", "Docker", "AWS"]}),
+        ("12-18 LPA", None, {"salary_range": "12-18 LPA"}),
+        ("1500000", "salary_range", {"salary_range": "1500000"}),
+        ("within 30 days", None, {"joining_timeline": "Within 30 days"}),
+    ])
+    def test_short_answers_are_understood(self, message, focus, expected):
+        assert extract_job_slots(message, focus) == expected
+
+    @pytest.mark.parametrize("message, focus", [
+        ("we need a senior backend engineer", None),
+        ("What salary do you suggest?", "salary_range"),
+        ("Kuala Lumpur", None),
+        ("2-3 weeks", None),
+        ("let's go", None),
+        ("Berlin or Munich", "location"),
+        ("Berlin and London", None),
+        ("remote or hybrid", None),
+        ("junior or mid", "seniority"),
+        ("senior, 3 years", None),
+        ("Python or Java", "must_have_skills"),
+    ])
+    def test_anything_else_goes_to_the_model(self, message, focus):
+        assert extract_job_slots(message, focus) is None
+
+    def test_templates_and_methods(self):
+        assert match_template("offer letter", _TEMPLATES)["id"] == 1
+        assert match_template("I need an internship offer letter", _TEMPLATES)["id"] == 2
+        assert match_template("promotion", _TEMPLATES)["id"] == 3
+        assert match_template("offer", _TEMPLATES) is None  # two candidates
+        assert match_template("offer letter for John", _TEMPLATES) is None
+        assert match_input_method("csv template") == "download_template"
+        assert match_input_method("I'll fill it in manually") == "manual_entry"
+
+    def test_job_builder_answers_without_the_model(self, monkeypatch):
+        monkeypatch.setattr(job_builder_chat, "chat_completion", _no_llm)
+        agent = JobBuilderChatAgent.__new__(JobBuilderChatAgent)
+        data = agent._initialize_data_structure()
+        data.update(role="Backend Engineer", seniority="Senior", must_have_skills=["Python", "AWS"],
+                    location="Remote", joining_timeline="ASAP")
+
+        result = asyncio.run(agent.process_message("$120k - $150k", [], data, focus_field="salary_range"))
+        assert result["extracted_data"]["salary_range"] == "$120k - $150k"
+        assert result["is_complete"] is True
+        assert "Ready to generate" in result["reply"]
+
+    def test_document_chat_selects_template_without_the_model(self, monkeypatch):
+        monkeypatch.setattr(document_chat, "chat_completion", _no_llm)
+        service = DocumentChatService.__new__(DocumentChatService)
+        result = asyncio.run(service.generate_response("Promotion letter", [], _TEMPLATES))
+        assert result["action"] == "template_selected"
+        assert result["action_data"] == {"template_id": 3, "template_name": "Promotion Letter"}
@@ -0,0 +1,109 @@
+"""
+Unit tests for the document agent conversation state store.
+"""
+import asyncio
+
+from sqlalchemy import select
+
+from app.models.document import DocumentConversation, DocumentTemplate
+from app.services.conversation_store import ConversationStore, conversation_store
+from app.services.document_agent import DocumentAgentService
+
+
+async def _persisted(factory, session_id):
+    async with factory() as db:
+        result = await db.execute(
+            select(DocumentConversation.current_step, DocumentConversation.context)
+            .where(DocumentConversation.session_id == session_id)
+        )
+        return result.one()
+
+
+class TestConversationStore:
+    """Test coalesced writes, locking and eviction."""
+
+    def test_writes_at_step_boundaries(self, session_factory):
+        store = ConversationStore(session_factory, max_sessions=10, flush_every=5)
+
+        async def run():
+            async with session_factory() as db:
+                state = await store.create(db, 1, "s1")
+                state.current_step = "manual_entry"
+                assert await store.save(db, state)
+
+                for i in range(3):
+                    state.context = {**state.context, f"field_{i}": "x"}
+                    assert not await store.save(db, state)
+                assert (await _persisted(session_factory, "s1")).context == {}
+                # Reads are served from memory between writes
+                assert (await store.get(db, "s1")).context["field_2"] == "x"
+
+                state.current_step = "manual_complete"
+                assert await store.save(db, state)
+            return await _persisted(session_factory, "s1")
+
+        step, context = asyncio.run(run())
+        assert step == "manual_complete"
+        assert set(context) == {"field_0", "field_1", "field_2"}
+
+    def test_lock_prevents_lost_updates(self, session_factory):
+        store = ConversationStore(session_factory, max_sessions=10, flush_every=100)
+
+        async def add_field(name):
+            async with store.lock("s1"):
+                async with session_factory() as db:
+                    state = await store.get(db, "s1")
+                    ctx = dict(state.context)
+                    await asyncio.sleep(0)  # yield mid read-modify-write
+                    ctx[name] = "x"
+                    state.context = ctx
+                    await store.save(db, state)
+
+        async def run():
+            async with session_factory() as db:
+                await store.create(db, 1, "s1")
+            await asyncio.gather(*(add_field(f"f{i}") for i in range(10)))
+            async with session_factory() as db:
+                return await store.get(db, "s1")
+
+        assert len(asyncio.run(run()).context) == 10
+
+    def test_eviction_and_flush_all_persist_dirty_state(self, session_factory):
+        store = ConversationStore(session_factory, max_sessions=1, flush_every=100)
+
+        async def run():
+            async with session_factory() as db:
+                first = await store.create(db, 1, "s1")
+                first.context = {"a": 1}
+                await store.save(db, first)
+                second = await store.create(db, 1, "s2")  # evicts s1
+                second.context = {"b": 2}
+                await store.save(db, second)
+            await store.flush_all()
+            return await _persisted(session_factory, "s1"), await _persisted(session_factory, "s2")
+
+        first, second = asyncio.run(run())
+        assert first.context == {"a": 1}
+        assert second.context == {"b": 2}
+
+    def test_generate_documents_persists_completed_step(self, session_factory, seed):
+        seed(session_factory, DocumentTemplate(
+            id=1, name="Offer Letter", category="recruitment", file_path="offer.docx",
+            required_fields=["employee_name"], optional_fields=[],
+        ))
+
+        async def run():
+            async with session_factory() as db:
+                state = await conversation_store.create(db, 1, "s1")
+                state.selected_template_id = 1
+                state.current_step = "manual_complete"
+                state.context = {"manual_data": {"employee_name": "Jane"}}
+                await conversation_store.save(db, state)
+                return await DocumentAgentService(db).generate_documents("s1", 1)
+
+        try:
+            result = asyncio.run(run())
+        finally:
+            conversation_store.clear()
+        assert result["current_step"] == "completed"
+        assert (asyncio.run(_persisted(session_factory, "s1"))).current_step == "completed"
@@ -0,0 +1,50 @@
+"""
+Unit tests for the shared field cipher.
+"""
+import base64
+import hashlib
+
+import pytest
+from cryptography.fernet import Fernet, InvalidToken
+
+from app.core.crypto import FieldCipher, parse_key_config
+
+
+class TestFieldCipher:
+    """Test key ids, legacy tokens, rotation and batches."""
+
+    def test_round_trip_with_key_id(self):
+        cipher = FieldCipher([("k1", "secret-one")])
+        token = cipher.encrypt("Jane Doe")
+        assert token.startswith("k1:")
+        assert cipher.decrypt(token) == "Jane Doe"
+        assert cipher.decrypt(None) is None
+
+    def test_reads_legacy_unprefixed_tokens(self):
+        legacy_key = base64.urlsafe_b64encode(hashlib.sha256(b"old-secret").digest())
+        legacy_token = Fernet(legacy_key).encrypt(b"Jane Doe").decode()
+        cipher = FieldCipher([("k2", "new-secret"), ("0", "old-secret")])
+        assert cipher.decrypt(legacy_token) == "Jane Doe"
+
+    def test_rotation(self):
+        old = FieldCipher([("k1", "secret-one")])
+        token = old.encrypt("Jane Doe")
+        new = FieldCipher([("k2", "secret-two"), ("k1", "secret-one")])
+        assert new.needs_rotation(token)
+        rotated = new.rotate(token)
+        assert rotated.startswith("k2:")
+        assert not new.needs_rotation(rotated)
+        assert new.decrypt(rotated) == "Jane Doe"
+        with pytest.raises(InvalidToken):
+            FieldCipher([("k2", "secret-two")]).decrypt(token)
+
+    def test_batches(self):
+        cipher = FieldCipher([("k1", "secret-one")])
+        tokens = cipher.encrypt_many(["a", "b", None])
+        assert cipher.decrypt_many(tokens + ["k9:garbage"], default="?") == ["a", "b", None, "?"]
+
+    def test_parse_key_config(self):
+        assert parse_key_config(" k2:abc , k1:def ") == [("k2", "abc"), ("k1", "def")]
+        assert parse_key_config(None) == []
+        with pytest.raises(ValueError):
+            parse_key_config("no-separator")
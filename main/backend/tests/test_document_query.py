@@ -0,0 +1,75 @@
+"""
+Unit tests for the document archive search (keyset pagination + projection).
+"""
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+
+from app.api.v1.documents import query_documents
+from app.models.document import GeneratedDocument
+
+
+@pytest.fixture
+def session_factory(session_factory, seed):
+    base = datetime(2025, 1, 1)
+    seed(session_factory, *(
+        GeneratedDocument(
+            id=i,
+            template_id=1,
+            employee_code="EMP1" if i % 2 else "EMP2",
+            document_type="offer_letter",
+            content=f"content {i}",
+            preview_masked_html=f"<p>{i}</p>",
+            # ids 3 and 4 share a timestamp to exercise the id tie-breaker
+            generated_at=base + timedelta(hours=min(i, 3) if i <= 4 else i),
+            status="draft",
+            email_sent=False,
+            digitally_signed=False,
+        )
+        for i in range(1, 8)
+    ))
+    return session_factory
+
+
+def _query(factory, **params):
+    args = dict(employee_code=None, phone_number=None, document_type=None, limit=20,
+                cursor=None, include_preview=False, include_content=False)
+    args.update(params)
+
+    async def run():
+        async with factory() as db:
+            return await query_documents(db=db, current_user=None, **args)
+
+    return asyncio.run(run())
+
+
+class TestDocumentQuery:
+    """Test cursor paging and column projection."""
+
+    def test_pages_cover_all_rows_once(self, session_factory):
+        seen, cursor = [], None
+        while True:
+            page = _query(session_factory, limit=3, cursor=cursor)
+            seen.extend(doc.id for doc in page.documents)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        assert seen == [7, 6, 5, 4, 3, 2, 1]
+
+    def test_filter_and_projection(self, session_factory):
+        page = _query(session_factory, employee_code="EMP2")
+        assert [doc.id for doc in page.documents] == [6, 4, 2]
+        assert page.next_cursor is None
+        assert page.documents[0].content is None
+        assert page.documents[0].preview_masked_html is None
+
+        page = _query(session_factory, employee_code="EMP2", include_preview=True)
+        assert page.documents[0].preview_masked_html == "<p>6</p>"
+        assert page.documents[0].content is None
+
+    def test_invalid_cursor(self, session_factory):
+        with pytest.raises(HTTPException) as exc:
+            _query(session_factory, cursor="not-a-cursor")
+        assert exc.value.status_code == 400
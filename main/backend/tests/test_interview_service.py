@@ -0,0 +1,90 @@
+"""
+Unit tests for interview listing projections.
+"""
+import asyncio
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.exc import InvalidRequestError
+
+from app.models.interview import Interview
+from app.schemas.interview import QuestionCreate
+from app.services import interview_service
+
+
+@pytest.fixture
+def session_factory(session_factory, seed):
+    seed(session_factory, Interview(
+        id=1,
+        candidate_name="Jane",
+        role="Engineer",
+        round_type="Behavioral",
+        scheduled_at=datetime(2025, 1, 1, 10, 0),
+        interviewer_key="interviewer-abc",
+        candidate_key="candidate-abc",
+        transcript=[{"id": "q-1", "question": "Why?", "answer": None}] * 3,
+    ))
+    return session_factory
+
+
+class TestInterviewListing:
+    """Test that list paths do not load transcripts."""
+
+    def test_summary_projection(self, session_factory):
+        async def run():
+            async with session_factory() as db:
+                return await interview_service.list_interview_summaries(db)
+
+        rows, total = asyncio.run(run())
+        assert total == 1
+        assert rows[0]["question_count"] == 3
+        assert "transcript" not in rows[0]
+
+    def test_summary_filters_and_pages(self, session_factory):
+        async def run():
+            async with session_factory() as db:
+                for i in range(2, 6):
+                    db.add(Interview(
+                        id=i,
+                        candidate_name=f"C{i}",
+                        role="Analyst" if i % 2 else "Engineer",
+                        round_type="Technical",
+                        scheduled_at=datetime(2025, 1, i, 10, 0),
+                        status="completed" if i == 5 else "scheduled",
+                        interviewer_key=f"interviewer-{i}",
+                        candidate_key=f"candidate-{i}",
+                        transcript=[],
+                    ))
+                await db.commit()
+                by_role = await interview_service.list_interview_summaries(db, role="Engineer")
+                by_status = await interview_service.list_interview_summaries(db, status="completed")
+                by_date = await interview_service.list_interview_summaries(
+                    db, scheduled_from=datetime(2025, 1, 3), scheduled_to=datetime(2025, 1, 4, 23, 59)
+                )
+                second_page = await interview_service.list_interview_summaries(db, offset=2, limit=2)
+                return by_role, by_status, by_date, second_page
+
+        by_role, by_status, by_date, second_page = asyncio.run(run())
+        assert [r["id"] for r in by_role[0]] == [4, 2, 1] and by_role[1] == 3
+        assert [r["id"] for r in by_status[0]] == [5]
+        assert [r["id"] for r in by_date[0]] == [4, 3]
+        assert [r["id"] for r in second_page[0]] == [3, 2] and second_page[1] == 5
+
+    def test_transcript_deferred_by_default(self, session_factory):
+        async def run():
+            async with session_factory() as db:
+                interview = (await db.execute(select(Interview))).scalar_one()
+                with pytest.raises(InvalidRequestError):
+                    interview.transcript
+
+        asyncio.run(run())
+
+    def test_detail_and_writes_load_transcript(self, session_factory):
+        async def run():
+            async with session_factory() as db:
+                interview = await interview_service.get_interview(db, 1)
+                updated = await interview_service.add_question(db, interview, QuestionCreate(question="Next?"))
+                return updated.transcript
+
+        assert len(asyncio.run(run())) == 4
@@ -0,0 +1,66 @@
+"""
+Unit tests for the JD generation cache.
+"""
+import asyncio
+
+from app.services.jd_cache import JDCache, jd_cache_key
+
+_ARGUMENTS = {
+    "role": "Backend Engineer",
+    "seniority": "Senior",
+    "expectations": "Own the payments API",
+    "must_have_skills": ["Python", "PostgreSQL"],
+    "preferred_skills": [],
+    "company_tone": "startup",
+    "department": "Engineering",
+    "location": "Berlin",
+}
+
+
+class TestJDCache:
+    """Test the canonical key, reuse, regeneration and persistence."""
+
+    def test_key_ignores_skill_order_case_and_spacing(self):
+        reordered = {**_ARGUMENTS, "role": " backend  engineer", "must_have_skills": ["postgresql", "Python", "Python"]}
+        assert jd_cache_key(reordered) == jd_cache_key(_ARGUMENTS)
+        assert jd_cache_key({**_ARGUMENTS, "location": "Munich"}) != jd_cache_key(_ARGUMENTS)
+
+    def test_identical_requests_generate_once_and_survive_restarts(self, session_factory):
+        calls = []
+
+        async def generate():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"jd_content": {"title": f"JD {len(calls)}"}, "metadata": {"role": "Backend Engineer"}}
+
+        async def run():
+            cache = JDCache(session_factory, ttl=60, max_entries=10, max_rows=10)
+            first, second = await asyncio.gather(
+                cache.get_or_generate(_ARGUMENTS, generate),
+                cache.get_or_generate(_ARGUMENTS, generate),
+            )
+            repeat = await cache.get_or_generate(_ARGUMENTS, generate)
+            # A new process starts with an empty memory tier
+            restarted = JDCache(session_factory, ttl=60, max_entries=10, max_rows=10)
+            persisted = await restarted.get_or_generate(_ARGUMENTS, generate)
+            fresh = await restarted.get_or_generate(_ARGUMENTS, generate, regenerate=True)
+            latest = await JDCache(session_factory, ttl=60).get_or_generate(_ARGUMENTS, generate)
+            return first, second, repeat, persisted, fresh, latest
+
+        first, second, repeat, persisted, fresh, latest = asyncio.run(run())
+        assert len(calls) == 2
+        assert first["jd_content"]["title"] == second["jd_content"]["title"] == "JD 1"
+        assert repeat["metadata"]["cached"] is True
+        assert persisted["jd_content"]["title"] == "JD 1"
+        assert fresh["jd_content"]["title"] == "JD 2" and "cached" not in fresh["metadata"]
+        assert latest["jd_content"]["title"] == "JD 2"
+
+    def test_expired_entries_are_not_served(self, session_factory):
+        async def run():
+            cache = JDCache(session_factory, ttl=0.01, max_entries=10, max_rows=10)
+            key = jd_cache_key(_ARGUMENTS)
+            await cache.put(key, {"jd_content": {}, "metadata": {}})
+            await asyncio.sleep(0.02)
+            return await cache.get(key)
+
+        assert asyncio.run(run()) is None
@@ -0,0 +1,47 @@
+"""
+Unit tests for PII masking in the streamed JD endpoint.
+"""
+import asyncio
+import json
+
+from app.api.v1 import jobs
+from app.schemas.jobs import GenerateJDRequest
+
+_TEXT = "Contact john.smith@acme.com or call +1 415 555 2671 today"
+
+
+class _CharByCharAgent:
+    """Streams ``_TEXT`` into one field a character at a time."""
+
+    async def stream_jd(self, **arguments):
+        for end in range(1, len(_TEXT) + 1):
+            yield "partial", {"path": ["jd_content", "overview"], "text": _TEXT[:end]}
+        yield "field", {"path": ["jd_content", "overview"], "value": _TEXT}
+
+
+def _events(body: bytes):
+    for frame in body.decode().strip().split("\n\n"):
+        event, data = frame.split("\n", 1)
+        yield event[len("event: "):], json.loads(data[len("data: "):])
+
+
+class TestJDStreamMasking:
+    """Test that no partial event leaks part of an email or phone number."""
+
+    def test_partials_never_reveal_unmasked_pii(self, monkeypatch):
+        monkeypatch.setattr(jobs, "JDGeneratorAgent", _CharByCharAgent)
+        request = GenerateJDRequest(role="Engineer", seniority="Senior", must_have_skills=["Python"], regenerate=True)
+
+        async def run():
+            response = await jobs.stream_job_description(request, current_user=None)
+            return b"".join([chunk async for chunk in response.body_iterator])
+
+        events = list(_events(asyncio.run(run())))
+        partials = [data["text"] for event, data in events if event == "partial"]
+        assert partials
+        for text in partials:
+            assert "smith@" not in text and "john.smith" not in text
+            assert "415 555" not in text and "555 26" not in text
+        field = next(data["value"] for event, data in events if event == "field")
+        assert field == jobs._mask_pii_in_obj(_TEXT)
+        assert partials[-1] == field[:len(partials[-1])]
@@ -0,0 +1,77 @@
+"""
+Unit tests for incremental JSON field parsing and the streaming agents.
+"""
+import asyncio
+import json
+
+from app.services.ai import job_builder_chat
+from app.services.ai.job_builder_chat import JobBuilderChatAgent
+from app.utils.json_stream import JSONFieldStream
+
+
+_DOC = {
+    "reply": 'Great, a "Senior" role \\ café',
+    "extracted_data": {"role": "Engineer", "must_have_skills": ["Python", "SQL"], "years": 5, "notes": None},
+    "completion_percentage": 40,
+}
+
+
+def _feed(text, step):
+    parser = JSONFieldStream(max_depth=2)
+    events = []
+    for i in range(0, len(text), step):
+        events += parser.feed(text[i:i + step])
+    return parser, events
+
+
+class TestJSONFieldStream:
+    """Test field events across arbitrary chunk boundaries."""
+
+    def test_fields_complete_in_order(self):
+        text = "```json\n" + json.dumps(_DOC, indent=2) + "\n```"
+        for step in (1, 2, 5, 64):
+            parser, events = _feed(text, step)
+            fields = [(path, value) for kind, path, value in events if kind == "field"]
+            assert fields[0] == (("reply",), _DOC["reply"])
+            assert (("extracted_data", "years"), 5) in fields
+            assert (("extracted_data", "notes"), None) in fields
+            assert (("extracted_data",), _DOC["extracted_data"]) in fields
+            assert fields[-1] == (("completion_percentage",), 40)
+            assert parser.done
+
+    def test_partial_strings_grow(self):
+        _, events = _feed(json.dumps(_DOC), 3)
+        partials = [value for kind, path, value in events if kind == "partial" and path == ("reply",)]
+        assert len(partials) > 3
+        assert all(_DOC["reply"].startswith(text) for text in partials)
+
+    def test_nested_values_beyond_depth_are_not_reported(self):
+        _, events = _feed('{"a": {"b": {"c": 1}}, "d": [{"e": 2}]}', 4)
+        paths = [path for kind, path, _ in events if kind == "field"]
+        assert paths == [("a", "b"), ("a",), ("d",)]
+
+
+class TestStreamingAgent:
+    """Test the job builder's streaming variant end to end."""
+
+    def test_stream_message_matches_blocking_result(self, monkeypatch):
+        chunks = [json.dumps(_DOC)[i:i + 7] for i in range(0, len(json.dumps(_DOC)), 7)]
+
+        async def fake_stream(**params):
+            for chunk in chunks:
+                yield chunk
+
+        monkeypatch.setattr(job_builder_chat, "stream_chat_completion", fake_stream)
+        agent = JobBuilderChatAgent.__new__(JobBuilderChatAgent)
+        agent.model = "test"
+
+        async def collect():
+            return [item async for item in agent.stream_message("Hiring an engineer", [])]
+
+        events = asyncio.run(collect())
+        assert events[0][0] == "partial"
+        event, result = events[-1]
+        assert event == "done"
+        assert result["reply"] == _DOC["reply"]
+        assert result["extracted_data"]["role"] == "Engineer"
+        assert "location" in result["missing_required"]
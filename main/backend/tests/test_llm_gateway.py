@@ -0,0 +1,253 @@
+"""
+Unit tests for the shared LLM gateway.
+"""
+import asyncio
+
+import pytest
+
+from app.services.ai import job_builder_chat
+from app.services.ai.job_builder_chat import JobBuilderChatAgent
+from app.utils.llm_gateway import LLMGateway, LLMUnavailableError, TokenBucket
+
+
+class _StatusError(Exception):
+    def __init__(self, status_code, headers=None):
+        super().__init__(f"status {status_code}")
+        self.status_code = status_code
+        self.response = type("Response", (), {"headers": headers or {}})()
+
+
+def _gateway(**kwargs):
+    options = dict(requests_per_minute=100_000, tokens_per_minute=10_000_000, initial_concurrency=4,
+                   max_concurrency=8, max_retries=3, base_delay=0.01, max_delay=0.05)
+    options.update(kwargs)
+    return LLMGateway(**options)
+
+
+class TestLLMGateway:
+    """Test retries, the AIMD window and the token buckets."""
+
+    def test_429_is_retried_and_halves_the_window(self):
+        gateway = _gateway(reserved_interactive=0)
+        attempts = []
+
+        async def send():
+            attempts.append(1)
+            if len(attempts) == 1:
+                raise _StatusError(429, {"retry-after-ms": "10"})
+            return "ok"
+
+        assert asyncio.run(gateway.call(send)) == "ok"
+        assert len(attempts) == 2
+        assert gateway.throttled == 1
+        # Halved from 4, then one additive increase
+        assert gateway.window.limit == pytest.approx(2.5)
+
+    def test_non_retryable_errors_and_exhausted_retries_raise(self):
+        gateway = _gateway(max_retries=2)
+        calls = []
+
+        async def bad_request():
+            calls.append("400")
+            raise _StatusError(400)
+
+        async def overloaded():
+            calls.append("503")
+            raise _StatusError(503)
+
+        with pytest.raises(_StatusError):
+            asyncio.run(gateway.call(bad_request))
+        with pytest.raises(_StatusError):
+            asyncio.run(gateway.call(overloaded))
+        assert calls == ["400", "503", "503", "503"]
+
+    def test_concurrency_stays_within_window_and_grows_on_success(self):
+        gateway = _gateway(initial_concurrency=2)
+        active, peak = [0], [0]
+
+        async def send():
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+            await asyncio.sleep(0.005)
+            active[0] -= 1
+            return "ok"
+
+        async def run():
+            return await asyncio.gather(*(gateway.call(send) for _ in range(30)))
+
+        assert len(asyncio.run(run())) == 30
+        assert peak[0] <= 8
+        assert gateway.window.limit > 2
+        assert gateway.in_flight == 0
+
+    def test_token_bucket_delays_when_spent(self):
+        bucket = TokenBucket(rate_per_minute=600)
+        assert bucket.delay_for(600) == 0
+        bucket.take(600)
+        assert bucket.delay_for(60) == pytest.approx(6, rel=0.05)
+
+
+class TestLanes:
+    """Test interactive priority, batch reservation and per-user fairness."""
+
+    def test_interactive_keeps_reserved_capacity(self):
+        gateway = _gateway(initial_concurrency=3, max_concurrency=3, reserved_interactive=2)
+        release = None
+        running = {"batch": 0, "interactive": 0}
+        peak_batch = [0]
+
+        async def work(lane):
+            running[lane] += 1
+            peak_batch[0] = max(peak_batch[0], running["batch"])
+            await release.wait()
+            running[lane] -= 1
+            return lane
+
+        async def run():
+            nonlocal release
+            release = asyncio.Event()
+            batch = [asyncio.ensure_future(gateway.call(lambda: work("batch"), lane="batch", user_id=1))
+                     for _ in range(4)]
+            await asyncio.sleep(0.01)
+            interactive = asyncio.ensure_future(gateway.call(lambda: work("interactive")))
+            await asyncio.sleep(0.01)
+            # Batch is held to one slot; the chat request starts without waiting
+            assert running == {"batch": 1, "interactive": 1}
+            assert gateway.stats()["lanes"]["batch"]["queued"] == 3
+            release.set()
+            return await asyncio.gather(interactive, *batch)
+
+        assert asyncio.run(run()) == ["interactive"] + ["batch"] * 4
+        assert peak_batch[0] == 1
+        lanes = gateway.stats()["lanes"]
+        assert lanes["batch"]["admitted"] == 4 and lanes["batch"]["queued"] == 0
+        assert lanes["interactive"]["admitted"] == 1
+
+    def test_batch_never_takes_reserved_slots_of_a_small_window(self):
+        gateway = _gateway(reserved_interactive=2)
+        started = []
+
+        async def work(lane):
+            started.append(lane)
+            return lane
+
+        async def run():
+            gateway._check_loop()
+            gateway.window.limit = 2  # limit <= reserved
+            batch = asyncio.ensure_future(gateway.call(lambda: work("batch"), lane="batch", user_id=1))
+            await asyncio.sleep(0.01)
+            assert started == []
+            assert await gateway.call(lambda: work("interactive")) == "interactive"
+            assert started == ["interactive"]
+            batch.cancel()
+
+        asyncio.run(run())
+
+    def test_throttling_keeps_a_batch_slot_beyond_the_reservation(self):
+        gateway = _gateway(initial_concurrency=1, reserved_interactive=2)
+        assert gateway.window.limit == 3
+        for _ in range(5):
+            gateway.window.on_throttle(started=float("inf"))
+        assert gateway.window.limit == 3
+        assert gateway._lane_limit("batch") == 1
+
+    def test_batch_leaves_rate_headroom_for_interactive(self):
+        gateway = _gateway(tokens_per_minute=1000, reserved_rate=0.5)
+        gateway.tokens.take(600)  # 400 left; batch may only spend down to 500
+        started = []
+
+        async def work(lane):
+            started.append(lane)
+            return lane
+
+        async def run():
+            batch = asyncio.ensure_future(gateway.call(lambda: work("batch"), 100, lane="batch", user_id=1))
+            await asyncio.sleep(0.01)
+            assert started == []
+            assert await gateway.call(lambda: work("interactive"), 100) == "interactive"
+            batch.cancel()
+
+        asyncio.run(run())
+        assert started == ["interactive"]
+
+    def test_batch_lane_is_shared_fairly_between_users(self):
+        gateway = _gateway(initial_concurrency=1, max_concurrency=1, reserved_interactive=0)
+        order = []
+
+        async def work(user):
+            order.append(user)
+            await asyncio.sleep(0)
+
+        async def run():
+            calls = [gateway.call(lambda: work("A"), 100, lane="batch", user_id="A") for _ in range(6)]
+            calls += [gateway.call(lambda: work("B"), 100, lane="batch", user_id="B") for _ in range(2)]
+            await asyncio.gather(*calls)
+
+        asyncio.run(run())
+        # B's two requests are not stuck behind all of A's
+        assert order[:5].count("B") == 2
+        assert len(order) == 8
+
+
+class TestTailLatency:
+    """Test hedged requests, the circuit breaker and agent fallbacks."""
+
+    def test_slow_request_is_hedged_at_p95(self):
+        gateway = _gateway(hedge_min_samples=3, hedge_min_delay=0.01)
+        calls = []
+
+        async def send():
+            n = len(calls)
+            calls.append(n)
+            await asyncio.sleep(1.0 if n == 3 else 0.005)
+            return n
+
+        async def run():
+            for _ in range(3):
+                await gateway.call(send, hedge_key="gpt:500")
+            started = asyncio.get_running_loop().time()
+            result = await gateway.call(send, hedge_key="gpt:500")
+            return result, asyncio.get_running_loop().time() - started
+
+        result, elapsed = asyncio.run(run())
+        assert result == 4  # the hedge answered first
+        assert elapsed < 0.5
+        assert (gateway.hedged, gateway.hedge_wins) == (1, 1)
+
+    def test_circuit_opens_fails_fast_and_recovers(self):
+        gateway = _gateway(max_retries=5, breaker_failures=2, breaker_reset=0.05)
+        calls = []
+
+        async def down():
+            calls.append("down")
+            raise _StatusError(503)
+
+        async def up():
+            calls.append("up")
+            return "ok"
+
+        async def run():
+            with pytest.raises(_StatusError):
+                await gateway.call(down)
+            assert gateway.breaker.state == "open"
+            with pytest.raises(LLMUnavailableError):
+                await gateway.call(up)
+            await asyncio.sleep(0.06)
+            return await gateway.call(up)
+
+        assert asyncio.run(run()) == "ok"
+        # Retries stopped once the circuit opened; the probe closed it again
+        assert calls == ["down", "down", "up"]
+        assert gateway.breaker.state == "closed"
+
+    def test_job_builder_answers_from_fallback_when_unavailable(self, monkeypatch):
+        async def unavailable(**params):
+            raise LLMUnavailableError("circuit open")
+
+        monkeypatch.setattr(job_builder_chat, "chat_completion", unavailable)
+        agent = JobBuilderChatAgent.__new__(JobBuilderChatAgent)
+        agent.model = "test"
+        result = asyncio.run(agent.process_message("Hiring a senior python developer", []))
+        assert result["extracted_data"]["role"] == "Software Engineer"
+        assert result["extracted_data"]["seniority"] == "Senior"
+        assert "fallback" in result["error"]
@@ -0,0 +1,85 @@
+"""
+Unit tests for the compression and ETag middleware.
+"""
+from fastapi import FastAPI
+from fastapi.responses import Response, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.middleware import CompressionMiddleware, ETagMiddleware
+
+
+def _client() -> TestClient:
+    app = FastAPI()
+    app.add_middleware(CompressionMiddleware, minimum_size=100)
+    app.add_middleware(ETagMiddleware)
+
+    @app.get("/big")
+    async def big():
+        return {"items": ["x" * 50] * 20}
+
+    @app.get("/small")
+    async def small():
+        return {"ok": True}
+
+    @app.get("/pdf")
+    async def pdf():
+        return Response(b"%PDF" + b"0" * 500, media_type="application/pdf")
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            yield b"data: 1\n\n" * 50
+            yield b"data: 2\n\n" * 50
+        return StreamingResponse(chunks(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+class TestCompression:
+    """Test size threshold and content-type exclusions."""
+
+    def test_large_json_is_gzipped(self):
+        response = _client().get("/big", headers={"Accept-Encoding": "gzip"})
+        assert response.headers["content-encoding"] == "gzip"
+        assert "Accept-Encoding" in response.headers["vary"]
+        assert response.json()["items"][0] == "x" * 50
+
+    def test_small_and_excluded_bodies_untouched(self):
+        client = _client()
+        assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+        assert "content-encoding" not in client.get("/pdf", headers={"Accept-Encoding": "gzip"}).headers
+        stream = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in stream.headers
+        assert stream.content.count(b"data:") == 100
+
+    def test_gzip_output_is_deterministic(self):
+        client = _client()
+        first = client.get("/big", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        second = client.get("/big", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        assert first == second
+
+
+class TestETag:
+    """Test strong ETags and 304 handling."""
+
+    def test_if_none_match_returns_304(self):
+        client = _client()
+        first = client.get("/small")
+        etag = first.headers["etag"]
+        assert etag.startswith('"') and not etag.startswith("W/")
+
+        cached = client.get("/small", headers={"If-None-Match": etag})
+        assert cached.status_code == 304
+        assert cached.content == b""
+        assert cached.headers["etag"] == etag
+
+        assert client.get("/small", headers={"If-None-Match": '"other"'}).status_code == 200
+
+    def test_encodings_get_distinct_etags(self):
+        client = _client()
+        plain = client.get("/big", headers={"Accept-Encoding": "identity"}).headers["etag"]
+        gzipped = client.get("/big", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+        assert plain != gzipped
+
+    def test_streaming_has_no_etag(self):
+        assert "etag" not in _client().get("/stream").headers
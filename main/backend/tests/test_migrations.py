@@ -0,0 +1,64 @@
+"""
+Unit tests for versioned schema migrations.
+"""
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.db.migrations import current_version, latest_version, run_migrations
+
+
+def _run(tmp_path, coro_fn):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+
+    async def runner():
+        try:
+            return await coro_fn(engine)
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(runner())
+
+
+class TestMigrations:
+    """Test upgrade, fast skip and legacy databases."""
+
+    def test_fresh_database_reaches_latest(self, tmp_path):
+        async def scenario(engine):
+            applied = await run_migrations(engine)
+            async with engine.connect() as conn:
+                version = await current_version(conn)
+                indexes = {row[1] for row in await conn.execute(text("PRAGMA index_list('match_results')"))}
+            return applied, version, indexes
+
+        applied, version, indexes = _run(tmp_path, scenario)
+        assert applied == latest_version()
+        assert version == latest_version()
+        assert "ix_match_results_run_id" in indexes
+
+    def test_second_run_is_noop(self, tmp_path):
+        async def scenario(engine):
+            await run_migrations(engine)
+            return await run_migrations(engine)
+
+        assert _run(tmp_path, scenario) == 0
+
+    def test_legacy_database_without_email_hash(self, tmp_path):
+        async def scenario(engine):
+            async with engine.begin() as conn:
+                await conn.execute(text(
+                    "CREATE TABLE generated_documents (id INTEGER PRIMARY KEY, employee_code VARCHAR, "
+                    "phone_number_hash VARCHAR, document_type VARCHAR, generated_at DATETIME)"
+                ))
+            await run_migrations(engine)
+            async with engine.connect() as conn:
+                return [row[1] for row in await conn.execute(text("PRAGMA table_info('generated_documents')"))]
+
+        assert "email_hash" in _run(tmp_path, scenario)
+
+    def test_concurrent_workers_apply_once(self, tmp_path):
+        async def scenario(engine):
+            return await asyncio.gather(*(run_migrations(engine) for _ in range(4)))
+
+        assert sum(_run(tmp_path, scenario)) == latest_version()
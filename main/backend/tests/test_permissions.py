@@ -0,0 +1,49 @@
+"""
+Unit tests for the compiled role/permission model.
+"""
+from app.core.permissions import (
+    PERMISSION_BITS,
+    PERMISSIONS,
+    ROLE_PERMISSION_MASKS,
+    ROLE_PERMISSIONS,
+    has_permission,
+    require_permission,
+)
+from app.models.user import User
+
+
+class TestCompiledPermissions:
+    """Test that the bitmask model matches the declarative table."""
+
+    def test_matches_permission_table(self):
+        for permission, roles in PERMISSIONS.items():
+            for role in ("hr", "hiring_manager", "recruiter", "admin", "candidate"):
+                user = User(email=f"{role}@x.com", role=role)
+                assert has_permission(user, permission) == (role in roles)
+
+    def test_role_permission_sets(self):
+        expected = {
+            "jobs.jd.edit": {"hr", "hiring_manager"},
+            "jobs.generate_jd": {"hr", "hiring_manager"},
+            "docs.manage": {"hr", "admin"},
+        }
+        for permission, roles in expected.items():
+            bit = PERMISSION_BITS[permission]
+            for role in ("hr", "hiring_manager", "recruiter", "admin", "candidate"):
+                granted = role in roles
+                assert (permission in ROLE_PERMISSIONS.get(role, frozenset())) == granted, (permission, role)
+                assert bool(ROLE_PERMISSION_MASKS.get(role, 0) & bit) == granted, (permission, role)
+
+    def test_unknown_permission_denied(self):
+        assert not has_permission(User(email="hr@x.com", role="hr"), "does.not.exist")
+
+    def test_mask_resolved_once_per_user(self):
+        user = User(email="hr@x.com", role="hr")
+        has_permission(user, "docs.manage")
+        user.role = "recruiter"
+        # The cached principal keeps its resolved mask until it is re-created
+        assert has_permission(user, "docs.manage")
+
+    def test_dependency_shared_per_permission(self):
+        assert require_permission("docs.manage") is require_permission("docs.manage")
+        assert require_permission("docs.manage") is not require_permission("jobs.matcher.use")
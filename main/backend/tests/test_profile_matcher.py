@@ -0,0 +1,116 @@
+"""
+Unit tests for packed multi-candidate evaluation.
+"""
+import asyncio
+import json
+
+from app.services.ai import profile_matcher
+from app.services.ai.profile_matcher import (
+    _completion_tokens,
+    _parse_packed_verdicts,
+    evaluate_candidates,
+    plan_packs,
+)
+
+
+def _verdict(score):
+    return {"match_percentage": score, "recommendation": "interview", "strengths": [], "gaps": []}
+
+
+class TestPacking:
+    """Test pack planning and packed response parsing."""
+
+    def test_plan_packs_respects_budget_and_size(self):
+        assert plan_packs([100, 100, 100, 100], token_budget=250, max_pack_size=8) == [[0, 1], [2, 3]]
+        assert plan_packs([100] * 5, token_budget=10_000, max_pack_size=2) == [[0, 1], [2, 3], [4]]
+        # An oversized profile is evaluated on its own
+        assert plan_packs([50, 900, 50], token_budget=200, max_pack_size=8) == [[0], [1], [2]]
+
+    def test_parse_keeps_only_valid_verdicts(self):
+        content = json.dumps({"evaluations": [
+            {"candidate_id": "c1", **_verdict(80)},
+            {"candidate_id": "c2", "match_percentage": "high", "recommendation": "hire"},
+            {"candidate_id": "c9", **_verdict(10)},
+        ]})
+        assert _parse_packed_verdicts(content, ["c1", "c2", "c3"]) == {"c1": _verdict(80)}
+        assert _parse_packed_verdicts('{"evaluations": [', ["c1"]) == {}
+
+    def test_completion_limit_grows_with_profile_up_to_cap(self, monkeypatch):
+        monkeypatch.setattr(profile_matcher.settings, "MATCHER_COMPLETION_TOKENS", 400)
+        monkeypatch.setattr(profile_matcher.settings, "MATCHER_VERDICT_BASE_TOKENS", 200)
+        monkeypatch.setattr(profile_matcher.settings, "MATCHER_VERDICT_PROFILE_RATIO", 8)
+        assert _completion_tokens(0) == 200
+        assert _completion_tokens(800) == 300
+        assert _completion_tokens(5000) == 400
+
+
+class TestEvaluateCandidates:
+    """Test that missing verdicts are re-split and retried individually."""
+
+    def test_missing_verdicts_are_retried_individually(self, monkeypatch):
+        packed_calls, single_calls = [], []
+
+        async def fake_pack(candidates, safe_job_desc, user_id=None):
+            packed_calls.append(len(candidates))
+            return {"c1": _verdict(90)}, None  # c2 dropped by the model
+
+        async def fake_single(candidate_data, job_description, metadata=None, **gateway_options):
+            single_calls.append(candidate_data["name"])
+            if candidate_data["name"] == "C":
+                raise ValueError("bad output")
+            return _verdict(40)
+
+        monkeypatch.setattr(profile_matcher, "_evaluate_pack", fake_pack)
+        monkeypatch.setattr(profile_matcher, "evaluate_candidate", fake_single)
+        candidates = [({"name": name}, {}) for name in "ABC"]
+
+        async def collect():
+            return [item async for item in evaluate_candidates(candidates, "Python developer", max_pack_size=2)]
+
+        results = dict(asyncio.run(collect()))
+        assert packed_calls == [2]
+        assert single_calls == ["B", "C"]
+        assert results[0]["match_percentage"] == 90
+        assert results[1]["match_percentage"] == 40
+        assert isinstance(results[2], ValueError)
+
+    def test_duplicate_profiles_are_evaluated_once(self, monkeypatch):
+        packed = []
+
+        async def fake_pack(candidates, safe_job_desc, user_id=None):
+            packed.append([data["name"] for data, _ in candidates])
+            return {f"c{i + 1}": _verdict(50 + i) for i in range(len(candidates))}, None
+
+        monkeypatch.setattr(profile_matcher, "_evaluate_pack", fake_pack)
+        candidates = [({"name": name}, {}) for name in "ABA"]
+
+        async def collect():
+            return [item async for item in evaluate_candidates(candidates, "Python developer")]
+
+        results = dict(asyncio.run(collect()))
+        assert packed == [["A", "B"]]
+        assert results[2] == results[0] and results[2] is not results[0]
+        assert results[1]["match_percentage"] == 51
+
+    def test_token_usage_is_totalled_and_logged_once(self, monkeypatch, capsys):
+        async def fake_pack(candidates, safe_job_desc, user_id=None):
+            usage = {"prompt_tokens": 900, "completion_tokens": 300, "profile_tokens": 600, "pack_size": 2}
+            return {"c1": {**_verdict(70), "token_usage": usage}}, usage
+
+        async def fake_single(candidate_data, job_description, metadata=None, **gateway_options):
+            usage = {"prompt_tokens": 500, "completion_tokens": 150, "profile_tokens": 300, "pack_size": 1}
+            return {**_verdict(60), "token_usage": usage}
+
+        monkeypatch.setattr(profile_matcher, "_evaluate_pack", fake_pack)
+        monkeypatch.setattr(profile_matcher, "evaluate_candidate", fake_single)
+        candidates = [({"name": name}, {}) for name in "AB"]
+
+        async def collect():
+            return [item async for item in evaluate_candidates(candidates, "Python developer")]
+
+        asyncio.run(collect())
+        lines = [line for line in capsys.readouterr().out.splitlines() if line.startswith("Resume evaluation")]
+        assert lines == [
+            "Resume evaluation: 2 candidate(s) in 2 request(s), profile tokens 900, "
+            "prompt tokens 1400, completion tokens 450"
+        ]
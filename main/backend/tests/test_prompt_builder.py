@@ -0,0 +1,89 @@
+"""
+Unit tests for token-budgeted candidate profiles.
+"""
+import asyncio
+import json
+import sys
+import time
+import types
+
+from app.services.ai.prompt_builder import compile_candidate_profile
+from app.utils import token_counter
+from app.utils.token_counter import count_tokens, truncate_to_tokens
+
+
+def _resume():
+    filler = " ".join(f"word{i}" for i in range(3000))
+    raw_text = (
+        "[NAME]\n"
+        "Contact\n[EMAIL] [PHONE]\n"
+        "Summary\nBackend engineer.\n"
+        f"Projects\n{filler}\n"
+        "Professional Experience\nAcme Corp - Senior Engineer, 2018-2024. Built payment APIs in Python.\n"
+        "Technical Skills\nPython, FastAPI, PostgreSQL\n"
+        "Education\nBSc Computer Science\n"
+    )
+    return {
+        "name": "[NAME]",
+        "email": "[EMAIL]",
+        "phone": "[PHONE]",
+        "raw_text": raw_text,
+        "skills": ["Python", "FastAPI", "PostgreSQL"],
+        "experience_summary": "Acme Corp - Senior Engineer",
+    }
+
+
+class TestTokenCounter:
+    """Test counting and truncation (tiktoken or the character estimate)."""
+
+    def test_truncate_respects_limit(self):
+        text = "lorem ipsum " * 500
+        short = truncate_to_tokens(text, 50)
+        assert count_tokens(short) <= 50
+        assert short.endswith("[truncated]")
+        assert truncate_to_tokens("short text", 50) == "short text"
+
+    def test_slow_encoding_load_times_out_to_the_estimate(self, monkeypatch):
+        encoding = types.SimpleNamespace(encode=lambda text, disallowed_special=(): [0])
+
+        def slow_get_encoding(name):
+            time.sleep(0.2)  # a stalled download
+            return encoding
+
+        monkeypatch.setitem(sys.modules, "tiktoken", types.SimpleNamespace(get_encoding=slow_get_encoding))
+        monkeypatch.setattr(token_counter, "_encoding", None)
+        monkeypatch.setattr(token_counter, "_encoding_loaded", False)
+
+        async def run():
+            started = time.monotonic()
+            assert await token_counter.load_encoding(timeout=0.01) is None
+            assert time.monotonic() - started < 0.15
+            # Counting goes on with the estimate while the load finishes in its thread
+            assert count_tokens("x" * 40) == 11
+
+        asyncio.run(run())
+        assert count_tokens("x" * 40) == 1
+
+
+class TestCompileCandidateProfile:
+    """Test section priority and the token budget."""
+
+    def test_priority_sections_survive_and_profile_fits_budget(self):
+        profile = compile_candidate_profile(_resume(), token_budget=300)
+        sections = profile["sections"]
+        assert "raw_text" not in profile
+        assert "contact" not in sections
+        assert "Acme Corp" in sections["experience"]
+        assert "FastAPI" in sections["skills"]
+        assert "Computer Science" in sections["education"]
+        # The long projects section is cut, not the high-priority ones
+        assert sections.get("projects", "").endswith("[truncated]") or "projects" not in sections
+        assert count_tokens(json.dumps(profile, ensure_ascii=False)) <= 300
+        assert profile["skills"] == ["Python", "FastAPI", "PostgreSQL"]
+
+    def test_unstructured_text_is_truncated_and_compiling_is_idempotent(self):
+        data = {"name": "[NAME]", "raw_text": "free text " * 2000, "skills": []}
+        profile = compile_candidate_profile(data, token_budget=200)
+        assert profile["resume_text"].endswith("[truncated]")
+        assert count_tokens(json.dumps(profile)) <= 200
+        assert compile_candidate_profile(profile, token_budget=200) is profile
@@ -0,0 +1,33 @@
+"""
+Unit tests for the shared JSON encoding helpers.
+"""
+import json
+from datetime import datetime
+
+from pydantic import BaseModel
+
+from app.core.serialization import ORJSONResponse, dumps, dumps_str, format_sse
+
+
+class _Item(BaseModel):
+    name: str
+    at: datetime
+
+
+class TestSerialization:
+    """Test orjson encoding across transports."""
+
+    def test_dumps_handles_models_sets_and_unicode(self):
+        data = {"item": _Item(name="Zoë", at=datetime(2025, 1, 1, 9, 30)), "tags": {"a"}, 1: "x"}
+        decoded = json.loads(dumps(data))
+        assert decoded == {"item": {"name": "Zoë", "at": "2025-01-01T09:30:00"}, "tags": ["a"], "1": "x"}
+        assert "Zoë" in dumps_str({"n": "Zoë"})
+
+    def test_format_sse(self):
+        frame = format_sse("update", {"score": 0.5})
+        assert frame == b'event: update\ndata: {"score":0.5}\n\n'
+
+    def test_response_class(self):
+        response = ORJSONResponse({"ok": True})
+        assert response.body == b'{"ok":true}'
+        assert response.media_type == "application/json"
@@ -0,0 +1,77 @@
+"""
+Unit tests for single-flight request deduplication.
+"""
+import asyncio
+
+import pytest
+
+from app.utils.single_flight import SingleFlight, request_key
+
+
+def _params(content):
+    return {"model": "gpt-4o-mini", "temperature": 0.7, "messages": [{"role": "user", "content": content}]}
+
+
+class TestSingleFlight:
+    """Test key normalization, sharing, errors and the optional result cache."""
+
+    def test_request_key_normalizes(self):
+        a = _params("Explain this JD")
+        b = {"messages": [{"content": "  Explain this JD\n", "role": "user"}], "temperature": 0.7,
+             "model": "gpt-4o-mini"}
+        assert request_key(a) == request_key(b)
+        assert request_key(a) != request_key(_params("Rewrite this JD"))
+        assert request_key(a) != request_key({**a, "temperature": 0.2})
+
+    def test_concurrent_callers_share_one_call(self):
+        flight = SingleFlight()
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return {"reply": "ok"}
+
+        async def run():
+            results = await asyncio.gather(*(flight.do("k", upstream) for _ in range(5)))
+            # Finished calls are not reused without a TTL
+            results.append(await flight.do("k", upstream))
+            return results
+
+        results = asyncio.run(run())
+        assert len(calls) == 2
+        assert all(result == {"reply": "ok"} for result in results)
+        assert flight.stats()["shared"] == 4
+
+    def test_errors_are_shared_and_not_cached(self):
+        flight = SingleFlight(ttl=60)
+        calls = []
+
+        async def failing():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            raise RuntimeError("upstream down")
+
+        async def run():
+            return await asyncio.gather(*(flight.do("k", failing) for _ in range(3)), return_exceptions=True)
+
+        assert all(isinstance(r, RuntimeError) for r in asyncio.run(run()))
+        assert len(calls) == 1
+        with pytest.raises(RuntimeError):
+            asyncio.run(flight.do("k", failing))
+        assert len(calls) == 2
+
+    def test_ttl_serves_recent_results(self):
+        flight = SingleFlight(ttl=60)
+        calls = []
+
+        async def upstream():
+            calls.append(1)
+            return "done"
+
+        async def run():
+            return [await flight.do("k", upstream) for _ in range(3)]
+
+        assert asyncio.run(run()) == ["done"] * 3
+        assert len(calls) == 1
+        assert flight.stats()["cache_hits"] == 2
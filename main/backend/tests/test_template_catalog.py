@@ -0,0 +1,91 @@
+"""
+Unit tests for the in-process document template catalog.
+"""
+import asyncio
+
+import pytest
+from sqlalchemy import event
+
+from app.models.document import DocumentTemplate
+from app.services.template_catalog import TemplateCatalog, template_catalog
+
+
+@pytest.fixture
+def session_factory(session_factory, seed):
+    seed(
+        session_factory,
+        DocumentTemplate(id=1, name="Offer Letter", category="recruitment", file_path="offer.docx",
+                         required_fields=["employee_name"], optional_fields=[]),
+        DocumentTemplate(id=2, name="Senior Promotion Letter", category="employment", file_path="p.docx",
+                         required_fields=["employee_name", "new_designation"], optional_fields=["reason"]),
+        DocumentTemplate(id=3, name="Retired Letter", category="exit", file_path="r.docx",
+                         required_fields=[], optional_fields=[], is_active=False),
+    )
+    return session_factory
+
+
+def _count_template_selects(factory):
+    statements = []
+    engine = factory.kw["bind"].sync_engine
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        if "FROM document_templates" in statement:
+            statements.append(statement)
+
+    return statements
+
+
+class TestTemplateCatalog:
+    """Test loading, lookups and invalidation."""
+
+    def test_serves_from_memory_after_first_load(self, session_factory):
+        catalog = TemplateCatalog(ttl=60)
+        selects = _count_template_selects(session_factory)
+
+        async def run():
+            async with session_factory() as db:
+                active = await catalog.list_active(db)
+                recruitment = await catalog.list_active(db, "recruitment")
+                retired = await catalog.get(db, 3)
+                missing = await catalog.get(db, 99)
+            return active, recruitment, retired, missing
+
+        active, recruitment, retired, missing = asyncio.run(run())
+        assert [t.id for t in active] == [1, 2]
+        assert [t.name for t in recruitment] == ["Offer Letter"]
+        assert retired is not None and not retired.is_active
+        assert missing is None
+        assert len(selects) == 1
+
+    def test_precomputes_fields_and_template_file(self, session_factory):
+        catalog = TemplateCatalog(ttl=60)
+
+        async def run():
+            async with session_factory() as db:
+                return await catalog.get(db, 2)
+
+        promotion = asyncio.run(run())
+        # Partial name match, same rule the preview step used
+        assert promotion.template_filename == "promotion_letter.pdf"
+        required, optional = promotion.resolved_fields()
+        if not promotion.pdf_required_fields:
+            assert (required, optional) == (["employee_name", "new_designation"], ["reason"])
+        required.append("mutated")
+        assert "mutated" not in promotion.resolved_fields()[0]
+
+    def test_orm_writes_invalidate_the_shared_catalog(self, session_factory):
+        async def run():
+            async with session_factory() as db:
+                await template_catalog.load(db)
+                version = template_catalog.version
+                template = await db.get(DocumentTemplate, 1)
+                template.name = "Offer Letter v2"
+                await db.commit()
+                assert template_catalog.version > version
+                return (await template_catalog.get(db, 1)).name
+
+        try:
+            assert asyncio.run(run()) == "Offer Letter v2"
+        finally:
+            template_catalog.invalidate()
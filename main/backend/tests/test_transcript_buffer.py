@@ -0,0 +1,185 @@
+"""
+Unit tests for the write-behind interview transcript buffer.
+"""
+import asyncio
+import types
+from datetime import datetime
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.orm import undefer
+
+from app.models.interview import Interview
+from app.services.transcript_buffer import TranscriptBuffer
+
+
+@pytest.fixture
+def session_factory(session_factory, seed):
+    seed(session_factory, Interview(
+        id=1,
+        candidate_name="Jane",
+        role="Engineer",
+        round_type="Behavioral",
+        scheduled_at=datetime(2025, 1, 1, 10, 0),
+        interviewer_key="interviewer-abc",
+        candidate_key="candidate-abc",
+        transcript=[],
+    ))
+    return session_factory
+
+
+async def _load(factory, interview_id=1):
+    async with factory() as session:
+        result = await session.execute(
+            select(Interview).options(undefer(Interview.transcript)).where(Interview.id == interview_id)
+        )
+        return result.scalar_one()
+
+
+class TestTranscriptBuffer:
+    """Test buffering, batching and recovery."""
+
+    def test_changes_are_buffered_until_flush(self, session_factory, tmp_path):
+        async def run():
+            buffer = TranscriptBuffer(session_factory, str(tmp_path / "logs"), flush_interval=60, batch_size=100)
+            buffer.track(await _load(session_factory))
+            question = buffer.add_question(1, "Tell me about yourself")
+            buffer.add_response(1, question["id"], "I build things")
+
+            assert (await _load(session_factory)).transcript == []
+            assert buffer.snapshot(1)[0]["answer"] == "I build things"
+
+            await buffer.flush(1)
+            persisted = (await _load(session_factory)).transcript
+            assert persisted == [{"id": question["id"], "question": "Tell me about yourself", "answer": "I build things"}]
+            assert not list((tmp_path / "logs").glob("*.log"))
+
+        asyncio.run(run())
+
+    def test_batch_size_triggers_flush(self, session_factory, tmp_path):
+        async def run():
+            buffer = TranscriptBuffer(session_factory, str(tmp_path / "logs"), flush_interval=60, batch_size=2)
+            buffer.track(await _load(session_factory))
+            buffer.add_question(1, "Q1")
+            buffer.add_question(1, "Q2")
+            await asyncio.sleep(0.05)
+            assert len((await _load(session_factory)).transcript) == 2
+
+        asyncio.run(run())
+
+    def test_recover_replays_unflushed_log(self, session_factory, tmp_path):
+        async def run():
+            log_dir = str(tmp_path / "logs")
+            crashed = TranscriptBuffer(session_factory, log_dir, flush_interval=60, batch_size=100)
+            crashed.track(await _load(session_factory))
+            question = crashed.add_question(1, "Why this role?")
+            crashed.add_response(1, question["id"], "Growth")
+            # Simulate a crash: the worker exits without flushing (its owner lock is released)
+            await crashed.close()
+
+            fresh = TranscriptBuffer(session_factory, log_dir)
+            assert await fresh.recover() == 1
+            persisted = (await _load(session_factory)).transcript
+            assert persisted[0]["answer"] == "Growth"
+            # Replay is idempotent
+            assert await fresh.recover() == 0
+            assert not list((tmp_path / "logs").glob(f"worker_{crashed.owner}.lock"))
+
+        asyncio.run(run())
+
+    def test_recover_skips_logs_of_live_workers(self, session_factory, tmp_path):
+        async def run():
+            log_dir = str(tmp_path / "logs")
+            live = TranscriptBuffer(session_factory, log_dir, flush_interval=60, batch_size=100)
+            live.track(await _load(session_factory))
+            question = live.add_question(1, "Why this role?")
+            await asyncio.sleep(0.05)  # let the log line reach the file
+
+            booting = TranscriptBuffer(session_factory, log_dir)
+            assert await booting.recover() == 0
+            assert (await _load(session_factory)).transcript == []
+            assert len(list((tmp_path / "logs").glob("interview_1.*.log"))) == 1
+
+            await live.flush(1)
+            return question
+
+        question = asyncio.run(run())
+        assert question["question"] == "Why this role?"
+        assert not list((tmp_path / "logs").glob("interview_*.log"))
+
+    def test_flush_merges_direct_database_writes(self, session_factory, tmp_path):
+        async def run():
+            buffer = TranscriptBuffer(session_factory, str(tmp_path / "logs"), flush_interval=60, batch_size=100)
+            buffer.track(await _load(session_factory))
+            buffered = buffer.add_question(1, "Buffered question")
+            # Another worker's REST endpoint writes straight to the database meanwhile
+            async with session_factory() as session:
+                await session.execute(
+                    update(Interview).where(Interview.id == 1).values(
+                        transcript=[{"id": "q-rest", "question": "REST question", "answer": "REST answer"}]
+                    )
+                )
+                await session.commit()
+
+            await buffer.flush(1)
+            persisted = (await _load(session_factory)).transcript
+            return buffered, persisted, buffer.snapshot(1)
+
+        buffered, persisted, snapshot = asyncio.run(run())
+        assert [item["id"] for item in persisted] == ["q-rest", buffered["id"]]
+        assert persisted[0]["answer"] == "REST answer"
+        assert snapshot == persisted
+
+    def test_unknown_question_is_ignored(self, session_factory, tmp_path):
+        async def run():
+            buffer = TranscriptBuffer(session_factory, str(tmp_path / "logs"), flush_interval=60)
+            buffer.track(await _load(session_factory))
+            assert buffer.add_response(1, "q-missing", "answer") is None
+            assert buffer.snapshot(1) == []
+
+        asyncio.run(run())
+
+    def test_status_change_flushes_live_transcript(self, session_factory, tmp_path, monkeypatch):
+        from app.api.v1 import interviews
+        from app.schemas.interview import InterviewUpdateStatus
+
+        async def run():
+            buffer = TranscriptBuffer(session_factory, str(tmp_path / "logs"), flush_interval=60, batch_size=100)
+            monkeypatch.setattr(interviews, "transcript_buffer", buffer)
+            buffer.track(await _load(session_factory))
+            question = buffer.add_question(1, "Final question")
+            async with session_factory() as db:
+                await interviews.update_status(
+                    1, InterviewUpdateStatus(status="completed"), key="interviewer-abc", db=db
+                )
+                await db.commit()
+            return question, await _load(session_factory)
+
+        question, interview = asyncio.run(run())
+        assert interview.status == "completed"
+        assert [item["id"] for item in interview.transcript] == [question["id"]]
+
+    def test_owner_lock_survives_recovery_removing_the_file(self, session_factory, tmp_path, monkeypatch):
+        from app.services import transcript_buffer as module
+
+        log_dir = tmp_path / "logs"
+        booting = TranscriptBuffer(session_factory, str(log_dir))
+        real = module.fcntl
+        removed = []
+
+        def flock(fd, operation):
+            if not removed:
+                # Another worker's recovery sees the unlocked file and removes it
+                removed.append(True)
+                booting._owner_lock_path(booting.owner).unlink()
+            real.flock(fd, operation)
+
+        monkeypatch.setattr(module, "fcntl", types.SimpleNamespace(
+            flock=flock, LOCK_EX=real.LOCK_EX, LOCK_NB=real.LOCK_NB, LOCK_UN=real.LOCK_UN,
+        ))
+        booting._hold_owner_lock()
+
+        other = TranscriptBuffer(session_factory, str(log_dir))
+        assert removed
+        assert other._owner_alive(booting.owner)
+        asyncio.run(booting.close())
@@ -15,11 +15,17 @@ const statusVariant = {
   completed: 'success'
 }
 
+const statusOptions = ['scheduled', 'ongoing', 'completed', 'cancelled']
+
 export default function InterviewDashboard() {
   const navigate = useNavigate()
-  const interviews = useInterviewStore((state) => state.interviews)
+  const interviews = useInterviewStore((state) => state.summaries)
+  const total = useInterviewStore((state) => state.summaryTotal)
+  const query = useInterviewStore((state) => state.summaryQuery)
+  const loading = useInterviewStore((state) => state.loading)
   const fetchInterviews = useInterviewStore((state) => state.fetchInterviews)
   const [copied, setCopied] = useState(null)
+  const pageCount = Math.max(1, Math.ceil(total / query.pageSize))
 
   const buildLink = (key) => `${window.location.origin}/interview/join?key=${key}`
 
@@ -27,6 +33,8 @@ export default function InterviewDashboard() {
     fetchInterviews().catch(() => null)
   }, [fetchInterviews])
 
+  const changeQuery = (changes) => fetchInterviews(changes).catch(() => null)
+
   const handleCopy = async (key, label) => {
     try {
       await navigator.clipboard.writeText(buildLink(key))
@@ -65,6 +73,26 @@ export default function InterviewDashboard() {
           </Button>
         </div>
 
+        <div className="interview-dashboard__filters">
+          <select
+            value={query.status}
+            onChange={(e) => changeQuery({ status: e.target.value, page: 1 })}
+          >
+            <option value="">All statuses</option>
+            {statusOptions.map((status) => (
+              <option key={status} value={status}>{status}</option>
+            ))}
+          </select>
+          <input
+            type="search"
+            placeholder="Filter by role"
+            defaultValue={query.role}
+            onKeyDown={(e) => {
+              if (e.key === 'Enter') changeQuery({ role: e.target.value.trim(), page: 1 })
+            }}
+          />
+        </div>
+
         <Card padding="none">
           <div className="interview-dashboard__table">
             <div className="interview-dashboard__table-header">
@@ -125,6 +153,26 @@ export default function InterviewDashboard() {
             ))}
           </div>
         </Card>
+
+        <div className="interview-dashboard__pagination">
+          <Button
+            variant="ghost"
+            size="small"
+            disabled={loading || query.page <= 1}
+            onClick={() => changeQuery({ page: query.page - 1 })}
+          >
+            Previous
+          </Button>
+          <span>Page {query.page} of {pageCount} ({total} interviews)</span>
+          <Button
+            variant="ghost"
+            size="small"
+            disabled={loading || query.page >= pageCount}
+            onClick={() => changeQuery({ page: query.page + 1 })}
+          >
+            Next
+          </Button>
+        </div>
       </div>
     </AppLayout>
   )
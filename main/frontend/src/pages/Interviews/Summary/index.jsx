@@ -1,4 +1,4 @@
-import React from 'react'
+import React, { useEffect, useState } from 'react'
 import { useParams } from 'react-router-dom'
 import AppLayout from '@layouts/AppLayout'
 import Card from '@components/atoms/Card'
@@ -17,11 +17,19 @@ export default function InterviewSummary() {
   const interview = useInterviewStore((state) =>
     state.interviews.find((item) => String(item.id) === String(interviewId))
   )
+  const loadInterview = useInterviewStore((state) => state.loadInterview)
+  const [loadError, setLoadError] = useState(null)
+
+  // The dashboard only lists summaries; the transcript and feedback come from /interviews/{id}
+  useEffect(() => {
+    setLoadError(null)
+    loadInterview(interviewId).catch((error) => setLoadError(error.message))
+  }, [interviewId, loadInterview])
 
   if (!interview) {
     return (
       <AppLayout>
-        <p>Interview not found.</p>
+        <p>{loadError ? 'Interview not found.' : 'Loading interview...'}</p>
       </AppLayout>
     )
   }
@@ -23,7 +23,10 @@ const getKeyForInterview = (state, interviewId) => {
 }
 
 export const useInterviewStore = create((set, get) => ({
-  interviews: [],
+  interviews: [], // full interviews (with transcript) opened in this session
+  summaries: [], // current dashboard page
+  summaryTotal: 0,
+  summaryQuery: { page: 1, pageSize: 20, status: '', role: '' },
   pendingQuestions: {},
   loading: false,
   error: null,
@@ -57,21 +60,22 @@ export const useInterviewStore = create((set, get) => ({
     })
   },
 
-  fetchInterviews: async () => {
-    set({ loading: true, error: null })
+  fetchInterviews: async (query = {}) => {
+    const summaryQuery = { ...get().summaryQuery, ...query }
+    set({ loading: true, error: null, summaryQuery })
     try {
-      const data = await interviewsAPI.getInterviews()
-    set({
-      interviews: data,
-      pendingQuestions: Object.fromEntries(
-        data.map((i) => [i.id, dedupeById((i.transcript || []).filter((q) => !q.answer))])
-      ),
-      loading: false
-    })
-  } catch (error) {
-    set({ error: error.message, loading: false })
-    throw error
-  }
+      const data = await interviewsAPI.getInterviewSummaries(summaryQuery)
+      set({ summaries: data.items, summaryTotal: data.total, loading: false })
+    } catch (error) {
+      set({ error: error.message, loading: false })
+      throw error
+    }
+  },
+
+  loadInterview: async (interviewId) => {
+    const interview = await interviewsAPI.getInterview(interviewId)
+    get().syncInterview(interview)
+    return interview
   },
 
   scheduleInterview: async (formValues, files) => {
@@ -228,6 +232,8 @@ export const useInterviewStore = create((set, get) => ({
       sessionStorage.removeItem('participantKeys')
       return {
         interviews: [],
+        summaries: [],
+        summaryTotal: 0,
         pendingQuestions: {},
         loading: false,
         error: null,
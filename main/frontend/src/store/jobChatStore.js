@@ -4,7 +4,7 @@ import { api } from '@utils/api'
 const useJobChatStore = create((set, get) => ({
   // State
   messages: [],
-  conversationHistory: [],
+  sessionId: null,
   extractedData: {
     role: null,
     seniority: null,
@@ -48,7 +48,7 @@ const useJobChatStore = create((set, get) => ({
       // Call API
       const response = await api.post('/jobs/chat/interactive-builder', {
         message,
-        conversation_history: state.conversationHistory,
+        session_id: state.sessionId,
         current_data: state.extractedData
       })
 
@@ -62,11 +62,7 @@ const useJobChatStore = create((set, get) => ({
       // Update state with response
       set({
         messages: [...get().messages, assistantMessage],
-        conversationHistory: [
-          ...state.conversationHistory,
-          { role: 'user', content: message },
-          { role: 'assistant', content: response.reply }
-        ],
+        sessionId: response.session_id || null,
         extractedData: response.extracted_data,
         completionPercentage: response.completion_percentage,
         missingFields: response.missing_required,
@@ -110,7 +106,7 @@ const useJobChatStore = create((set, get) => ({
   resetChat: () => {
     set({
       messages: [],
-      conversationHistory: [],
+      sessionId: null,
       extractedData: {
         role: null,
         seniority: null,
@@ -144,7 +140,7 @@ const useJobChatStore = create((set, get) => ({
         content: 'Hi! I\'m here to help you create a job description. What role are you looking to hire for?',
         timestamp: new Date().toISOString()
       }],
-      conversationHistory: [],
+      sessionId: null,
       extractedData: {
         role: null,
         seniority: null,
@@ -244,7 +244,13 @@ export const documentsAPI = {
 }
 
 export const interviewsAPI = {
-  getInterviews: () => api.get('/interviews'),
+  // One dashboard page of compact rows; open an interview with getInterview for its transcript
+  getInterviewSummaries: ({ page = 1, pageSize = 20, status, role } = {}) => {
+    const params = new URLSearchParams({ page, page_size: pageSize })
+    if (status) params.append('status', status)
+    if (role) params.append('role', role)
+    return api.get(`/interviews/summary?${params}`)
+  },
   scheduleInterviewForm: (formData) => api.postFormData('/interviews/schedule', formData),
   getInterview: (id) => api.get(`/interviews/${id}`),
   updateStatus: (id, status, key) => api.put(`/interviews/${id}/status?key=${key}`, { status }),